@@ -0,0 +1,387 @@
+"""
+Banc d'essai des étapes du pipeline sur des données synthétiques
+
+Chaque étape (parsing Alpha Vantage JSON et CSV, écriture brute, validation,
+nettoyage, indicateurs, agrégation intraday, chargement) est chronométrée séparément à plusieurs
+échelles. Pour chacune sont mesurés le temps, le débit (lignes/s) et le pic de
+mémoire résidente. Les résultats sont comparés à benchmarks/baseline.json : le
+script échoue (code 1) si une étape perd plus de `--tolerance` de débit ou
+consomme nettement plus de mémoire.
+
+Usage :
+    python -m benchmarks.run_benchmarks
+    python -m benchmarks.run_benchmarks --scales small medium large --workers 8
+    python -m benchmarks.run_benchmarks --update-baseline
+
+Le chargement vise la base PostgreSQL de BENCHMARK_PG_DSN (base jetable : la table
+raw.stock_prices y est vidée). Sans elle, seule la préparation des lots COPY est
+mesurée, vers un curseur qui consomme le flux sans l'envoyer.
+
+La référence dépend de la machine : la régénérer avec --update-baseline sur la
+machine ETL après une amélioration volontaire.
+"""
+import os
+import gc
+import sys
+import json
+import time
+import shutil
+import logging
+import argparse
+import platform
+import resource
+import tempfile
+from contextlib import contextmanager
+
+from benchmarks.synthetic import generate_intraday, generate_ohlcv, to_alpha_vantage_csv, to_alpha_vantage_json
+from src.extraction.alpha_vantage import AlphaVantageExtractor
+from src.extraction.raw_store import RawDataStore
+from src.loading.postgres_loader import PostgresLoader
+from src.transformation.data_cleaning import clean
+from src.transformation.financial_indicators import FinancialIndicators
+from src.transformation.intraday_aggregation import aggregate_daily
+from src.utils.data_validation import DataValidator
+from src.utils.parallel import ShardedExecutor
+
+logger = logging.getLogger('benchmarks')
+
+# Échelles : (nombre de symboles, nombre de séances)
+SCALES = {
+    'small': (50, 1_000),
+    'medium': (500, 2_500),
+    'large': (2_000, 5_000)
+}
+
+# Nombre maximal de réponses JSON générées pour l'étape de parsing
+AV_SYMBOLS = 50
+
+# Barres minute agrégées : au plus INTRADAY_SYMBOLS symboles sur INTRADAY_DAYS séances
+INTRADAY_SYMBOLS = 100
+INTRADAY_DAYS = 10
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+# Marge absolue tolérée sur le pic mémoire, en Mo (bruit de l'allocateur)
+RSS_SLACK_MB = 64
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Banc d'essai du pipeline ETL-Finance")
+    parser.add_argument('--scales', nargs='+', default=['small', 'medium'], choices=sorted(SCALES))
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Processus utilisés pour le nettoyage (1 : exécution en série)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--tolerance', type=float, default=0.3,
+                        help="Perte de débit ou hausse de mémoire relative tolérée")
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--update-baseline', action='store_true')
+    parser.add_argument('--output', help="Fichier JSON où écrire les résultats")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    logging.getLogger().setLevel(logging.WARNING)
+
+    results = {}
+    for scale in args.scales:
+        n_symbols, n_days = SCALES[scale]
+        print(f"\n== {scale}: {n_symbols} symboles x {n_days} séances ==")
+        results[scale] = run_scale(n_symbols, n_days, args.seed, args.workers)
+        for stage, metrics in results[scale].items():
+            print(f"  {stage:<18} {metrics['rows']:>11,} lignes  {metrics['seconds']:>8.2f} s  "
+                  f"{metrics['rows_per_sec']:>12,.0f} lignes/s  pic {metrics['peak_rss_mb']:>8.1f} Mo "
+                  f"(+{metrics['rss_growth_mb'] or 0:.1f} Mo)")
+
+    report = {
+        'machine': {'python': platform.python_version(), 'cpus': os.cpu_count(), 'platform': platform.platform()},
+        'workers': args.workers,
+        'scales': results
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.update_baseline:
+        baseline = _read_json(args.baseline) or {'scales': {}}
+        baseline['machine'] = report['machine']
+        baseline['workers'] = args.workers
+        baseline['scales'].update(results)
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2)
+            f.write('\n')
+        print(f"\nRéférence mise à jour: {args.baseline}")
+        return 0
+
+    regressions = compare(results, _read_json(args.baseline), args.tolerance)
+    if regressions:
+        print("\nRégressions par rapport à la référence :")
+        for line in regressions:
+            print(f"  - {line}")
+        return 1
+    print("\nAucune régression par rapport à la référence")
+    return 0
+
+
+def run_scale(n_symbols, n_days, seed, workers):
+    """
+    Exécute toutes les étapes à une échelle donnée
+
+    Args:
+        n_symbols (int): Nombre de symboles
+        n_days (int): Nombre de séances
+        seed (int): Graine du générateur
+        workers (int): Processus utilisés pour le nettoyage
+
+    Returns:
+        dict: {étape: mesures}
+    """
+    prices = generate_ohlcv(n_symbols, n_days, seed=seed)
+
+    metrics = {}
+    raw_dir = tempfile.mkdtemp(prefix='etl_bench_raw_')
+    try:
+        metrics.update(measure_alpha_vantage(prices))
+
+        store = RawDataStore(raw_dir)
+        metrics['raw_save'], _ = measure(len(prices), lambda: store.write(
+            prices, 'benchmark', 'historical_1d'
+        ))
+
+        validator = DataValidator()
+        metrics['validation'], _ = measure(len(prices), lambda: validator.validate(prices))
+
+        executor = ShardedExecutor(max_workers=workers, kind='process' if workers > 1 else 'serial')
+        metrics['cleaning'], cleaned = measure(len(prices), lambda: clean(prices, executor))
+
+        engine = FinancialIndicators()
+        metrics['indicators'], _ = measure(len(cleaned), lambda: engine.compute(cleaned))
+
+        metrics['intraday_aggregate'] = measure_intraday(min(n_symbols, INTRADAY_SYMBOLS), seed)
+
+        with _connector() as (connector, backend):
+            loader = PostgresLoader(connector)
+            metrics['load'], _ = measure(len(cleaned), lambda: loader.load(
+                'raw.stock_prices', cleaned, source='benchmark'
+            ))
+            metrics['load']['backend'] = backend
+    finally:
+        shutil.rmtree(raw_dir, ignore_errors=True)
+
+    return metrics
+
+
+def measure_alpha_vantage(prices):
+    """
+    Mesure le décodage des réponses Alpha Vantage (JSON et CSV) d'une partie de l'univers
+
+    Les réponses ne vivent que le temps de la mesure : elles ne pèsent pas sur les étapes suivantes.
+
+    Args:
+        prices (pandas.DataFrame): Cours synthétiques
+
+    Returns:
+        dict: {étape: mesures}
+    """
+    av_symbols = prices['symbol'].unique()[:AV_SYMBOLS]
+    responses = [(symbol, to_alpha_vantage_json(prices[prices['symbol'] == symbol], symbol))
+                 for symbol in av_symbols]
+    csv_responses = [(symbol, to_alpha_vantage_csv(prices[prices['symbol'] == symbol]))
+                     for symbol in av_symbols]
+    av_rows = int(prices['symbol'].isin(av_symbols).sum())
+
+    metrics = {}
+    metrics['av_parse'], _ = measure(av_rows, lambda: [
+        AlphaVantageExtractor.parse_daily_adjusted(data, symbol) for symbol, data in responses
+    ])
+    metrics['av_parse_csv'], _ = measure(av_rows, lambda: [
+        AlphaVantageExtractor.parse_daily_adjusted_csv(text, symbol) for symbol, text in csv_responses
+    ])
+    return metrics
+
+
+def measure_intraday(n_symbols, seed):
+    """
+    Mesure l'agrégation de barres intraday en séances
+
+    Args:
+        n_symbols (int): Nombre de symboles
+        seed (int): Graine du générateur
+
+    Returns:
+        dict: Mesures de l'étape
+    """
+    bars = generate_intraday(n_symbols, INTRADAY_DAYS, seed=seed)
+    # Ordre d'arrivée des fenêtres téléchargées en parallèle : non trié
+    bars = bars.sample(frac=1.0, random_state=seed)
+    result, _ = measure(len(bars), lambda: aggregate_daily(bars))
+    return result
+
+
+def measure(rows, fn):
+    """
+    Chronomètre une étape et mesure son pic de mémoire résidente
+
+    Args:
+        rows (int): Nombre de lignes traitées par l'étape
+        fn (callable): Étape à exécuter
+
+    Returns:
+        tuple: (mesures, résultat de l'étape)
+    """
+    gc.collect()
+    _reset_peak_rss()
+    baseline_rss = _memory_mb('VmRSS:')
+    start = time.perf_counter()
+    result = fn()
+    seconds = time.perf_counter() - start
+    peak_rss = _peak_rss_mb()
+    return {
+        'rows': int(rows),
+        'seconds': round(seconds, 4),
+        'rows_per_sec': round(rows / seconds, 1) if seconds > 0 else float('inf'),
+        'peak_rss_mb': round(peak_rss, 1),
+        # Mémoire supplémentaire mobilisée par l'étape elle-même
+        'rss_growth_mb': round(max(peak_rss - baseline_rss, 0.0), 1) if baseline_rss is not None else None
+    }, result
+
+
+def compare(results, baseline, tolerance):
+    """
+    Compare les mesures à la référence
+
+    Args:
+        results (dict): Mesures {échelle: {étape: mesures}}
+        baseline (dict): Contenu de baseline.json (None si absent)
+        tolerance (float): Écart relatif toléré
+
+    Returns:
+        list: Descriptions des régressions
+    """
+    if not baseline:
+        print("\nPas de référence : lancer avec --update-baseline pour en créer une")
+        return []
+
+    regressions = []
+    for scale, stages in results.items():
+        for stage, metrics in stages.items():
+            reference = baseline.get('scales', {}).get(scale, {}).get(stage)
+            if reference is None or reference.get('backend') != metrics.get('backend'):
+                continue
+            if metrics['rows_per_sec'] < reference['rows_per_sec'] * (1 - tolerance):
+                regressions.append(
+                    f"{scale}/{stage}: {metrics['rows_per_sec']:,.0f} lignes/s "
+                    f"(référence {reference['rows_per_sec']:,.0f})"
+                )
+            memory = 'rss_growth_mb' if metrics.get('rss_growth_mb') is not None else 'peak_rss_mb'
+            if reference.get(memory) is not None and \
+                    metrics[memory] > reference[memory] * (1 + tolerance) + RSS_SLACK_MB:
+                regressions.append(
+                    f"{scale}/{stage}: mémoire {metrics[memory]:,.0f} Mo "
+                    f"(référence {reference[memory]:,.0f} Mo)"
+                )
+    return regressions
+
+
+@contextmanager
+def _connector():
+    dsn = os.environ.get('BENCHMARK_PG_DSN')
+    if not dsn:
+        yield _NullConnector(), 'copy_stream'
+        return
+
+    import psycopg2
+
+    connector = _DsnConnector(psycopg2.connect(dsn))
+    with connector.get_connection() as connection, connection.cursor() as cursor:
+        schema_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'sql', 'schema', 'create_tables.sql')
+        with open(schema_path, 'r') as f:
+            cursor.execute(f.read())
+        cursor.execute("TRUNCATE raw.stock_prices")
+    try:
+        yield connector, 'postgres'
+    finally:
+        connector.connection.close()
+
+
+class _DsnConnector:
+    # Connecteur minimal autour d'une connexion unique (interface de DatabaseConnector)
+    def __init__(self, connection):
+        self.connection = connection
+
+    @contextmanager
+    def get_connection(self):
+        try:
+            yield self.connection
+            self.connection.commit()
+        except Exception:
+            self.connection.rollback()
+            raise
+
+
+class _NullConnector:
+    # Remplaçant sans base : le flux COPY est entièrement produit puis consommé
+    @contextmanager
+    def get_connection(self):
+        yield _NullConnection()
+
+
+class _NullConnection:
+    def cursor(self):
+        return _NullCursor()
+
+    def commit(self):
+        pass
+
+
+class _NullCursor:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, params=None):
+        pass
+
+    def copy_expert(self, sql, stream):
+        while stream.read(1 << 20):
+            pass
+
+
+def _reset_peak_rss():
+    # Remet VmHWM au niveau de la mémoire résidente courante (Linux)
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+
+def _memory_mb(field):
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith(field):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def _peak_rss_mb():
+    peak = _memory_mb('VmHWM:')
+    if peak is not None:
+        return peak
+    # Repli : pic depuis le démarrage du processus (Ko sous Linux, octets sous macOS)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def _read_json(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,170 @@
+# Générateur déterministe de données de marché synthétiques
+import numpy as np
+import pandas as pd
+
+AV_COLUMNS = {
+    'open': '1. open',
+    'high': '2. high',
+    'low': '3. low',
+    'close': '4. close',
+    'adjusted_close': '5. adjusted close',
+    'volume': '6. volume',
+    'dividend': '7. dividend amount',
+    'split_coefficient': '8. split coefficient'
+}
+
+
+def generate_ohlcv(n_symbols, n_days, seed=0, start='2000-01-03', split_rate=1 / 1500,
+                   dividend_every=63, gap_rate=0.002):
+    """
+    Génère un univers de cours quotidiens reproductible (même graine, mêmes données)
+
+    Les clôtures suivent une marche géométrique aléatoire, avec :
+        - des splits (2:1, 3:1 ou 3:2) à la fréquence `split_rate` par séance
+        - un dividende trimestriel (tous les `dividend_every` jours ouvrés) pour la moitié des symboles
+        - des séances manquantes (`gap_rate`), comme les suspensions de cotation
+    La clôture ajustée est calculée à rebours à partir des splits et dividendes.
+
+    Args:
+        n_symbols (int): Nombre de symboles
+        n_days (int): Nombre de jours ouvrés
+        seed (int, optional): Graine du générateur
+        start (str, optional): Premier jour
+        split_rate (float, optional): Probabilité d'un split par séance
+        dividend_every (int, optional): Périodicité des dividendes en séances
+        gap_rate (float, optional): Proportion de séances supprimées
+
+    Returns:
+        pandas.DataFrame: Colonnes symbol, date, open, high, low, close, adjusted_close,
+                          volume, dividend, split_coefficient (format Alpha Vantage)
+    """
+    rng = np.random.default_rng(seed)
+    shape = (n_symbols, n_days)
+    dates = pd.bdate_range(start, periods=n_days)
+    symbols = np.array([f"SYN{i:05d}" for i in range(n_symbols)])
+
+    # Clôtures non ajustées : marche aléatoire puis division par les splits cumulés
+    drift = rng.normal(0.0003, 0.0002, size=(n_symbols, 1))
+    vol = rng.uniform(0.01, 0.03, size=(n_symbols, 1))
+    log_returns = drift + vol * rng.standard_normal(shape)
+    base = rng.uniform(10, 500, size=(n_symbols, 1)) * np.exp(np.cumsum(log_returns, axis=1))
+
+    split = np.ones(shape)
+    split_days = rng.random(shape) < split_rate
+    split[split_days] = rng.choice([2.0, 3.0, 1.5], size=int(split_days.sum()))
+    close = base / np.cumprod(split, axis=1)
+
+    dividend = np.zeros(shape)
+    payers = rng.random(n_symbols) < 0.5
+    dividend[np.ix_(payers, np.arange(dividend_every, n_days, dividend_every))] = 1.0
+    dividend *= close * rng.uniform(0.002, 0.01, size=(n_symbols, 1))
+
+    # Facteur d'ajustement : produit des événements postérieurs à chaque séance
+    previous = np.concatenate([close[:, :1], close[:, :-1]], axis=1)
+    event = (1.0 / split) * (1.0 - dividend / previous)
+    factor = np.ones(shape)
+    factor[:, :-1] = np.cumprod(event[:, :0:-1], axis=1)[:, ::-1]
+
+    spread = np.abs(rng.normal(0, 0.01, size=shape))
+    open_ = close * (1 + rng.normal(0, 0.005, size=shape))
+    high = np.maximum(open_, close) * (1 + spread)
+    low = np.minimum(open_, close) * (1 - spread)
+    volume = rng.lognormal(13, 1, size=shape).astype(np.int64)
+
+    frame = pd.DataFrame({
+        'symbol': np.repeat(symbols, n_days),
+        'date': np.tile(dates.values, n_symbols),
+        'open': open_.ravel().round(4),
+        'high': high.ravel().round(4),
+        'low': low.ravel().round(4),
+        'close': close.ravel().round(4),
+        'adjusted_close': (close * factor).ravel().round(4),
+        'volume': volume.ravel(),
+        'dividend': dividend.ravel().round(4),
+        'split_coefficient': split.ravel()
+    })
+
+    keep = rng.random(len(frame)) >= gap_rate
+    return frame[keep].reset_index(drop=True)
+
+
+def to_alpha_vantage_json(frame, symbol):
+    """
+    Convertit les cours d'un symbole en réponse TIME_SERIES_DAILY_ADJUSTED
+
+    Args:
+        frame (pandas.DataFrame): Cours d'un symbole (sortie de generate_ohlcv)
+        symbol (str): Symbole boursier
+
+    Returns:
+        dict: Réponse au format JSON de l'API (valeurs en chaînes, séances récentes en premier)
+    """
+    frame = frame.sort_values('date', ascending=False)
+    days = frame['date'].dt.strftime('%Y-%m-%d').tolist()
+    values = {av_name: frame[col].map('{:.4f}'.format if col != 'volume' else str).tolist()
+              for col, av_name in AV_COLUMNS.items()}
+    series = {day: {av_name: values[av_name][i] for av_name in AV_COLUMNS.values()}
+              for i, day in enumerate(days)}
+    return {
+        'Meta Data': {
+            '1. Information': 'Daily Time Series with Splits and Dividend Events',
+            '2. Symbol': symbol,
+            '4. Output Size': 'Full size'
+        },
+        'Time Series (Daily)': series
+    }
+
+
+def to_alpha_vantage_csv(frame):
+    """
+    Convertit les cours d'un symbole en réponse TIME_SERIES_DAILY_ADJUSTED (datatype=csv)
+
+    Args:
+        frame (pandas.DataFrame): Cours d'un symbole (sortie de generate_ohlcv)
+
+    Returns:
+        str: Corps CSV de l'API (séances récentes en premier)
+    """
+    frame = frame.sort_values('date', ascending=False)
+    csv = frame[list(AV_COLUMNS)].rename(columns={'dividend': 'dividend_amount'})
+    csv.insert(0, 'timestamp', frame['date'].dt.strftime('%Y-%m-%d'))
+    return csv.to_csv(index=False, float_format='%.4f')
+
+
+def generate_intraday(n_symbols, n_days, bars_per_day=390, seed=0, start='2024-01-02'):
+    """
+    Génère des barres minute reproductibles sur la séance régulière (9h30, heure de New York)
+
+    Args:
+        n_symbols (int): Nombre de symboles
+        n_days (int): Nombre de jours ouvrés
+        bars_per_day (int, optional): Barres par séance
+        seed (int, optional): Graine du générateur
+        start (str, optional): Première séance
+
+    Returns:
+        pandas.DataFrame: Colonnes 'symbol', 'ts' (UTC), 'open', 'high', 'low', 'close', 'volume',
+                          triées par symbole et horodatage
+    """
+    rng = np.random.default_rng(seed)
+    sessions = pd.bdate_range(start, periods=n_days).tz_localize('America/New_York') + pd.Timedelta(minutes=570)
+    opens = sessions.tz_convert('UTC').tz_localize(None).to_numpy(dtype='datetime64[ns]')
+    minutes = np.arange(bars_per_day).astype('timedelta64[m]').astype('timedelta64[ns]')
+    ts = pd.DatetimeIndex((opens[:, None] + minutes[None, :]).ravel()).tz_localize('UTC')
+
+    per_symbol = len(ts)
+    n = n_symbols * per_symbol
+    steps = rng.normal(0.0, 0.0005, size=(n_symbols, per_symbol))
+    close = 100.0 * np.exp(np.cumsum(steps, axis=1)).ravel()
+    spread = np.abs(rng.normal(0.0, 0.0003, size=n)) * close
+    open_ = close * np.exp(rng.normal(0.0, 0.0002, size=n))
+
+    return pd.DataFrame({
+        'symbol': np.repeat([f"SYM{i:05d}" for i in range(n_symbols)], per_symbol),
+        'ts': np.tile(ts, n_symbols),
+        'open': open_,
+        'high': np.maximum(open_, close) + spread,
+        'low': np.minimum(open_, close) - spread,
+        'close': close,
+        'volume': rng.integers(100, 50_000, size=n)
+    })
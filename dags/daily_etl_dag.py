@@ -1 +1,39 @@
-# DAG Airflow pour mise à jour quotidienne
\ No newline at end of file
+# DAG Airflow pour mise à jour quotidienne
+from datetime import datetime, timedelta
+
+from airflow import DAG
+from airflow.operators.python import PythonOperator
+
+default_args = {
+    'owner': 'etl-finance',
+    'depends_on_past': False,
+    'retries': 1,
+    'retry_delay': timedelta(minutes=15)
+}
+
+
+def run_daily_etl(**context):
+    # Import à l'exécution : le parseur de DAG n'a pas à charger pandas et yfinance
+    from main import run_daily
+
+    stats = run_daily(env='production')
+    return stats
+
+
+with DAG(
+    dag_id='daily_etl',
+    description="Extraction, transformation et chargement quotidiens des cours",
+    default_args=default_args,
+    start_date=datetime(2024, 1, 1),
+    # Après la clôture du marché américain, du lundi au vendredi
+    schedule_interval='30 22 * * 1-5',
+    catchup=False,
+    max_active_runs=1,
+    tags=['etl', 'daily']
+) as dag:
+
+    PythonOperator(
+        task_id='run_daily_pipeline',
+        python_callable=run_daily_etl,
+        execution_timeout=timedelta(hours=3)
+    )
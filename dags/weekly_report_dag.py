@@ -1 +1,65 @@
-# DAG Airflow pour rapports hebdomadaires
\ No newline at end of file
+# DAG Airflow pour rapports hebdomadaires
+from datetime import datetime, timedelta
+
+from airflow import DAG
+from airflow.operators.python import PythonOperator
+
+default_args = {
+    'owner': 'etl-finance',
+    'depends_on_past': False,
+    'retries': 1,
+    'retry_delay': timedelta(minutes=10)
+}
+
+REPORTS = ('WEEKLY_REPORT', 'MONTHLY_REPORT')
+
+
+def export_report(name, **context):
+    # Import à l'exécution : le parseur de DAG n'a pas à charger pandas et psycopg2
+    from src.jobs import DB_CONFIG_PATH
+    from src.utils.db_connection import DatabaseConnector
+    from src.utils.reporting import ReportRunner
+
+    db = DatabaseConnector(config_path=DB_CONFIG_PATH, env='production')
+    try:
+        # Les agrégats sont tenus à jour par le job quotidien : le rapport ne fait que les lire
+        return ReportRunner(db).export(name, run_date=context['logical_date'])
+    finally:
+        db.close()
+
+
+def run_maintenance(**context):
+    # Import à l'exécution, comme pour les rapports
+    from main import run_maintenance as run_db_maintenance
+
+    return run_db_maintenance(env='production')
+
+
+with DAG(
+    dag_id='weekly_report',
+    description="Rapports hebdomadaire et mensuel servis par les tables d'agrégats, puis maintenance de la base",
+    default_args=default_args,
+    start_date=datetime(2024, 1, 1),
+    # Samedi matin, après le dernier job quotidien de la semaine
+    schedule_interval='0 6 * * 6',
+    catchup=False,
+    max_active_runs=1,
+    tags=['reporting', 'weekly']
+) as dag:
+
+    exports = [
+        PythonOperator(
+            task_id=f"export_{report.lower()}",
+            python_callable=export_report,
+            op_kwargs={'name': report},
+            execution_timeout=timedelta(minutes=30)
+        )
+        for report in REPORTS
+    ]
+
+    # Rétention et nettoyage une fois les rapports exportés, hors des jours de cotation
+    exports >> PythonOperator(
+        task_id='database_maintenance',
+        python_callable=run_maintenance,
+        execution_timeout=timedelta(hours=1)
+    )
@@ -0,0 +1,79 @@
+# Point d'entrée du pipeline ETL-Finance
+#
+# Les jobs (src/jobs.py) et leurs dépendances (pandas, yfinance, psycopg2...) ne sont
+# importés qu'au lancement d'un job : `python main.py --help` et l'analyse des DAG
+# Airflow, qui importent ce module, restent rapides
+import argparse
+
+# Jobs disponibles (clés de src.jobs.JOBS)
+MODES = ('daily', 'intraday', 'maintenance')
+
+
+def run_daily(config_path=None, env='development', symbols=None):
+    """
+    Exécute le job quotidien (appelé par la ligne de commande et par le DAG Airflow)
+
+    Args:
+        config_path (str, optional): Chemin de config/pipeline.yml
+        env (str, optional): Environnement de base de données
+        symbols (list, optional): Symboles à traiter à la place de ceux de la configuration
+
+    Returns:
+        dict: Statistiques par étape
+    """
+    from src.jobs import run_job
+
+    return run_job('daily', config_path, env, symbols)
+
+
+def run_intraday(config_path=None, env='development', symbols=None):
+    """
+    Exécute le job intraday
+
+    Args:
+        config_path (str, optional): Chemin de config/pipeline.yml
+        env (str, optional): Environnement de base de données
+        symbols (list, optional): Symboles à traiter à la place de ceux de la configuration
+
+    Returns:
+        dict: Statistiques par étape
+    """
+    from src.jobs import run_job
+
+    return run_job('intraday', config_path, env, symbols)
+
+
+def run_maintenance(config_path=None, env='development'):
+    """
+    Exécute la maintenance de la base : partitions, rétention et nettoyage (DAG hebdomadaire)
+
+    Args:
+        config_path (str, optional): Chemin de config/pipeline.yml
+        env (str, optional): Environnement de base de données
+
+    Returns:
+        dict: Partitions créées
+    """
+    from src.jobs import run_job
+
+    return run_job('maintenance', config_path, env)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pipeline ETL-Finance")
+    parser.add_argument('--mode', default='daily', choices=MODES, help="Job à exécuter")
+    parser.add_argument('--config', default=None, help="Chemin de config/pipeline.yml")
+    parser.add_argument('--env', default='development', choices=['development', 'production'])
+    parser.add_argument('--symbols', nargs='+', default=None, help="Symboles à traiter")
+    parser.add_argument('--log-level', default='INFO')
+    args = parser.parse_args()
+
+    from src.jobs import run_job
+    from src.utils.logger import setup_logging
+
+    setup_logging(args.log_level)
+    run_job(args.mode, args.config, args.env, args.symbols)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,32 +1,13 @@
 -- Opérations de nettoyage et maintenance
 -- Fichier: sql/maintenance/cleanup.sql
 
--- Supprimer les données trop anciennes (plus de 2 ans)
-DELETE FROM raw.stock_prices WHERE date < CURRENT_DATE - INTERVAL '2 years';
-
--- Supprimer les doublons potentiels dans les données brutes
-DELETE FROM raw.stock_prices
-WHERE id IN (
-    SELECT id
-    FROM (
-        SELECT id,
-               ROW_NUMBER() OVER (PARTITION BY symbol, date ORDER BY id) as row_num
-        FROM raw.stock_prices
-    ) t
-    WHERE t.row_num > 1
-);
-
--- Vacuum pour récupérer l'espace disque et optimiser les tables
-VACUUM ANALYZE raw.stock_prices;
-VACUUM ANALYZE processed.stock_metrics;
-VACUUM ANALYZE analytics.financial_kpis;
-
-
-
-
-
-
-
-
-
-
+-- La rétention de raw.stock_prices (2 ans) ne passe plus par un DELETE : les
+-- partitions mensuelles expirées sont détachées puis supprimées par
+-- DatabaseMaintenance.apply_retention, sans ligne morte à nettoyer.
+-- Les doublons (symbol, date) sont empêchés par les contraintes d'unicité.
+
+-- Mise à jour des statistiques du planificateur (sans verrou bloquant, compatible
+-- avec une transaction contrairement à VACUUM ; l'autovacuum récupère l'espace)
+ANALYZE raw.stock_prices;
+ANALYZE processed.stock_metrics;
+ANALYZE analytics.financial_kpis;
@@ -3,19 +3,23 @@
 -- Indexes pour raw.stock_prices
 CREATE INDEX IF NOT EXISTS idx_stock_prices_symbol ON raw.stock_prices(symbol);
 CREATE INDEX IF NOT EXISTS idx_stock_prices_date ON raw.stock_prices(date);
-CREATE INDEX IF NOT EXISTS idx_stock_prices_symbol_date ON raw.stock_prices(symbol, date);
+-- Clé (symbol, date) unique : requise par l'upsert du chargeur (ON CONFLICT)
+CREATE UNIQUE INDEX IF NOT EXISTS uq_stock_prices_symbol_date ON raw.stock_prices(symbol, date);
+
+-- Index pour raw.intraday_bars (la clé primaire couvre symbol, ts)
+CREATE INDEX IF NOT EXISTS idx_intraday_bars_ts ON raw.intraday_bars(ts);
 
 -- Indexes pour processed.stock_metrics
 CREATE INDEX IF NOT EXISTS idx_stock_metrics_symbol ON processed.stock_metrics(symbol);
 CREATE INDEX IF NOT EXISTS idx_stock_metrics_date ON processed.stock_metrics(date);
-CREATE INDEX IF NOT EXISTS idx_stock_metrics_symbol_date ON processed.stock_metrics(symbol, date);
+CREATE UNIQUE INDEX IF NOT EXISTS uq_stock_metrics_symbol_date ON processed.stock_metrics(symbol, date);
 
 -- Indexes pour analytics.financial_kpis
 CREATE INDEX IF NOT EXISTS idx_financial_kpis_symbol ON analytics.financial_kpis(symbol);
 CREATE INDEX IF NOT EXISTS idx_financial_kpis_date ON analytics.financial_kpis(date);
 CREATE INDEX IF NOT EXISTS idx_financial_kpis_sector ON analytics.financial_kpis(sector);
 CREATE INDEX IF NOT EXISTS idx_financial_kpis_region ON analytics.financial_kpis(region);
-CREATE INDEX IF NOT EXISTS idx_financial_kpis_symbol_date ON analytics.financial_kpis(symbol, date);
+CREATE UNIQUE INDEX IF NOT EXISTS uq_financial_kpis_symbol_date ON analytics.financial_kpis(symbol, date);
 
 -- Index pour recherche par secteur et région
 CREATE INDEX IF NOT EXISTS idx_financial_kpis_sector_region ON analytics.financial_kpis(sector, region);
@@ -24,4 +28,11 @@ CREATE INDEX IF NOT EXISTS idx_financial_kpis_sector_region ON analytics.financi
 CREATE INDEX IF NOT EXISTS idx_financial_kpis_risk_score ON analytics.financial_kpis(risk_score DESC);
 
 -- Index pour tri par profit_margin
-CREATE INDEX IF NOT EXISTS idx_financial_kpis_profit_margin ON analytics.financial_kpis(profit_margin DESC);
\ No newline at end of file
+CREATE INDEX IF NOT EXISTS idx_financial_kpis_profit_margin ON analytics.financial_kpis(profit_margin DESC);
+
+-- Index pour analytics.price_signals (la clé primaire couvre symbol, date)
+CREATE INDEX IF NOT EXISTS idx_price_signals_date ON analytics.price_signals(date);
+
+-- Index pour les agrégats des rapports (la clé primaire couvre symbol, period_start)
+CREATE INDEX IF NOT EXISTS idx_weekly_rollup_period ON analytics.weekly_rollup(period_start);
+CREATE INDEX IF NOT EXISTS idx_monthly_rollup_period ON analytics.monthly_rollup(period_start);
@@ -0,0 +1,94 @@
+-- Rafraîchissement incrémental des tables d'analyse
+-- Fichier: sql/maintenance/refresh_analytics.sql
+--
+-- Paramètres (psycopg2) : symbols, tableau des symboles touchés par le dernier
+-- chargement, et start_dates, première séance modifiée de chacun d'eux.
+-- Seules les séances postérieures sont recalculées puis fusionnées.
+
+-- Recalcul des indicateurs et signaux des séances touchées
+WITH touched AS (
+    SELECT symbol, start_date
+    FROM unnest(%(symbols)s::varchar[], %(start_dates)s::date[]) AS t(symbol, start_date)
+),
+-- La plus longue fenêtre (ma_200) remonte 199 séances avant la séance calculée :
+-- 400 jours calendaires en couvrent environ 275. La borne globale permet au
+-- planificateur d'écarter les partitions plus anciennes
+history AS (
+    SELECT p.symbol, p.date, p.close
+    FROM raw.stock_prices p
+    JOIN touched t ON p.symbol = t.symbol
+    WHERE p.date >= t.start_date - INTERVAL '400 days'
+      AND p.date >= (SELECT MIN(start_date) FROM touched) - INTERVAL '400 days'
+),
+trends AS (
+    SELECT 
+        symbol,
+        date,
+        close,
+        LAG(close, 1) OVER w AS prev_day_close,
+        (close - LAG(close, 1) OVER w) / NULLIF(LAG(close, 1) OVER w, 0) * 100 AS daily_return_pct,
+        AVG(close) OVER (w ROWS BETWEEN 19 PRECEDING AND CURRENT ROW) AS ma_20,
+        AVG(close) OVER (w ROWS BETWEEN 49 PRECEDING AND CURRENT ROW) AS ma_50,
+        AVG(close) OVER (w ROWS BETWEEN 199 PRECEDING AND CURRENT ROW) AS ma_200
+    FROM history
+    WINDOW w AS (PARTITION BY symbol ORDER BY date)
+),
+signals AS (
+    SELECT 
+        symbol,
+        date,
+        close,
+        prev_day_close,
+        daily_return_pct,
+        ma_20,
+        ma_50,
+        ma_200,
+        CASE 
+            WHEN ma_20 > ma_50 AND LAG(ma_20, 1) OVER w <= LAG(ma_50, 1) OVER w 
+            THEN 'GOLDEN_CROSS'
+            WHEN ma_20 < ma_50 AND LAG(ma_20, 1) OVER w >= LAG(ma_50, 1) OVER w 
+            THEN 'DEATH_CROSS'
+            WHEN ma_20 > ma_50 THEN 'BULLISH'
+            WHEN ma_20 < ma_50 THEN 'BEARISH'
+            ELSE 'NEUTRAL'
+        END AS trend_signal,
+        CASE 
+            WHEN close > ma_200 THEN 'ABOVE_200MA'
+            ELSE 'BELOW_200MA'
+        END AS long_term_trend,
+        STDDEV(daily_return_pct) OVER (w ROWS BETWEEN 19 PRECEDING AND CURRENT ROW) AS volatility_20d,
+        STDDEV(daily_return_pct) OVER (w ROWS BETWEEN 59 PRECEDING AND CURRENT ROW) AS volatility_60d,
+        AVG(ABS(daily_return_pct)) OVER (w ROWS BETWEEN 19 PRECEDING AND CURRENT ROW) AS avg_daily_movement
+    FROM trends
+    WINDOW w AS (PARTITION BY symbol ORDER BY date)
+)
+INSERT INTO analytics.price_signals (
+    symbol, date, close, prev_day_close, daily_return_pct, ma_20, ma_50, ma_200,
+    trend_signal, long_term_trend, volatility_20d, volatility_60d, avg_daily_movement
+)
+SELECT 
+    s.symbol, s.date, s.close, s.prev_day_close, s.daily_return_pct, s.ma_20, s.ma_50, s.ma_200,
+    s.trend_signal, s.long_term_trend, s.volatility_20d, s.volatility_60d, s.avg_daily_movement
+FROM signals s
+JOIN touched t ON s.symbol = t.symbol
+WHERE s.date >= t.start_date
+ON CONFLICT (symbol, date) DO UPDATE SET
+    close = EXCLUDED.close,
+    prev_day_close = EXCLUDED.prev_day_close,
+    daily_return_pct = EXCLUDED.daily_return_pct,
+    ma_20 = EXCLUDED.ma_20,
+    ma_50 = EXCLUDED.ma_50,
+    ma_200 = EXCLUDED.ma_200,
+    trend_signal = EXCLUDED.trend_signal,
+    long_term_trend = EXCLUDED.long_term_trend,
+    volatility_20d = EXCLUDED.volatility_20d,
+    volatility_60d = EXCLUDED.volatility_60d,
+    avg_daily_movement = EXCLUDED.avg_daily_movement,
+    refreshed_at = CURRENT_TIMESTAMP;
+
+-- Séances sorties de raw.stock_prices par la rétention
+DELETE FROM analytics.price_signals
+WHERE date < (SELECT MIN(date) FROM raw.stock_prices);
+
+-- Tableau de bord : rafraîchissement sans verrou bloquant pour les lecteurs
+REFRESH MATERIALIZED VIEW CONCURRENTLY analytics.financial_dashboard;
@@ -0,0 +1,122 @@
+-- Rafraîchissement incrémental des agrégats hebdomadaires et mensuels
+-- Fichier: sql/maintenance/refresh_rollups.sql
+--
+-- Paramètres (psycopg2) : symbols, tableau des symboles touchés par le dernier
+-- chargement, et start_dates, première séance modifiée de chacun d'eux.
+-- Seules les semaines et les mois contenant une séance modifiée (ou postérieurs)
+-- sont recalculés puis fusionnés : le coût ne dépend pas de la profondeur de l'historique.
+
+-- Semaines touchées
+WITH touched AS (
+    SELECT symbol, date_trunc('week', start_date)::date AS period_start
+    FROM unnest(%(symbols)s::varchar[], %(start_dates)s::date[]) AS t(symbol, start_date)
+),
+-- La borne globale permet au planificateur d'écarter les partitions plus anciennes
+bars AS (
+    SELECT p.symbol, p.date, p.open, p.high, p.low, p.close, p.volume, m.volatility
+    FROM raw.stock_prices p
+    JOIN touched t ON p.symbol = t.symbol
+    LEFT JOIN processed.stock_metrics m ON m.symbol = p.symbol AND m.date = p.date
+    WHERE p.date >= t.period_start
+      AND p.date >= (SELECT MIN(period_start) FROM touched)
+),
+periods AS (
+    SELECT
+        symbol,
+        date_trunc('week', date)::date AS period_start,
+        MAX(date) AS period_end,
+        (array_agg(open ORDER BY date))[1] AS open,
+        MAX(high) AS high,
+        MIN(low) AS low,
+        (array_agg(close ORDER BY date DESC))[1] AS close,
+        (array_agg(close ORDER BY date))[1] AS first_close,
+        MAX(close) AS high_close,
+        MIN(close) AS low_close,
+        AVG(close) AS avg_close,
+        SUM(volume) AS volume,
+        AVG(volatility) AS avg_volatility,
+        COUNT(*) AS trading_days
+    FROM bars
+    GROUP BY symbol, date_trunc('week', date)
+)
+INSERT INTO analytics.weekly_rollup (
+    symbol, period_start, period_end, open, high, low, close, first_close, high_close,
+    low_close, avg_close, volume, avg_volatility, trading_days, return_pct
+)
+SELECT
+    symbol, period_start, period_end, open, high, low, close, first_close, high_close,
+    low_close, avg_close, volume, avg_volatility, trading_days,
+    (close - first_close) / NULLIF(first_close, 0) * 100 AS return_pct
+FROM periods
+ON CONFLICT (symbol, period_start) DO UPDATE SET
+    period_end = EXCLUDED.period_end,
+    open = EXCLUDED.open,
+    high = EXCLUDED.high,
+    low = EXCLUDED.low,
+    close = EXCLUDED.close,
+    first_close = EXCLUDED.first_close,
+    high_close = EXCLUDED.high_close,
+    low_close = EXCLUDED.low_close,
+    avg_close = EXCLUDED.avg_close,
+    volume = EXCLUDED.volume,
+    avg_volatility = EXCLUDED.avg_volatility,
+    trading_days = EXCLUDED.trading_days,
+    return_pct = EXCLUDED.return_pct,
+    refreshed_at = CURRENT_TIMESTAMP;
+
+-- Mois touchés
+WITH touched AS (
+    SELECT symbol, date_trunc('month', start_date)::date AS period_start
+    FROM unnest(%(symbols)s::varchar[], %(start_dates)s::date[]) AS t(symbol, start_date)
+),
+bars AS (
+    SELECT p.symbol, p.date, p.open, p.high, p.low, p.close, p.volume, m.volatility
+    FROM raw.stock_prices p
+    JOIN touched t ON p.symbol = t.symbol
+    LEFT JOIN processed.stock_metrics m ON m.symbol = p.symbol AND m.date = p.date
+    WHERE p.date >= t.period_start
+      AND p.date >= (SELECT MIN(period_start) FROM touched)
+),
+periods AS (
+    SELECT
+        symbol,
+        date_trunc('month', date)::date AS period_start,
+        MAX(date) AS period_end,
+        (array_agg(open ORDER BY date))[1] AS open,
+        MAX(high) AS high,
+        MIN(low) AS low,
+        (array_agg(close ORDER BY date DESC))[1] AS close,
+        (array_agg(close ORDER BY date))[1] AS first_close,
+        MAX(close) AS high_close,
+        MIN(close) AS low_close,
+        AVG(close) AS avg_close,
+        SUM(volume) AS volume,
+        AVG(volatility) AS avg_volatility,
+        COUNT(*) AS trading_days
+    FROM bars
+    GROUP BY symbol, date_trunc('month', date)
+)
+INSERT INTO analytics.monthly_rollup (
+    symbol, period_start, period_end, open, high, low, close, first_close, high_close,
+    low_close, avg_close, volume, avg_volatility, trading_days, return_pct
+)
+SELECT
+    symbol, period_start, period_end, open, high, low, close, first_close, high_close,
+    low_close, avg_close, volume, avg_volatility, trading_days,
+    (close - first_close) / NULLIF(first_close, 0) * 100 AS return_pct
+FROM periods
+ON CONFLICT (symbol, period_start) DO UPDATE SET
+    period_end = EXCLUDED.period_end,
+    open = EXCLUDED.open,
+    high = EXCLUDED.high,
+    low = EXCLUDED.low,
+    close = EXCLUDED.close,
+    first_close = EXCLUDED.first_close,
+    high_close = EXCLUDED.high_close,
+    low_close = EXCLUDED.low_close,
+    avg_close = EXCLUDED.avg_close,
+    volume = EXCLUDED.volume,
+    avg_volatility = EXCLUDED.avg_volatility,
+    trading_days = EXCLUDED.trading_days,
+    return_pct = EXCLUDED.return_pct,
+    refreshed_at = CURRENT_TIMESTAMP;
@@ -26,6 +26,10 @@ WHERE NOT EXISTS (
 );
 
 -- Calcul des moyennes mobiles pour les symboles qui n'en ont pas encore
+-- (le job quotidien utilise IndicatorState de src/transformation/financial_indicators.py,
+-- qui n'écrit que les nouvelles lignes ; cette requête sert au rattrapage)
+-- Seul l'historique nécessaire aux fenêtres de 200 séances précédant la plus ancienne
+-- ligne incomplète est relu, au lieu de toute la table raw.stock_prices
 UPDATE processed.stock_metrics sm
 SET 
     ma_20 = subquery.ma_20,
@@ -39,6 +43,10 @@ FROM (
         AVG(close) OVER (PARTITION BY symbol ORDER BY date ROWS BETWEEN 49 PRECEDING AND CURRENT ROW) as ma_50,
         AVG(close) OVER (PARTITION BY symbol ORDER BY date ROWS BETWEEN 199 PRECEDING AND CURRENT ROW) as ma_200
     FROM raw.stock_prices
+    WHERE date >= (
+        SELECT MIN(date) FROM processed.stock_metrics
+        WHERE ma_20 IS NULL OR ma_50 IS NULL OR ma_200 IS NULL
+    ) - INTERVAL '400 days'
 ) as subquery
 WHERE sm.symbol = subquery.symbol 
   AND sm.date = subquery.date
@@ -19,41 +19,39 @@ ORDER BY symbol;
 -- END DAILY_REPORT
 
 -- BEGIN WEEKLY_REPORT
-WITH latest_dates AS (
-    SELECT 
-        symbol,
-        MAX(date) as latest_date,
-        date_trunc('week', MAX(date)) as week_start
-    FROM processed.stock_metrics
-    GROUP BY symbol, date_trunc('week', date)
-)
-SELECT 
-    sm.symbol,
-    ld.week_start,
-    FIRST_VALUE(sm.close) OVER (PARTITION BY sm.symbol ORDER BY sm.date) as week_open,
-    LAST_VALUE(sm.close) OVER (PARTITION BY sm.symbol ORDER BY sm.date ROWS BETWEEN UNBOUNDED PRECEDING AND UNBOUNDED FOLLOWING) as week_close,
-    MAX(sm.close) OVER (PARTITION BY sm.symbol) as week_high,
-    MIN(sm.close) OVER (PARTITION BY sm.symbol) as week_low,
-    AVG(sm.volatility) OVER (PARTITION BY sm.symbol) as avg_volatility
-FROM processed.stock_metrics sm
-JOIN latest_dates ld ON sm.symbol = ld.symbol AND sm.date BETWEEN ld.week_start AND ld.latest_date
-ORDER BY sm.symbol, ld.week_start;
+-- Dernière semaine de chaque symbole, servie par analytics.weekly_rollup
+-- (sql/maintenance/refresh_rollups.sql) : aucune lecture de l'historique quotidien.
+-- Ouverture et extrêmes restent définis sur les clôtures
+SELECT DISTINCT ON (symbol)
+    symbol,
+    period_start as week_start,
+    period_end as last_trading_day,
+    first_close as week_open,
+    close as week_close,
+    high_close as week_high,
+    low_close as week_low,
+    volume as week_volume,
+    avg_volatility,
+    return_pct as weekly_return_pct
+FROM analytics.weekly_rollup
+WHERE period_start >= date_trunc('week', current_date - interval '4 weeks')
+ORDER BY symbol, period_start DESC;
 -- END WEEKLY_REPORT
 
 -- BEGIN MONTHLY_REPORT
+-- Trois derniers mois et mois en cours, servis par analytics.monthly_rollup
 SELECT 
     symbol,
-    date_trunc('month', date) as month,
-    AVG(close) as avg_price,
-    MAX(close) as max_price,
-    MIN(close) as min_price,
-    FIRST_VALUE(close) OVER (PARTITION BY symbol, date_trunc('month', date) ORDER BY date) as month_open,
-    LAST_VALUE(close) OVER (PARTITION BY symbol, date_trunc('month', date) ORDER BY date ROWS BETWEEN UNBOUNDED PRECEDING AND UNBOUNDED FOLLOWING) as month_close,
-    (LAST_VALUE(close) OVER (PARTITION BY symbol, date_trunc('month', date) ORDER BY date ROWS BETWEEN UNBOUNDED PRECEDING AND UNBOUNDED FOLLOWING) - 
-     FIRST_VALUE(close) OVER (PARTITION BY symbol, date_trunc('month', date) ORDER BY date)) / 
-     NULLIF(FIRST_VALUE(close) OVER (PARTITION BY symbol, date_trunc('month', date) ORDER BY date), 0) * 100 as monthly_return_pct
-FROM processed.stock_metrics
-WHERE date >= date_trunc('month', current_date - interval '3 months')
-GROUP BY symbol, date_trunc('month', date), date
+    period_start as month,
+    avg_close as avg_price,
+    high_close as max_price,
+    low_close as min_price,
+    first_close as month_open,
+    close as month_close,
+    volume as month_volume,
+    avg_volatility,
+    return_pct as monthly_return_pct
+FROM analytics.monthly_rollup
+WHERE period_start >= date_trunc('month', current_date - interval '3 months')
 ORDER BY symbol, month;
--- END MONTHLY_REPORT
\ No newline at end of file
+-- END MONTHLY_REPORT
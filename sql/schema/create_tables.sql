@@ -4,8 +4,11 @@ CREATE SCHEMA IF NOT EXISTS processed;
 CREATE SCHEMA IF NOT EXISTS analytics;
 
 -- Tables pour les données brutes (raw)
+-- Partitionnée par mois sur la date : la rétention se fait en détachant les
+-- partitions anciennes et les requêtes bornées en date n'en lisent qu'une partie.
+-- Les partitions mensuelles sont créées par DatabaseMaintenance.create_partitions
 CREATE TABLE IF NOT EXISTS raw.stock_prices (
-    id SERIAL PRIMARY KEY,
+    id SERIAL,
     symbol VARCHAR(10) NOT NULL,
     date DATE NOT NULL,
     open NUMERIC,
@@ -13,13 +16,40 @@ CREATE TABLE IF NOT EXISTS raw.stock_prices (
     low NUMERIC,
     close NUMERIC,
     volume BIGINT,
+    -- Prix moyen pondéré par les volumes, issu de l'agrégation des barres intraday
+    vwap NUMERIC,
     source VARCHAR(50),
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-);
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    -- Toute contrainte d'unicité d'une table partitionnée doit inclure la clé de partition
+    PRIMARY KEY (id, date),
+    CONSTRAINT uq_stock_prices_symbol_date UNIQUE (symbol, date)
+) PARTITION BY RANGE (date);
+
+-- Bases créées avant l'ajout du VWAP
+ALTER TABLE raw.stock_prices ADD COLUMN IF NOT EXISTS vwap NUMERIC;
+
+-- Partition par défaut : reçoit les lignes hors des partitions mensuelles existantes
+CREATE TABLE IF NOT EXISTS raw.stock_prices_default PARTITION OF raw.stock_prices DEFAULT;
+
+-- Barres intraday, horodatées en UTC. Table compacte (prix en REAL, ni identifiant
+-- ni colonnes d'audit) : le volume est de l'ordre de 400 fois celui des cours
+-- quotidiens. Partitionnée par mois sur l'horodatage, avec une rétention courte
+CREATE TABLE IF NOT EXISTS raw.intraday_bars (
+    symbol VARCHAR(10) NOT NULL,
+    ts TIMESTAMP NOT NULL,
+    open REAL,
+    high REAL,
+    low REAL,
+    close REAL,
+    volume BIGINT,
+    PRIMARY KEY (symbol, ts)
+) PARTITION BY RANGE (ts);
+
+CREATE TABLE IF NOT EXISTS raw.intraday_bars_default PARTITION OF raw.intraday_bars DEFAULT;
 
 -- Tables pour les données transformées (processed)
 CREATE TABLE IF NOT EXISTS processed.stock_metrics (
-    id SERIAL PRIMARY KEY,
+    id SERIAL,
     symbol VARCHAR(10) NOT NULL,
     date DATE NOT NULL,
     close NUMERIC,
@@ -28,8 +58,12 @@ CREATE TABLE IF NOT EXISTS processed.stock_metrics (
     ma_200 NUMERIC,
     rsi NUMERIC,
     volatility NUMERIC,
-    processed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-);
+    processed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, date),
+    CONSTRAINT uq_stock_metrics_symbol_date UNIQUE (symbol, date)
+) PARTITION BY RANGE (date);
+
+CREATE TABLE IF NOT EXISTS processed.stock_metrics_default PARTITION OF processed.stock_metrics DEFAULT;
 
 -- Tables pour les données analytiques (analytics)
 CREATE TABLE IF NOT EXISTS analytics.financial_kpis (
@@ -41,5 +75,68 @@ CREATE TABLE IF NOT EXISTS analytics.financial_kpis (
     revenue NUMERIC,
     profit_margin NUMERIC,
     risk_score NUMERIC,
-    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-);
\ No newline at end of file
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT uq_financial_kpis_symbol_date UNIQUE (symbol, date)
+);
+
+-- Indicateurs et signaux quotidiens précalculés (tendances, croisements, volatilité).
+-- Alimentée de façon incrémentale par sql/maintenance/refresh_analytics.sql pour les
+-- seules séances touchées par un chargement ; les vues d'analyse la lisent directement
+CREATE TABLE IF NOT EXISTS analytics.price_signals (
+    symbol VARCHAR(10) NOT NULL,
+    date DATE NOT NULL,
+    close NUMERIC,
+    prev_day_close NUMERIC,
+    daily_return_pct NUMERIC,
+    ma_20 NUMERIC,
+    ma_50 NUMERIC,
+    ma_200 NUMERIC,
+    trend_signal VARCHAR(20),
+    long_term_trend VARCHAR(20),
+    volatility_20d NUMERIC,
+    volatility_60d NUMERIC,
+    avg_daily_movement NUMERIC,
+    refreshed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (symbol, date)
+);
+
+-- Agrégats hebdomadaires et mensuels (OHLC, volume, volatilité moyenne) servis aux
+-- rapports. Alimentés par sql/maintenance/refresh_rollups.sql pour les seules périodes
+-- touchées par un chargement : les périodes closes ne sont jamais recalculées, et
+-- restent disponibles après la rétention de raw.stock_prices.
+-- open/high/low viennent des barres ; first_close, high_close et low_close sont les
+-- extrêmes des clôtures, sur lesquels les rapports sont définis
+CREATE TABLE IF NOT EXISTS analytics.weekly_rollup (
+    symbol VARCHAR(10) NOT NULL,
+    period_start DATE NOT NULL,
+    period_end DATE NOT NULL,
+    open NUMERIC,
+    high NUMERIC,
+    low NUMERIC,
+    close NUMERIC,
+    first_close NUMERIC,
+    high_close NUMERIC,
+    low_close NUMERIC,
+    avg_close NUMERIC,
+    volume BIGINT,
+    avg_volatility NUMERIC,
+    trading_days INTEGER,
+    return_pct NUMERIC,
+    refreshed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (symbol, period_start)
+);
+
+CREATE TABLE IF NOT EXISTS analytics.monthly_rollup (
+    LIKE analytics.weekly_rollup INCLUDING DEFAULTS,
+    PRIMARY KEY (symbol, period_start)
+);
+
+-- Bases créées avant l'ajout des extrêmes de clôture
+ALTER TABLE analytics.weekly_rollup
+    ADD COLUMN IF NOT EXISTS first_close NUMERIC,
+    ADD COLUMN IF NOT EXISTS high_close NUMERIC,
+    ADD COLUMN IF NOT EXISTS low_close NUMERIC;
+ALTER TABLE analytics.monthly_rollup
+    ADD COLUMN IF NOT EXISTS first_close NUMERIC,
+    ADD COLUMN IF NOT EXISTS high_close NUMERIC,
+    ADD COLUMN IF NOT EXISTS low_close NUMERIC;
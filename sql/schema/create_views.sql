@@ -1,19 +1,24 @@
 -- Création des vues pour analyses financières
 -- Fichier: sql/schema/create_views.sql
 
+-- Les fenêtres (LAG, moyennes mobiles, écarts-types) ne sont plus recalculées sur
+-- tout l'historique à chaque lecture : elles sont matérialisées dans
+-- analytics.price_signals, rafraîchie de façon incrémentale après chaque chargement
+-- (sql/maintenance/refresh_analytics.sql). Les vues ci-dessous en sont de simples
+-- projections et conservent leurs colonnes.
+
 -- Vue pour l'analyse des tendances de prix
 CREATE OR REPLACE VIEW analytics.price_trends AS
 SELECT 
     symbol,
     date,
     close,
-    LAG(close, 1) OVER (PARTITION BY symbol ORDER BY date) AS prev_day_close,
-    (close - LAG(close, 1) OVER (PARTITION BY symbol ORDER BY date)) / 
-        NULLIF(LAG(close, 1) OVER (PARTITION BY symbol ORDER BY date), 0) * 100 AS daily_return_pct,
-    AVG(close) OVER (PARTITION BY symbol ORDER BY date ROWS BETWEEN 19 PRECEDING AND CURRENT ROW) AS ma_20,
-    AVG(close) OVER (PARTITION BY symbol ORDER BY date ROWS BETWEEN 49 PRECEDING AND CURRENT ROW) AS ma_50,
-    AVG(close) OVER (PARTITION BY symbol ORDER BY date ROWS BETWEEN 199 PRECEDING AND CURRENT ROW) AS ma_200
-FROM raw.stock_prices;
+    prev_day_close,
+    daily_return_pct,
+    ma_20,
+    ma_50,
+    ma_200
+FROM analytics.price_signals;
 
 -- Vue pour les signaux de trading
 CREATE OR REPLACE VIEW analytics.trading_signals AS
@@ -24,20 +29,9 @@ SELECT
     ma_20,
     ma_50,
     ma_200,
-    CASE 
-        WHEN ma_20 > ma_50 AND LAG(ma_20, 1) OVER (PARTITION BY symbol ORDER BY date) <= LAG(ma_50, 1) OVER (PARTITION BY symbol ORDER BY date) 
-        THEN 'GOLDEN_CROSS'
-        WHEN ma_20 < ma_50 AND LAG(ma_20, 1) OVER (PARTITION BY symbol ORDER BY date) >= LAG(ma_50, 1) OVER (PARTITION BY symbol ORDER BY date) 
-        THEN 'DEATH_CROSS'
-        WHEN ma_20 > ma_50 THEN 'BULLISH'
-        WHEN ma_20 < ma_50 THEN 'BEARISH'
-        ELSE 'NEUTRAL'
-    END AS trend_signal,
-    CASE 
-        WHEN close > ma_200 THEN 'ABOVE_200MA'
-        ELSE 'BELOW_200MA'
-    END AS long_term_trend
-FROM analytics.price_trends;
+    trend_signal,
+    long_term_trend
+FROM analytics.price_signals;
 
 -- Vue pour l'analyse de la volatilité
 CREATE OR REPLACE VIEW analytics.volatility_analysis AS
@@ -46,13 +40,25 @@ SELECT
     date,
     close,
     daily_return_pct,
-    STDDEV(daily_return_pct) OVER (PARTITION BY symbol ORDER BY date ROWS BETWEEN 19 PRECEDING AND CURRENT ROW) AS volatility_20d,
-    STDDEV(daily_return_pct) OVER (PARTITION BY symbol ORDER BY date ROWS BETWEEN 59 PRECEDING AND CURRENT ROW) AS volatility_60d,
-    AVG(ABS(daily_return_pct)) OVER (PARTITION BY symbol ORDER BY date ROWS BETWEEN 19 PRECEDING AND CURRENT ROW) AS avg_daily_movement
-FROM analytics.price_trends;
+    volatility_20d,
+    volatility_60d,
+    avg_daily_movement
+FROM analytics.price_signals;
+
+-- Tableau de bord des KPIs financiers : vue matérialisée, rafraîchie avec
+-- REFRESH MATERIALIZED VIEW CONCURRENTLY pour ne jamais bloquer les lecteurs.
+-- Remplace l'ancienne vue du même nom
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE n.nspname = 'analytics' AND c.relname = 'financial_dashboard' AND c.relkind = 'v'
+    ) THEN
+        DROP VIEW analytics.financial_dashboard;
+    END IF;
+END $$;
 
--- Vue pour le tableau de bord des KPIs financiers
-CREATE OR REPLACE VIEW analytics.financial_dashboard AS
+CREATE MATERIALIZED VIEW IF NOT EXISTS analytics.financial_dashboard AS
 SELECT 
     k.symbol,
     k.sector,
@@ -61,17 +67,20 @@ SELECT
     k.revenue,
     k.profit_margin,
     k.risk_score,
-    t.trend_signal,
-    t.long_term_trend,
-    v.volatility_20d,
-    v.avg_daily_movement,
+    s.trend_signal,
+    s.long_term_trend,
+    s.volatility_20d,
+    s.avg_daily_movement,
     RANK() OVER (PARTITION BY k.sector ORDER BY k.profit_margin DESC) AS sector_rank,
-    PERCENT_RANK() OVER (ORDER BY v.volatility_20d) AS volatility_percentile
+    PERCENT_RANK() OVER (ORDER BY s.volatility_20d) AS volatility_percentile
 FROM analytics.financial_kpis k
-JOIN analytics.trading_signals t ON k.symbol = t.symbol AND k.date = t.date
-JOIN analytics.volatility_analysis v ON k.symbol = v.symbol AND k.date = v.date
+JOIN analytics.price_signals s ON k.symbol = s.symbol AND k.date = s.date
 WHERE k.date = (SELECT MAX(date) FROM analytics.financial_kpis);
 
+-- Index unique requis par le rafraîchissement concurrent
+CREATE UNIQUE INDEX IF NOT EXISTS uq_financial_dashboard_symbol_date
+    ON analytics.financial_dashboard(symbol, date);
+
 -- Vue pour l'analyse comparative sectorielle
 CREATE OR REPLACE VIEW analytics.sector_comparison AS
 SELECT 
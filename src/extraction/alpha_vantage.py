@@ -1,42 +1,88 @@
 import os
+import json
+import operator
+import numpy as np
 import pandas as pd
-import requests
-import yaml
 import logging
-from datetime import datetime
-from pathlib import Path
-import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.extraction.raw_store import RawDataStore
+from src.extraction.response_cache import ResponseCache
+from src.utils.concurrency import bounded_as_completed
+from src.utils.logger import metrics
+from src.utils.rate_limiter import QuotaExceededError, RateLimiter
 
-# Configuration du logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger('alpha_vantage_extractor')
 
+
+def _requests():
+    # Import différé : requests n'est chargé qu'à la création d'un extracteur
+    import requests
+    return requests
+
+
 class AlphaVantageExtractor:
     """
     Classe pour extraire des données financières via l'API Alpha Vantage
     """
     
-    def __init__(self, config_path=None):
+    # Nom de la source dans la zone brute
+    SOURCE = 'alpha_vantage'
+    
+    # Quotas du plan gratuit, utilisés si le fichier de configuration n'en définit pas
+    DEFAULT_CALLS_PER_MINUTE = 5
+    DEFAULT_CALLS_PER_DAY = 25
+    
+    # Nombre de tentatives lorsqu'une réponse signale un dépassement de débit
+    MAX_THROTTLE_RETRIES = 3
+    
+    # Champs d'une séance TIME_SERIES_DAILY_ADJUSTED (JSON) et colonnes correspondantes
+    DAILY_FIELDS = {
+        '1. open': 'open',
+        '2. high': 'high',
+        '3. low': 'low',
+        '4. close': 'close',
+        '5. adjusted close': 'adjusted_close',
+        '6. volume': 'volume',
+        '7. dividend amount': 'dividend',
+        '8. split coefficient': 'split_coefficient'
+    }
+    
+    # Colonnes de la réponse CSV (datatype=csv) renommées comme celles du JSON
+    DAILY_CSV_COLUMNS = {
+        'timestamp': 'date',
+        'dividend_amount': 'dividend'
+    }
+    
+    def __init__(self, config_path=None, raw_store=None, calls_per_minute=None, calls_per_day=None,
+                 cache=None):
         """
         Initialise l'extracteur Alpha Vantage avec la clé API
         
         Args:
             config_path (str, optional): Chemin vers le fichier de configuration. 
                                          Par défaut, utilise config/credentials.yml
+            raw_store (RawDataStore, optional): Zone brute partitionnée. Par défaut, data/raw
+            calls_per_minute (int, optional): Quota par minute du plan. Par défaut, la valeur
+                                              `calls_per_minute` de la configuration
+            calls_per_day (int, optional): Quota journalier du plan. Par défaut, la valeur
+                                           `calls_per_day` de la configuration
+            cache (ResponseCache, optional): Cache des réponses HTTP. Par défaut, data/cache/http
         """
         if config_path is None:
             # Chemin par défaut vers le fichier de configuration
             config_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 
                                        'config', 'credentials.yml')
         
+        import yaml
+        
         # Charger la clé API depuis le fichier de configuration
+        av_config = {}
         try:
             with open(config_path, 'r') as file:
                 config = yaml.safe_load(file)
-                self.api_key = config['api']['alpha_vantage']['api_key']
+                av_config = config['api']['alpha_vantage']
+                self.api_key = av_config['api_key']
                 if not self.api_key or self.api_key == "VOTRE_CLE_ALPHA_VANTAGE":
                     logger.warning("Clé API Alpha Vantage non configurée. Veuillez définir votre clé dans config/credentials.yml")
         except Exception as e:
@@ -46,92 +92,159 @@ class AlphaVantageExtractor:
         # URL de base de l'API
         self.base_url = "https://www.alphavantage.co/query"
         
-        # Dossier de destination pour les données brutes
-        self.raw_data_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 
-                                         'data', 'raw', 'alpha_vantage')
+        # Limiteur de débit partagé par tous les appels de cet extracteur
+        self.rate_limiter = RateLimiter(
+            calls_per_minute=calls_per_minute or av_config.get('calls_per_minute', self.DEFAULT_CALLS_PER_MINUTE),
+            calls_per_day=calls_per_day or av_config.get('calls_per_day', self.DEFAULT_CALLS_PER_DAY)
+        )
+        
+        # Session HTTP persistante (keep-alive) réutilisée entre les requêtes
+        requests = _requests()
+        self.session = requests.Session()
+        self.session.mount("https://", requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=8))
+        
+        # Cache des réponses : les relances après un échec partiel ne consomment pas de quota
+        self.cache = cache or ResponseCache()
+        
+        # Zone de destination pour les données brutes
+        self.raw_store = raw_store or RawDataStore()
+        self.raw_data_dir = os.path.join(self.raw_store.base_dir, self.SOURCE)
         os.makedirs(self.raw_data_dir, exist_ok=True)
     
-    def get_daily_adjusted(self, symbol, outputsize="full"):
+    def get_daily_adjusted(self, symbol, outputsize="full", datatype="json"):
         """
         Récupère les données quotidiennes ajustées pour un symbole boursier
         
         Args:
             symbol (str): Symbole boursier (ex: AAPL, MSFT)
             outputsize (str, optional): Taille de sortie ('compact' ou 'full'). Par défaut 'full'.
+            datatype (str, optional): Format de la réponse ('json' ou 'csv'). Le CSV est plus
+                                      compact et décodé en une seule passe. Par défaut 'json'.
         
         Returns:
             pandas.DataFrame: DataFrame contenant les données historiques
         """
-        if not self.api_key:
-            logger.error("Clé API Alpha Vantage non configurée")
-            return None
-        
         params = {
             "function": "TIME_SERIES_DAILY_ADJUSTED",
             "symbol": symbol,
             "outputsize": outputsize,
             "apikey": self.api_key,
-            "datatype": "json"
+            "datatype": datatype
         }
-        print(params, outputsize)
         
         try:
-            logger.info(f"Extraction des données quotidiennes pour {symbol}")
-            response = requests.get(self.base_url, params=params)
-            response.raise_for_status()  # Lève une exception si la requête a échoué
-            
-            data = response.json()
-            print(data)
+            logger.info(f"Extraction des données quotidiennes pour {symbol} ({outputsize}, {datatype})")
+            data = self._request(params, 'daily')
             
-            # Vérifier si l'API a renvoyé une erreur
-            if "Error Message" in data:
-                logger.error(f"Erreur API: {data['Error Message']}")
+            if data is None:
                 return None
             
-            if "Time Series (Daily)" not in data:
-                logger.error(f"Format de données inattendu: {data.keys()}")
-                return None
+            if isinstance(data, str):
+                df = self.parse_daily_adjusted_csv(data, symbol)
+            else:
+                # Vérifier si l'API a renvoyé une erreur
+                if "Error Message" in data:
+                    logger.error(f"Erreur API: {data['Error Message']}")
+                    return None
+                
+                if "Time Series (Daily)" not in data:
+                    logger.error(f"Format de données inattendu: {list(data.keys())}")
+                    return None
+                
+                df = self.parse_daily_adjusted(data, symbol)
             
-            # Convertir les données JSON en DataFrame
-            time_series = data["Time Series (Daily)"]
-            df = pd.DataFrame.from_dict(time_series, orient='index')
-            
-            # Renommer les colonnes pour plus de clarté
-            df.rename(columns={
-                '1. open': 'open',
-                '2. high': 'high',
-                '3. low': 'low',
-                '4. close': 'close',
-                '5. adjusted close': 'adjusted_close',
-                '6. volume': 'volume',
-                '7. dividend amount': 'dividend',
-                '8. split coefficient': 'split_coefficient'
-            }, inplace=True)
-            
-            # Convertir les types de données
-            for col in df.columns:
-                df[col] = pd.to_numeric(df[col])
-            
-            # Ajouter le symbole comme colonne
-            df['symbol'] = symbol
-            
-            # Convertir l'index en colonne de date
-            df.reset_index(inplace=True)
-            df.rename(columns={'index': 'date'}, inplace=True)
-            df['date'] = pd.to_datetime(df['date'])
+            logger.debug(f"{symbol}: {len(df)} séances décodées")
             
             # Sauvegarder les données brutes
             self._save_raw_data(df, symbol, 'daily_adjusted')
             
             return df
             
-        except requests.exceptions.RequestException as e:
+        except _requests().exceptions.RequestException as e:
             logger.error(f"Erreur lors de la requête API: {e}")
             return None
         except Exception as e:
             logger.error(f"Erreur inattendue: {e}")
             return None
     
+    @classmethod
+    def parse_daily_adjusted(cls, data, symbol):
+        """
+        Convertit une réponse TIME_SERIES_DAILY_ADJUSTED (JSON) en DataFrame
+        
+        Les séances sont décodées directement en colonnes NumPy typées, sans passer
+        par un DataFrame intermédiaire de chaînes converti colonne par colonne.
+        
+        Args:
+            data (dict): Réponse de l'API contenant la clé 'Time Series (Daily)'
+            symbol (str): Symbole boursier
+        
+        Returns:
+            pandas.DataFrame: Une ligne par séance, triée par date croissante, avec les
+                              colonnes 'date' et 'symbol'
+        """
+        time_series = data["Time Series (Daily)"]
+        if not time_series:
+            return pd.DataFrame(columns=['date', *cls.DAILY_FIELDS.values(), 'symbol'])
+        bars = time_series.values()
+        
+        # Les chaînes de toutes les séances sont converties en une seule matrice (séances x champs)
+        first = next(iter(bars))
+        fields = [field for field in cls.DAILY_FIELDS if field in first]
+        values = np.array(list(map(operator.itemgetter(*fields), bars)), dtype=np.float64)
+        values = values.reshape(len(time_series), len(fields))
+        dates = np.array(list(time_series), dtype='datetime64[D]')
+        
+        # L'API renvoie les séances les plus récentes en premier
+        order = np.argsort(dates, kind='stable')
+        
+        columns = {'date': dates[order].astype('datetime64[ns]')}
+        for i, field in enumerate(fields):
+            name = cls.DAILY_FIELDS[field]
+            column = values[order, i]
+            columns[name] = column.astype(np.int64) if name == 'volume' else column.astype(np.float64)
+        
+        df = pd.DataFrame(columns)
+        df['symbol'] = symbol
+        return df
+    
+    @classmethod
+    def parse_daily_adjusted_csv(cls, text, symbol):
+        """
+        Convertit une réponse TIME_SERIES_DAILY_ADJUSTED (datatype=csv) en DataFrame
+        
+        Le corps (sans guillemets ni valeurs manquantes) est découpé en une seule liste de
+        cellules, dont chaque colonne est une tranche convertie directement en NumPy.
+        
+        Args:
+            text (str): Corps de la réponse CSV
+            symbol (str): Symbole boursier
+        
+        Returns:
+            pandas.DataFrame: Même format que parse_daily_adjusted
+        """
+        header, _, body = text.partition('\n')
+        names = [cls.DAILY_CSV_COLUMNS.get(name, name) for name in header.strip().split(',')]
+        body = body.replace('\r', '').strip()
+        cells = body.replace('\n', ',').split(',') if body else []
+        
+        width = len(names)
+        if len(cells) % width:
+            raise ValueError(f"Réponse CSV incomplète pour {symbol}: {len(cells)} cellules pour {width} colonnes")
+        
+        dates = np.array(cells[names.index('date')::width], dtype='datetime64[D]')
+        order = np.argsort(dates, kind='stable')
+        
+        columns = {'date': dates[order].astype('datetime64[ns]')}
+        for i, name in enumerate(names):
+            if name != 'date':
+                column = np.array(cells[i::width], dtype=np.float64)[order]
+                columns[name] = column.astype(np.int64) if name == 'volume' else column
+        
+        df = pd.DataFrame(columns)
+        df['symbol'] = symbol
+        return df
+    
     def get_company_overview(self, symbol):
         """
         Récupère les informations générales sur une entreprise
@@ -142,10 +255,6 @@ class AlphaVantageExtractor:
         Returns:
             pandas.DataFrame: DataFrame contenant les informations de l'entreprise
         """
-        if not self.api_key:
-            logger.error("Clé API Alpha Vantage non configurée")
-            return None
-        
         params = {
             "function": "OVERVIEW",
             "symbol": symbol,
@@ -154,13 +263,10 @@ class AlphaVantageExtractor:
         
         try:
             logger.info(f"Extraction des informations de l'entreprise pour {symbol}")
-            response = requests.get(self.base_url, params=params)
-            response.raise_for_status()
-            
-            data = response.json()
+            data = self._request(params, 'overview')
             
             # Vérifier si l'API a renvoyé une erreur ou un résultat vide
-            if "Error Message" in data or not data:
+            if data is None or "Error Message" in data or not data:
                 logger.error(f"Erreur API ou données vides pour {symbol}")
                 return None
             
@@ -169,19 +275,142 @@ class AlphaVantageExtractor:
             
             # Sauvegarder les données brutes
             self._save_raw_data(df, symbol, 'company_overview')
-            time.sleep(15)
             return df
             
-        except requests.exceptions.RequestException as e:
+        except _requests().exceptions.RequestException as e:
             logger.error(f"Erreur lors de la requête API: {e}")
             return None
         except Exception as e:
             logger.error(f"Erreur inattendue: {e}")
             return None
     
+    def extract_batch(self, symbols, functions=("daily_adjusted", "company_overview"), max_workers=4):
+        """
+        Exécute un ensemble de requêtes (symboles × fonctions) aussi vite que le quota le permet
+        
+        Toutes les requêtes passent par le même limiteur de débit et la même session HTTP :
+        les appels s'enchaînent sans pause fixe et plusieurs requêtes peuvent être en vol
+        lorsque le plan l'autorise. Les résultats sont restitués dans l'ordre de terminaison.
+        
+        Args:
+            symbols (list): Liste des symboles boursiers
+            functions (tuple, optional): Fonctions à appeler pour chaque symbole
+                                         ('daily_adjusted', 'company_overview')
+            max_workers (int, optional): Nombre de requêtes simultanées au maximum
+        
+        Yields:
+            tuple: ((fonction, symbole), DataFrame ou None)
+        """
+        handlers = {
+            "daily_adjusted": self.get_daily_adjusted,
+            "company_overview": self.get_company_overview
+        }
+        jobs = [(function, symbol) for symbol in symbols for function in functions]
+        
+        # Appels HTTP des workers comptés dans l'étape appelante
+        run = metrics.bind(lambda job: handlers[job[0]](job[1]))
+        executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='alpha_vantage')
+        try:
+            for job, future in bounded_as_completed(executor, run, jobs, max_workers * 2):
+                yield job, future.result()
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+    
+    def _request(self, params, data_type):
+        """
+        Envoie une requête à l'API en passant par le cache et en respectant le quota du plan
+        
+        Lorsque la réponse est un message de limitation ("Note" ou "Information"),
+        le limiteur applique une pause croissante et la requête est retentée.
+        
+        Args:
+            params (dict): Paramètres de la requête
+            data_type (str): Type de données ('daily', 'overview', ...) fixant la durée de vie en cache
+        
+        Returns:
+            dict: Réponse JSON décodée (str pour une réponse CSV), ou None si le débit reste
+                  limité ou le quota épuisé
+        """
+        return self.cache.fetch(self.base_url, params, data_type,
+                                lambda: self._request_api(params),
+                                cacheable=self._is_cacheable)
+    
+    def _request_api(self, params):
+        """
+        Envoie la requête HTTP en respectant le quota du plan
+        
+        La clé API n'est exigée qu'ici : une réponse en cache (ou rejouée) est servie sans clé.
+        """
+        if not self.api_key:
+            logger.error("Clé API Alpha Vantage non configurée")
+            return None
+        
+        for attempt in range(self.MAX_THROTTLE_RETRIES + 1):
+            try:
+                self.rate_limiter.acquire()
+            except QuotaExceededError as e:
+                logger.error(f"Requête {params.get('function')} pour {params.get('symbol')} annulée: {e}")
+                return None
+            
+            response = self.session.get(self.base_url, params=params, timeout=30)
+            metrics.count(http_calls=1, bytes_read=len(response.content))
+            response.raise_for_status()  # Lève une exception si la requête a échoué
+            data = self._decode(response, params)
+            
+            if isinstance(data, str):
+                self.rate_limiter.record_success()
+                return data
+            
+            if not self._is_throttled(data):
+                self.rate_limiter.record_success()
+                return data
+            
+            self.rate_limiter.backoff()
+        
+        logger.error(f"Limite de débit Alpha Vantage toujours atteinte après "
+                     f"{self.MAX_THROTTLE_RETRIES} tentatives pour {params.get('symbol')}")
+        return None
+    
+    @staticmethod
+    def _decode(response, params):
+        """
+        Décode le corps de la réponse : dict pour le JSON, texte brut pour le CSV
+        
+        En mode CSV, les erreurs et les limitations de débit restent renvoyées en JSON.
+        """
+        if params.get("datatype") != "csv":
+            return response.json()
+        text = response.text
+        if text.lstrip().startswith("{"):
+            return json.loads(text)
+        return text
+    
+    @staticmethod
+    def _is_cacheable(data):
+        """
+        Indique si une réponse peut être mise en cache
+
+        La clé API ne fait pas partie de la clé de cache : une erreur (clé invalide,
+        point d'accès premium, réponse vide) resterait servie après correction de la
+        configuration. Seuls un corps CSV et un objet JSON non vide sans message
+        d'erreur ou d'information sont stockés.
+        """
+        if isinstance(data, str):
+            return bool(data.strip()) and not data.lstrip().startswith("{")
+        return isinstance(data, dict) and bool(data) and not any(
+            key in data for key in ("Error Message", "Information", "Note"))
+    
+    @staticmethod
+    def _is_throttled(data):
+        """
+        Détecte les réponses de limitation de débit renvoyées avec un statut HTTP 200
+        """
+        message = data.get("Note") or data.get("Information") or ""
+        return any(marker in message.lower() for marker in ("call frequency", "rate limit", "requests per"))
+    
     def _save_raw_data(self, df, symbol, data_type):
         """
-        Sauvegarde les données brutes au format CSV
+        Sauvegarde les données brutes dans la zone brute partitionnée
         
         Args:
             df (pandas.DataFrame): DataFrame à sauvegarder
@@ -189,25 +418,20 @@ class AlphaVantageExtractor:
             data_type (str): Type de données ('daily_adjusted', 'company_overview', etc.)
         """
         try:
-            # Créer un nom de fichier avec horodatage
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"{symbol}_{data_type}_{timestamp}.csv"
-            filepath = os.path.join(self.raw_data_dir, filename)
-            
-            # Sauvegarder en CSV
-            df.to_csv(filepath, index=False)
-            logger.info(f"Données sauvegardées dans {filepath}")
+            bytes_written = self.raw_store.write(df, self.SOURCE, data_type, symbol=symbol)
+            logger.info(f"Données sauvegardées dans la zone brute ({data_type}, {len(df)} lignes, "
+                        f"{bytes_written} octets)")
         except Exception as e:
             logger.error(f"Erreur lors de la sauvegarde des données: {e}")
 
 # Exemple d'utilisation
 if __name__ == "__main__":
+    from src.utils.logger import setup_logging
+
+    setup_logging()
     extractor = AlphaVantageExtractor()
     # Extraire les données quotidiennes pour Apple et Miscrosoft
     apple_data = extractor.get_daily_adjusted("AAPL", outputsize="compact")
-    
-
-    time.sleep(15)
     #msft_data = extractor.get_daily_adjusted("MSFT", outputsize="compact")
 
     if apple_data is not None:
@@ -1 +1,206 @@
-#Charge les données depuis des fichiers Excel
\ No newline at end of file
+# Charge les données depuis des fichiers CSV
+import os
+import glob
+import queue
+import logging
+import threading
+
+import pandas as pd
+
+logger = logging.getLogger('csv_loader')
+
+
+class CSVLoader:
+    """
+    Lecture en flux de fichiers CSV de cours (livraisons fournisseurs, exports des extracteurs)
+
+    Les fichiers sont lus par blocs de taille fixe avec des types imposés : la
+    mémoire utilisée dépend de la taille des blocs, pas de celle des fichiers.
+    Chaque bloc est restitué sous forme normalisée :
+        - colonnes en minuscules ('Adj Close' -> 'adj_close', 'timestamp' -> 'date')
+        - date en datetime64, prix en float64 (ou float32), volume en int64 (Int64
+          si le bloc contient des valeurs manquantes), symbole en catégorie
+
+    Les blocs peuvent être passés directement aux étapes suivantes, par exemple
+    PostgresLoader.load('raw.stock_prices', loader.iter_files(paths)).
+    """
+
+    PRICE_COLUMNS = ('open', 'high', 'low', 'close', 'adj_close')
+    VOLUME_COLUMN = 'volume'
+
+    # Noms de colonnes usuels des fournisseurs ramenés au schéma commun
+    COLUMN_ALIASES = {
+        'timestamp': 'date',
+        'datetime': 'date',
+        'ticker': 'symbol',
+        'adjclose': 'adj_close',
+        'adjusted_close': 'adj_close'
+    }
+
+    def __init__(self, chunksize=250_000, price_dtype='float64', date_format=None, max_workers=1):
+        """
+        Initialise le chargeur
+
+        Args:
+            chunksize (int, optional): Nombre de lignes par bloc
+            price_dtype (str, optional): Type des colonnes de prix ('float64' ou 'float32')
+            date_format (str, optional): Format des dates (ex: '%Y-%m-%d'). Le préciser évite
+                                         l'inférence du format, coûteuse sur de gros fichiers
+            max_workers (int, optional): Nombre de fichiers lus simultanément
+        """
+        self.chunksize = chunksize
+        self.price_dtype = price_dtype
+        self.date_format = date_format
+        self.max_workers = max_workers
+
+    def iter_chunks(self, path, symbol=None):
+        """
+        Lit un fichier CSV bloc par bloc
+
+        Args:
+            path (str): Chemin du fichier (éventuellement compressé : .gz, .zip, ...)
+            symbol (str, optional): Symbole utilisé si le fichier n'a pas de colonne symbole.
+                                    Par défaut, le nom du fichier (ex: AAPL.csv -> 'AAPL')
+
+        Yields:
+            pandas.DataFrame: Bloc normalisé
+        """
+        header = pd.read_csv(path, nrows=0).columns
+        renames = {col: self._normalize_name(col) for col in header}
+
+        dtypes = {}
+        date_columns = []
+        for original, name in renames.items():
+            if name in self.PRICE_COLUMNS:
+                dtypes[original] = self.price_dtype
+            elif name == self.VOLUME_COLUMN:
+                # Lu en flottant (bien plus rapide que le type Int64 du parseur), converti ensuite
+                dtypes[original] = 'float64'
+            elif name == 'symbol':
+                dtypes[original] = 'category'
+            elif name == 'date':
+                date_columns.append(original)
+
+        if 'symbol' not in renames.values() and symbol is None:
+            symbol = os.path.basename(path).split('.')[0].upper()
+
+        reader = pd.read_csv(
+            path,
+            dtype=dtypes,
+            parse_dates=date_columns,
+            date_format=self.date_format,
+            chunksize=self.chunksize
+        )
+        with reader:
+            for chunk in reader:
+                chunk = chunk.rename(columns=renames)
+                if 'symbol' not in chunk.columns:
+                    chunk['symbol'] = pd.Categorical([symbol] * len(chunk))
+                if 'date' in chunk.columns:
+                    chunk = chunk[chunk['date'].notna()]
+                if self.VOLUME_COLUMN in chunk.columns:
+                    chunk[self.VOLUME_COLUMN] = self._to_integer(chunk[self.VOLUME_COLUMN])
+                yield chunk
+
+    def iter_files(self, paths, symbol=None):
+        """
+        Lit plusieurs fichiers et restitue leurs blocs au fil de l'eau
+
+        Avec max_workers > 1, les fichiers sont lus en parallèle et les blocs transitent
+        par une file bornée : les lecteurs attendent lorsque le consommateur est en
+        retard, ce qui plafonne la mémoire à quelques blocs par lecteur. L'ordre des
+        blocs n'est alors conservé qu'au sein d'un même fichier.
+
+        Args:
+            paths (iterable): Chemins des fichiers
+            symbol (str, optional): Symbole imposé aux fichiers sans colonne symbole
+
+        Yields:
+            pandas.DataFrame: Bloc normalisé
+        """
+        paths = list(paths)
+        if self.max_workers <= 1 or len(paths) <= 1:
+            for path in paths:
+                try:
+                    yield from self.iter_chunks(path, symbol)
+                except Exception as e:
+                    logger.error(f"Erreur lors de la lecture de {path}: {e}")
+            return
+
+        yield from self._iter_parallel(paths, symbol)
+
+    def load_directory(self, directory, pattern='*.csv', symbol=None):
+        """
+        Lit tous les fichiers d'un dossier correspondant au motif
+
+        Args:
+            directory (str): Dossier à parcourir
+            pattern (str, optional): Motif glob des fichiers (ex: '**/*.csv.gz')
+            symbol (str, optional): Symbole imposé aux fichiers sans colonne symbole
+
+        Yields:
+            pandas.DataFrame: Bloc normalisé
+        """
+        paths = sorted(glob.glob(os.path.join(directory, pattern), recursive=True))
+        logger.info(f"{len(paths)} fichiers CSV trouvés dans {directory}")
+        yield from self.iter_files(paths, symbol)
+
+    def _iter_parallel(self, paths, symbol):
+        chunks = queue.Queue(maxsize=2 * self.max_workers)
+        pending = queue.Queue()
+        for path in paths:
+            pending.put(path)
+        stop = threading.Event()
+        done = object()
+
+        def put(item):
+            # Attente interruptible, pour que les lecteurs s'arrêtent si le consommateur abandonne
+            while not stop.is_set():
+                try:
+                    chunks.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def read_files():
+            while not stop.is_set():
+                try:
+                    path = pending.get_nowait()
+                except queue.Empty:
+                    break
+                try:
+                    for chunk in self.iter_chunks(path, symbol):
+                        if not put(chunk):
+                            return
+                except Exception as e:
+                    logger.error(f"Erreur lors de la lecture de {path}: {e}")
+            put(done)
+
+        workers = [threading.Thread(target=read_files, daemon=True)
+                   for _ in range(min(self.max_workers, len(paths)))]
+        for worker in workers:
+            worker.start()
+
+        try:
+            remaining = len(workers)
+            while remaining:
+                item = chunks.get()
+                if item is done:
+                    remaining -= 1
+                    continue
+                yield item
+        finally:
+            stop.set()
+            for worker in workers:
+                worker.join()
+
+    @staticmethod
+    def _to_integer(volume):
+        if volume.isna().any():
+            return volume.round().astype('Int64')
+        return volume.round().astype('int64')
+
+    def _normalize_name(self, column):
+        name = str(column).strip().lower().replace(' ', '_')
+        return self.COLUMN_ALIASES.get(name, name)
@@ -0,0 +1,254 @@
+import os
+import json
+import hashlib
+import logging
+import threading
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger('fingerprint_index')
+
+
+class FingerprintIndex:
+    """
+    Index des empreintes de contenu des données fondamentales
+
+    Une empreinte SHA-256 stable est conservée par symbole, type de données
+    ('income_statement', 'company_info', ...) et exercice publié. Un contenu dont
+    l'empreinte n'a pas changé n'est ni réécrit dans la zone brute ni retransmis
+    aux étapes suivantes.
+
+    L'index garde aussi, par symbole et type de données, la date de la dernière
+    vérification et la date à partir de laquelle un nouveau contenu est attendu
+    (calendrier de publication). `is_due` indique si un appel à l'API vaut la peine
+    d'être fait.
+
+    L'index est un fichier JSON réécrit de façon atomique par `save`.
+    """
+
+    # Clé utilisée pour les données sans exercice (informations d'entreprise)
+    SNAPSHOT = 'snapshot'
+
+    VERSION = 1
+
+    def __init__(self, path=None, recheck_days=7, max_age_days=30):
+        """
+        Initialise l'index, chargé depuis le disque s'il existe
+
+        Args:
+            path (str, optional): Fichier de l'index. Par défaut, data/state/fingerprints.json
+            recheck_days (int, optional): Délai minimal entre deux vérifications d'un même contenu
+            max_age_days (int, optional): Délai au-delà duquel un contenu est revérifié quel que
+                                          soit le calendrier (corrections, retraitements)
+        """
+        if path is None:
+            path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
+                                'data', 'state', 'fingerprints.json')
+        self.path = path
+        self.recheck_days = recheck_days
+        self.max_age_days = max_age_days
+
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._fingerprints = {}
+        self._checks = {}
+        self._load()
+
+    @staticmethod
+    def hash_statement(statement):
+        """
+        Calcule l'empreinte de chaque exercice d'un état financier
+
+        Args:
+            statement (pandas.DataFrame): État financier au format yfinance (postes en index,
+                                          un exercice par colonne)
+
+        Returns:
+            dict: {exercice au format 'YYYY-MM-DD': empreinte hexadécimale}
+        """
+        if statement is None or statement.empty:
+            return {}
+        # Postes triés : l'empreinte ne dépend pas de l'ordre renvoyé par l'API
+        order = np.argsort(statement.index.astype(str).to_numpy(), kind='stable')
+        labels = statement.index.astype(str).to_numpy()[order]
+        hashes = {}
+        for position, column in enumerate(statement.columns):
+            values = pd.to_numeric(statement.iloc[:, position], errors='coerce').to_numpy(dtype=np.float64)[order]
+            digest = hashlib.sha256()
+            for label, value in zip(labels, values):
+                digest.update(f"{label}\t{'' if np.isnan(value) else format(value, '.12g')}\n".encode('utf-8'))
+            hashes[FingerprintIndex.period_key(column)] = digest.hexdigest()
+        return hashes
+
+    @staticmethod
+    def hash_record(record, ignore=()):
+        """
+        Calcule l'empreinte d'un enregistrement (dictionnaire)
+
+        Args:
+            record (dict): Enregistrement à empreinter
+            ignore (callable or iterable, optional): Champs exclus de l'empreinte, ou prédicat
+                                                     sur le nom du champ
+
+        Returns:
+            str: Empreinte hexadécimale
+        """
+        excluded = ignore if callable(ignore) else set(ignore).__contains__
+        content = {key: value for key, value in record.items() if not excluded(key)}
+        canonical = json.dumps(content, sort_keys=True, default=str)
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def period_key(period):
+        """Clé d'exercice au format 'YYYY-MM-DD'"""
+        try:
+            return pd.Timestamp(period).date().isoformat()
+        except (ValueError, TypeError):
+            return str(period)
+
+    def changed(self, symbol, kind, hashes):
+        """
+        Filtre les exercices dont le contenu diffère de l'empreinte connue
+
+        Args:
+            symbol (str): Symbole boursier
+            kind (str): Type de données
+            hashes (dict): {exercice: empreinte} du contenu reçu
+
+        Returns:
+            list: Exercices nouveaux ou modifiés
+        """
+        with self._lock:
+            known = self._fingerprints.get(symbol, {}).get(kind, {})
+            return [period for period, digest in hashes.items() if known.get(period) != digest]
+
+    def record(self, symbol, kind, hashes):
+        """
+        Enregistre les empreintes d'un contenu effectivement écrit
+
+        Args:
+            symbol (str): Symbole boursier
+            kind (str): Type de données
+            hashes (dict): {exercice: empreinte}
+        """
+        if not hashes:
+            return
+        with self._lock:
+            self._fingerprints.setdefault(symbol, {}).setdefault(kind, {}).update(hashes)
+            self._dirty = True
+
+    def mark_checked(self, symbol, kind, checked_at=None):
+        """
+        Enregistre la vérification d'un contenu auprès de l'API
+
+        Args:
+            symbol (str): Symbole boursier
+            kind (str): Type de données
+            checked_at (datetime, optional): Heure de la vérification. Par défaut, maintenant
+        """
+        with self._lock:
+            entry = self._checks.setdefault(symbol, {}).setdefault(kind, {})
+            entry['checked_at'] = (checked_at or datetime.now()).isoformat(timespec='seconds')
+            self._dirty = True
+
+    def expect(self, symbol, kind, expected):
+        """
+        Enregistre la date à partir de laquelle un nouveau contenu est attendu
+
+        La date la plus proche l'emporte, sauf si la date connue est déjà passée et a
+        donné lieu à une vérification : elle est alors remplacée.
+
+        Args:
+            symbol (str): Symbole boursier
+            kind (str): Type de données
+            expected (datetime.date or datetime): Date de publication attendue
+        """
+        expected = pd.Timestamp(expected).to_pydatetime().replace(tzinfo=None)
+        with self._lock:
+            entry = self._checks.setdefault(symbol, {}).setdefault(kind, {})
+            current = self._parse(entry.get('expected'))
+            checked_at = self._parse(entry.get('checked_at'))
+            if current is None or expected < current or (checked_at is not None and current <= checked_at):
+                entry['expected'] = expected.isoformat(timespec='seconds')
+                self._dirty = True
+
+    def is_due(self, symbol, kind, now=None):
+        """
+        Indique si un contenu mérite d'être redemandé à l'API
+
+        Un contenu est dû s'il n'a jamais été vérifié, si sa dernière vérification date
+        de plus de `max_age_days`, ou si sa date de publication attendue est passée (au
+        plus une vérification tous les `recheck_days`). Sans date attendue, il est
+        revérifié tous les `recheck_days`.
+
+        Args:
+            symbol (str): Symbole boursier
+            kind (str): Type de données
+            now (datetime, optional): Date de référence. Par défaut, maintenant
+
+        Returns:
+            bool: True si l'appel doit être fait
+        """
+        now = now or datetime.now()
+        with self._lock:
+            entry = self._checks.get(symbol, {}).get(kind, {})
+            checked_at = self._parse(entry.get('checked_at'))
+            expected = self._parse(entry.get('expected'))
+
+        if checked_at is None:
+            return True
+        age = now - checked_at
+        if age >= timedelta(days=self.max_age_days):
+            return True
+        if age < timedelta(days=self.recheck_days):
+            return False
+        return expected is None or now >= expected
+
+    def save(self):
+        """
+        Écrit l'index sur disque s'il a été modifié
+        """
+        with self._lock:
+            if not self._dirty:
+                return
+            content = json.dumps({
+                'version': self.VERSION,
+                'fingerprints': self._fingerprints,
+                'checks': self._checks
+            }, sort_keys=True)
+            self._dirty = False
+
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = f"{self.path}.tmp.{threading.get_ident()}"
+        try:
+            with open(tmp_path, 'w') as f:
+                f.write(content)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.error(f"Impossible d'écrire l'index des empreintes: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            with self._lock:
+                self._dirty = True
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r') as f:
+                content = json.load(f)
+        except Exception as e:
+            # Un index illisible entraîne seulement une nouvelle vérification de tout l'univers
+            logger.warning(f"Index des empreintes illisible ignoré ({self.path}): {e}")
+            return
+        if content.get('version') != self.VERSION:
+            logger.warning(f"Version d'index des empreintes non prise en charge: {content.get('version')}")
+            return
+        self._fingerprints = content.get('fingerprints', {})
+        self._checks = content.get('checks', {})
+
+    @staticmethod
+    def _parse(value):
+        return datetime.fromisoformat(value) if value else None
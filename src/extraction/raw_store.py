@@ -0,0 +1,230 @@
+import os
+import json
+import logging
+import threading
+from datetime import datetime
+
+import pandas as pd
+
+from src.utils.logger import metrics
+
+logger = logging.getLogger('raw_store')
+
+
+class RawDataStore:
+    """
+    Zone d'atterrissage des données brutes, partitionnée au format Parquet
+
+    Les données sont rangées par source, type de données, symbole et année :
+    {base_dir}/{source}/{data_type}/symbol={SYMBOLE}/year={AAAA}/data.parquet
+
+    Chaque écriture fusionne les nouvelles lignes avec la partition existante et
+    supprime les doublons sur la clé (la dernière version l'emporte). Les données
+    sans colonne de date (informations d'entreprise, états financiers) sont
+    horodatées avec une colonne `as_of` correspondant au jour d'extraction.
+    """
+
+    SNAPSHOT_COLUMN = 'as_of'
+    PARTITION_FILE = 'data.parquet'
+
+    def __init__(self, base_dir=None):
+        """
+        Initialise la zone brute
+
+        Args:
+            base_dir (str, optional): Dossier racine. Par défaut, utilise data/raw
+        """
+        if base_dir is None:
+            base_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
+                                    'data', 'raw')
+        self.base_dir = base_dir
+        os.makedirs(self.base_dir, exist_ok=True)
+
+        # Un verrou par partition pour sérialiser les fusions concurrentes
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    def write(self, df, source, data_type, symbol=None, date_column='date', key_columns=None):
+        """
+        Ajoute des données dans la zone brute en dédoublonnant à l'écriture
+
+        Args:
+            df (pandas.DataFrame): Données à sauvegarder
+            source (str): Source des données ('yahoo_finance', 'alpha_vantage', ...)
+            data_type (str): Type de données ('historical_1d', 'company_info', ...)
+            symbol (str, optional): Symbole utilisé si le DataFrame n'a pas de colonne 'symbol'
+            date_column (str, optional): Colonne de date servant au partitionnement. Si elle est
+                                         absente, une colonne `as_of` est ajoutée
+            key_columns (list, optional): Colonnes identifiant une ligne au sein d'un symbole.
+                                          Par défaut, la colonne de date seule
+
+        Returns:
+            int: Nombre d'octets écrits sur disque
+        """
+        if df is None or df.empty:
+            return 0
+
+        df = self._normalize_frame(df)
+
+        if date_column not in df.columns:
+            df[self.SNAPSHOT_COLUMN] = pd.Timestamp(datetime.now().date())
+            key_columns = [self.SNAPSHOT_COLUMN] + list(key_columns or [])
+            date_column = self.SNAPSHOT_COLUMN
+        elif key_columns is None:
+            key_columns = [date_column]
+
+        if 'symbol' not in df.columns:
+            if symbol is None:
+                raise ValueError("Un symbole est requis lorsque le DataFrame n'a pas de colonne 'symbol'")
+            df['symbol'] = symbol
+
+        dates = pd.to_datetime(df[date_column])
+        bytes_written = 0
+
+        for (part_symbol, year), part in df.groupby([df['symbol'], dates.dt.year], sort=False):
+            path = self._partition_path(source, data_type, part_symbol, int(year))
+            with self._lock_for(path):
+                if os.path.exists(path):
+                    part = pd.concat([pd.read_parquet(path), part], ignore_index=True)
+                part = (part.drop_duplicates(subset=key_columns, keep='last')
+                            .sort_values(key_columns)
+                            .reset_index(drop=True))
+
+                # Écriture atomique pour ne jamais laisser une partition tronquée
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp_path = f"{path}.tmp"
+                part.to_parquet(tmp_path, index=False)
+                os.replace(tmp_path, path)
+                bytes_written += os.path.getsize(path)
+
+        metrics.count(rows_in=len(df), bytes_written=bytes_written)
+        return bytes_written
+
+    def read(self, source, data_type, symbols=None, start=None, end=None, columns=None, date_column='date'):
+        """
+        Lit les données de la zone brute en ne parcourant que les partitions utiles
+
+        Args:
+            source (str): Source des données
+            data_type (str): Type de données
+            symbols (list, optional): Symboles à lire. Par défaut, tous les symboles
+            start (str, optional): Date de début incluse au format 'YYYY-MM-DD'
+            end (str, optional): Date de fin incluse au format 'YYYY-MM-DD'
+            columns (list, optional): Colonnes à lire. Par défaut, toutes
+            date_column (str, optional): Colonne de date utilisée pour le filtrage
+
+        Returns:
+            pandas.DataFrame: Données lues, ou None si aucune partition ne correspond
+        """
+        start = pd.Timestamp(start) if start is not None else None
+        end = pd.Timestamp(end) if end is not None else None
+
+        if columns is not None:
+            columns = list(dict.fromkeys(list(columns) + ['symbol', date_column]))
+
+        frames = []
+        for symbol in symbols if symbols is not None else self.list_symbols(source, data_type):
+            for year, path in self._year_partitions(source, data_type, symbol):
+                if start is not None and year < start.year:
+                    continue
+                if end is not None and year > end.year:
+                    continue
+
+                part = pd.read_parquet(path, columns=columns)
+                if start is not None or end is not None:
+                    dates = self._naive_dates(part[date_column])
+                    mask = pd.Series(True, index=part.index)
+                    if start is not None:
+                        mask &= dates >= start
+                    if end is not None:
+                        mask &= dates < end + pd.Timedelta(days=1)
+                    part = part[mask]
+                frames.append(part)
+
+        if not frames:
+            return None
+
+        return pd.concat(frames, ignore_index=True)
+
+    def last_dates(self, source, data_type, symbols, date_column='date'):
+        """
+        Récupère la dernière date stockée pour chaque symbole
+
+        Seule la partition de l'année la plus récente de chaque symbole est lue.
+
+        Args:
+            source (str): Source des données
+            data_type (str): Type de données
+            symbols (list): Liste des symboles
+            date_column (str, optional): Colonne de date
+
+        Returns:
+            dict: Dictionnaire {symbole: datetime.date} limité aux symboles déjà stockés
+        """
+        watermarks = {}
+        for symbol in symbols:
+            partitions = self._year_partitions(source, data_type, symbol)
+            if not partitions:
+                continue
+            _, path = partitions[-1]
+            last_date = self._naive_dates(pd.read_parquet(path, columns=[date_column])[date_column]).max()
+            if pd.notna(last_date):
+                watermarks[symbol] = last_date.date()
+        return watermarks
+
+    def list_symbols(self, source, data_type):
+        """
+        Liste les symboles présents dans la zone brute pour un type de données
+
+        Args:
+            source (str): Source des données
+            data_type (str): Type de données
+
+        Returns:
+            list: Symboles triés par ordre alphabétique
+        """
+        dataset_dir = os.path.join(self.base_dir, source, data_type)
+        if not os.path.isdir(dataset_dir):
+            return []
+        return sorted(entry.split('=', 1)[1] for entry in os.listdir(dataset_dir)
+                      if entry.startswith('symbol='))
+
+    def _partition_path(self, source, data_type, symbol, year):
+        return os.path.join(self.base_dir, source, data_type, f"symbol={symbol}",
+                            f"year={year}", self.PARTITION_FILE)
+
+    def _year_partitions(self, source, data_type, symbol):
+        symbol_dir = os.path.join(self.base_dir, source, data_type, f"symbol={symbol}")
+        if not os.path.isdir(symbol_dir):
+            return []
+        partitions = []
+        for entry in os.listdir(symbol_dir):
+            path = os.path.join(symbol_dir, entry, self.PARTITION_FILE)
+            if entry.startswith('year=') and os.path.exists(path):
+                partitions.append((int(entry.split('=', 1)[1]), path))
+        return sorted(partitions)
+
+    def _lock_for(self, path):
+        with self._locks_guard:
+            return self._locks.setdefault(path, threading.Lock())
+
+    @staticmethod
+    def _naive_dates(series):
+        # Les dates Yahoo Finance sont localisées : on compare sur l'heure locale du marché
+        dates = pd.to_datetime(series)
+        if dates.dt.tz is not None:
+            dates = dates.dt.tz_localize(None)
+        return dates
+
+    @staticmethod
+    def _normalize_frame(df):
+        df = df.copy()
+        df.columns = [str(col) for col in df.columns]
+
+        # Parquet exige des colonnes homogènes : les valeurs imbriquées sont sérialisées en JSON
+        for col in df.columns[df.dtypes == object]:
+            if df[col].map(lambda value: isinstance(value, (list, dict))).any():
+                df[col] = df[col].map(
+                    lambda value: json.dumps(value, default=str) if isinstance(value, (list, dict)) else value
+                )
+        return df
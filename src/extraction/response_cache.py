@@ -0,0 +1,246 @@
+import os
+import json
+import pickle
+import hashlib
+import logging
+import threading
+from datetime import datetime, time, timedelta
+from zoneinfo import ZoneInfo
+
+logger = logging.getLogger('response_cache')
+
+
+class CacheMissError(Exception):
+    """Levée en mode 'replay' lorsqu'une réponse n'a jamais été enregistrée"""
+
+
+class ResponseCache:
+    """
+    Cache disque des réponses des API financières
+
+    Les réponses sont indexées par point d'accès et paramètres normalisés (la clé
+    d'API est retirée), avec une durée de vie propre à chaque type de données et
+    une éviction LRU bornée en taille.
+
+    Modes disponibles :
+        - 'read_write' : sert les réponses encore valides, interroge l'API sinon
+        - 'record' : interroge toujours l'API et enregistre chaque réponse
+        - 'replay' : sert uniquement les réponses enregistrées, sans accès réseau
+        - 'disabled' : appelle toujours l'API sans rien stocker
+    """
+
+    MODES = ('read_write', 'record', 'replay', 'disabled')
+
+    # Paramètres retirés de la clé de cache (secrets)
+    SECRET_PARAMS = ('apikey', 'api_key', 'token')
+
+    # Durées de vie par type de données, en secondes. 'market_close' expire à la
+    # prochaine clôture du marché américain
+    DEFAULT_TTLS = {
+        'intraday': 5 * 60,
+        'daily': 'market_close',
+        'overview': 3 * 24 * 3600,
+        'financials': 7 * 24 * 3600,
+        'default': 3600
+    }
+
+    MARKET_TIMEZONE = ZoneInfo('America/New_York')
+    MARKET_CLOSE = time(16, 0)
+
+    def __init__(self, cache_dir=None, max_bytes=512 * 1024 * 1024, ttls=None, mode='read_write'):
+        """
+        Initialise le cache
+
+        Args:
+            cache_dir (str, optional): Dossier du cache. Par défaut, data/cache/http
+            max_bytes (int, optional): Taille maximale du cache sur disque
+            ttls (dict, optional): Durées de vie remplaçant celles de DEFAULT_TTLS
+            mode (str, optional): Mode de fonctionnement (voir MODES)
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"Mode de cache inconnu: {mode}")
+
+        if cache_dir is None:
+            cache_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
+                                     'data', 'cache', 'http')
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.ttls = {**self.DEFAULT_TTLS, **(ttls or {})}
+        self.mode = mode
+        self.stats = {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+
+        self._lock = threading.Lock()
+        self._total_bytes = None
+
+        if mode != 'disabled':
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+    def fetch(self, endpoint, params, data_type, loader, cacheable=None):
+        """
+        Retourne la réponse en cache ou appelle `loader` et enregistre son résultat
+
+        Args:
+            endpoint (str): Point d'accès appelé (URL ou nom de méthode)
+            params (dict): Paramètres de l'appel
+            data_type (str): Type de données, qui détermine la durée de vie
+            loader (callable): Fonction sans argument effectuant l'appel réel
+            cacheable (callable, optional): Prédicat indiquant si la réponse peut être stockée.
+                                            Par défaut, toute réponse non nulle
+
+        Returns:
+            La réponse, issue du cache ou de l'appel
+
+        Raises:
+            CacheMissError: En mode 'replay', si la réponse n'a jamais été enregistrée
+        """
+        if self.mode == 'disabled':
+            return loader()
+
+        key = self.make_key(endpoint, params)
+
+        if self.mode != 'record':
+            hit, payload = self._get(key)
+            if hit:
+                return payload
+            if self.mode == 'replay':
+                raise CacheMissError(f"Réponse absente du cache pour {endpoint} {self._public_params(params)}")
+
+        payload = loader()
+        if payload is not None and (cacheable is None or cacheable(payload)):
+            self._put(key, endpoint, params, data_type, payload)
+        return payload
+
+    def make_key(self, endpoint, params):
+        """
+        Calcule la clé de cache d'un appel, indépendante de l'ordre des paramètres et de la clé d'API
+
+        Args:
+            endpoint (str): Point d'accès appelé
+            params (dict): Paramètres de l'appel
+
+        Returns:
+            str: Empreinte SHA-256 hexadécimale
+        """
+        canonical = json.dumps([endpoint, self._public_params(params)], sort_keys=True, default=str)
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+    def clear(self):
+        """
+        Supprime toutes les entrées du cache
+        """
+        with self._lock:
+            for path, _, _ in self._entries():
+                os.remove(path)
+            self._total_bytes = 0
+
+    def _get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                entry = pickle.load(f)
+        except FileNotFoundError:
+            self._count('misses')
+            return False, None
+        except Exception as e:
+            logger.warning(f"Entrée de cache illisible ignorée ({path}): {e}")
+            self._count('misses')
+            return False, None
+
+        if self.mode == 'read_write' and datetime.now().timestamp() >= entry['expires_at']:
+            self._count('misses')
+            return False, None
+
+        # L'heure de modification sert d'horodatage d'accès pour l'éviction LRU
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self._count('hits')
+        return True, entry['payload']
+
+    def _put(self, key, endpoint, params, data_type, payload):
+        now = datetime.now()
+        entry = {
+            'endpoint': endpoint,
+            'params': self._public_params(params),
+            'data_type': data_type,
+            'stored_at': now.timestamp(),
+            'expires_at': self._expires_at(data_type, now).timestamp(),
+            'payload': payload
+        }
+
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp.{threading.get_ident()}"
+        try:
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+            previous_size = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"Impossible d'enregistrer la réponse en cache: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+
+        with self._lock:
+            self.stats['stores'] += 1
+            if self._total_bytes is None:
+                self._total_bytes = sum(size for _, size, _ in self._entries())
+            else:
+                self._total_bytes += os.path.getsize(path) - previous_size
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def _evict(self):
+        # Supprimer les entrées les moins récemment utilisées jusqu'à 90 % de la taille maximale
+        target = self.max_bytes * 0.9
+        for path, size, _ in sorted(self._entries(), key=lambda entry: entry[2]):
+            if self._total_bytes <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            self._total_bytes -= size
+            self.stats['evictions'] += 1
+
+    def _entries(self):
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for filename in files:
+                if filename.endswith('.pkl'):
+                    path = os.path.join(root, filename)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    entries.append((path, stat.st_size, stat.st_mtime))
+        return entries
+
+    def _expires_at(self, data_type, now):
+        ttl = self.ttls.get(data_type, self.ttls['default'])
+        if ttl == 'market_close':
+            return self._next_market_close(now)
+        return now + timedelta(seconds=ttl)
+
+    def _next_market_close(self, now):
+        market_now = now.astimezone(self.MARKET_TIMEZONE)
+        close = datetime.combine(market_now.date(), self.MARKET_CLOSE, tzinfo=self.MARKET_TIMEZONE)
+        if market_now >= close:
+            close += timedelta(days=1)
+        # Pas de nouvelle barre quotidienne le week-end
+        while close.weekday() >= 5:
+            close += timedelta(days=1)
+        return close
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.pkl")
+
+    def _public_params(self, params):
+        return {name: value for name, value in (params or {}).items()
+                if name.lower() not in self.SECRET_PARAMS}
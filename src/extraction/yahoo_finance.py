@@ -1,32 +1,108 @@
 import os
+import numpy as np
 import pandas as pd
-import yfinance as yf
 import logging
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from pathlib import Path
 
-# Configuration du logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+from src.extraction.fingerprint_index import FingerprintIndex
+from src.extraction.raw_store import RawDataStore
+from src.extraction.response_cache import ResponseCache
+from src.utils.concurrency import HostConcurrencyLimiter, bounded_as_completed
+from src.utils.logger import metrics
+
 logger = logging.getLogger('yahoo_finance_extractor')
 
+
+def _yfinance():
+    # Import différé : yfinance et ses dépendances réseau ne sont chargés qu'au premier appel
+    import yfinance
+    return yfinance
+
+
 class YahooFinanceExtractor:
     """
     Classe pour extraire des données financières via Yahoo Finance (yfinance)
     """
     
-    def __init__(self):
+    # Fenêtre de recouvrement (en jours calendaires) relue à chaque extraction
+    # incrémentale pour capter les corrections tardives du fournisseur
+    DEFAULT_OVERLAP_DAYS = 5
+    
+    # Nom de la source dans la zone brute
+    SOURCE = 'yahoo_finance'
+    
+    # Hôte interrogé par yfinance pour les fondamentaux
+    API_HOST = 'query2.finance.yahoo.com'
+    
+    # Intervalles renvoyant des barres quotidiennes ou plus longues
+    DAILY_INTERVALS = ('1d', '5d', '1wk', '1mo', '3mo')
+    
+    # Intervalles intraday : (jours couverts au plus par une requête, profondeur d'historique
+    # en jours) imposés par Yahoo Finance
+    INTRADAY_LIMITS = {
+        '1m': (7, 30),
+        '2m': (60, 60),
+        '5m': (60, 60),
+        '15m': (60, 60),
+        '30m': (60, 60),
+        '60m': (60, 730),
+        '90m': (60, 60),
+        '1h': (60, 730)
+    }
+    
+    # États financiers : type de données dans la zone brute -> attribut de yf.Ticker
+    STATEMENTS = {
+        'income_statement': 'income_stmt',
+        'balance_sheet': 'balance_sheet',
+        'cash_flow': 'cashflow'
+    }
+    
+    # Délai minimal (jours) entre la clôture d'un exercice et la publication de ses états
+    EARLIEST_FILING_DAYS = 30
+    
+    # Champs de marché des informations d'entreprise, exclus de leur empreinte :
+    # ils changent à chaque séance sans que la fiche de l'entreprise ne change
+    INFO_MARKET_PREFIXES = ('regularMarket', 'preMarket', 'postMarket', 'fiftyTwoWeek', 'fiftyDay',
+                            'twoHundredDay', 'averageVolume', 'averageDailyVolume', 'target')
+    INFO_MARKET_FIELDS = frozenset({
+        'currentPrice', 'previousClose', 'open', 'dayLow', 'dayHigh', 'bid', 'ask', 'bidSize', 'askSize',
+        'volume', 'marketCap', 'enterpriseValue', 'trailingPE', 'forwardPE', 'pegRatio', 'trailingPegRatio',
+        'priceToBook', 'priceToSalesTrailing12Months', 'enterpriseToRevenue', 'enterpriseToEbitda',
+        'dividendYield', 'trailingAnnualDividendYield', '52WeekChange', 'SandP52WeekChange', 'beta',
+        'marketState', 'sharesShort', 'shortRatio', 'shortPercentOfFloat', 'recommendationMean',
+        'recommendationKey', 'numberOfAnalystOpinions'
+    })
+    
+    def __init__(self, db_connector=None, raw_store=None, session=None, max_per_host=4, cache=None,
+                 fingerprints=None):
         """
         Initialise l'extracteur Yahoo Finance
+        
+        Args:
+            db_connector (DatabaseConnector, optional): Connecteur utilisé pour lire la dernière
+                                                        date stockée dans raw.stock_prices. Sans
+                                                        connecteur, la zone brute locale sert de référence.
+            raw_store (RawDataStore, optional): Zone brute partitionnée. Par défaut, data/raw
+            session (optional): Session HTTP partagée par tous les objets yf.Ticker
+            max_per_host (int, optional): Nombre maximal d'appels simultanés vers Yahoo Finance
+            cache (ResponseCache, optional): Cache des réponses. Par défaut, data/cache/http
+            fingerprints (FingerprintIndex, optional): Empreintes des fondamentaux déjà stockés.
+                                                       Par défaut, data/state/fingerprints.json
         """
-        # Dossier de destination pour les données brutes
-        self.raw_data_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 
-                                         'data', 'raw', 'yahoo_finance')
+        self.db_connector = db_connector
+        self.session = session
+        self.host_limiter = HostConcurrencyLimiter(max_per_host=max_per_host)
+        self.cache = cache or ResponseCache()
+        self.fingerprints = fingerprints or FingerprintIndex()
+        
+        # Zone de destination pour les données brutes
+        self.raw_store = raw_store or RawDataStore()
+        self.raw_data_dir = os.path.join(self.raw_store.base_dir, self.SOURCE)
         os.makedirs(self.raw_data_dir, exist_ok=True)
     
-    def get_historical_data(self, symbol, period="max", interval="1d"):
+    def get_historical_data(self, symbol, period="max", interval="1d", start=None, end=None):
         """
         Récupère les données historiques pour un symbole boursier
         
@@ -34,16 +110,26 @@ class YahooFinanceExtractor:
             symbol (str): Symbole boursier (ex: AAPL, MSFT)
             period (str, optional): Période ('1d', '5d', '1mo', '3mo', '6mo', '1y', '2y', '5y', '10y', 'ytd', 'max')
             interval (str, optional): Intervalle ('1m', '2m', '5m', '15m', '30m', '60m', '90m', '1h', '1d', '5d', '1wk', '1mo', '3mo')
+            start (str, optional): Date de début au format 'YYYY-MM-DD'. Si fournie, remplace `period`
+            end (str, optional): Date de fin (exclue) au format 'YYYY-MM-DD'
         
         Returns:
             pandas.DataFrame: DataFrame contenant les données historiques
         """
         try:
+            if start is not None:
+                period = f"{start}_{end or 'now'}"
             logger.info(f"Extraction des données historiques pour {symbol} (période: {period}, intervalle: {interval})")
             
             # Télécharger les données historiques
-            ticker = yf.Ticker(symbol)
-            df = ticker.history(period=period, interval=interval)
+            ticker = self._ticker(symbol)
+            data_type = 'daily' if interval in self.DAILY_INTERVALS else 'intraday'
+            if start is not None:
+                df = self._call_api('history', {'symbol': symbol, 'start': start, 'end': end, 'interval': interval},
+                                    data_type, lambda: ticker.history(start=start, end=end, interval=interval))
+            else:
+                df = self._call_api('history', {'symbol': symbol, 'period': period, 'interval': interval},
+                                    data_type, lambda: ticker.history(period=period, interval=interval))
             
             # Vérifier si des données ont été récupérées
             if df.empty:
@@ -70,7 +156,7 @@ class YahooFinanceExtractor:
             }, inplace=True)
             
             # Sauvegarder les données brutes
-            self._save_raw_data(df, symbol, f"historical_{period}_{interval}")
+            self._save_raw_data(df, symbol, f"historical_{interval}")
             
             return df
             
@@ -78,98 +164,405 @@ class YahooFinanceExtractor:
             logger.error(f"Erreur lors de l'extraction des données pour {symbol}: {e}")
             return None
     
-    def get_company_info(self, symbol):
+    def get_intraday_data(self, symbols, start=None, end=None, interval='1m', max_workers=8):
+        """
+        Récupère les barres intraday de plusieurs symboles par fenêtres téléchargées en parallèle
+        
+        La période demandée est découpée en fenêtres à la taille maximale acceptée par
+        Yahoo Finance pour l'intervalle (INTRADAY_LIMITS), puis toutes les fenêtres de
+        tous les symboles sont téléchargées sur un pool de threads borné. Les barres sont
+        réunies en un seul DataFrame horodaté en UTC et écrites en une fois dans la zone
+        brute (intraday_{interval}).
+        
+        Sans date de début, chaque symbole repart du dernier jour stocké dans la zone
+        brute, ou de la profondeur d'historique disponible pour un premier chargement.
+        
+        Args:
+            symbols (list): Liste des symboles boursiers
+            start (str, optional): Date de début au format 'YYYY-MM-DD'
+            end (str, optional): Date de fin (exclue) au format 'YYYY-MM-DD'. Par défaut, demain
+            interval (str, optional): Intervalle intraday (voir INTRADAY_LIMITS). Par défaut '1m'
+            max_workers (int, optional): Taille du pool de threads
+        
+        Returns:
+            pandas.DataFrame: Colonnes 'symbol', 'ts', 'open', 'high', 'low', 'close', 'volume',
+                              triées par symbole et horodatage, ou None si aucune barre
+        """
+        if interval not in self.INTRADAY_LIMITS:
+            raise ValueError(f"Intervalle intraday non pris en charge: {interval}")
+        window_days, history_days = self.INTRADAY_LIMITS[interval]
+        data_type = f"intraday_{interval}"
+        
+        today = pd.Timestamp(datetime.now().date())
+        end = pd.Timestamp(end) if end is not None else today + pd.Timedelta(days=1)
+        # Yahoo Finance compte la profondeur d'historique à partir de l'instant présent
+        earliest = today - pd.Timedelta(days=history_days - 1)
+        
+        if start is not None:
+            starts = dict.fromkeys(symbols, pd.Timestamp(start))
+        else:
+            watermarks = self.raw_store.last_dates(self.SOURCE, data_type, symbols, date_column='ts')
+            starts = {symbol: pd.Timestamp(watermarks[symbol]) if symbol in watermarks else earliest
+                      for symbol in symbols}
+        
+        windows = []
+        for symbol, first in starts.items():
+            if first < earliest:
+                logger.warning(f"Barres {interval} de {symbol} disponibles depuis le {earliest.date()} "
+                               f"seulement (demandé: {first.date()})")
+                first = earliest
+            while first < end:
+                last = min(first + pd.Timedelta(days=window_days), end)
+                windows.append((symbol, first.strftime("%Y-%m-%d"), last.strftime("%Y-%m-%d")))
+                first = last
+        
+        logger.info(f"Extraction intraday ({interval}) de {len(starts)} symboles en {len(windows)} fenêtres")
+        
+        def fetch(window):
+            symbol, window_start, window_end = window
+            ticker = self._ticker(symbol)
+            return self._call_api('history', {'symbol': symbol, 'start': window_start, 'end': window_end,
+                                              'interval': interval}, 'intraday',
+                                  lambda: ticker.history(start=window_start, end=window_end, interval=interval))
+        
+        # Appels HTTP et octets écrits par les workers comptés dans l'étape appelante
+        fetch = metrics.bind(fetch)
+        frames = []
+        executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='yahoo_intraday')
+        try:
+            for (symbol, window_start, _), future in bounded_as_completed(executor, fetch, windows,
+                                                                          max_workers * 2):
+                try:
+                    df = future.result()
+                except Exception as e:
+                    logger.error(f"Erreur lors de l'extraction intraday de {symbol} depuis le {window_start}: {e}")
+                    continue
+                if df is not None and not df.empty:
+                    frames.append(self._intraday_frame(df, symbol))
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+        
+        if not frames:
+            logger.warning(f"Aucune barre intraday récupérée pour les symboles {symbols}")
+            return None
+        
+        bars = (pd.concat(frames, ignore_index=True)
+                  .drop_duplicates(subset=['symbol', 'ts'], keep='last')
+                  .sort_values(['symbol', 'ts'], ignore_index=True))
+        
+        # Une seule écriture par appel, partitionnée par symbole et année
+        self._save_raw_data(bars, None, data_type, date_column='ts')
+        return bars
+    
+    @staticmethod
+    def _intraday_frame(df, symbol):
+        """
+        Ramène une réponse intraday de yfinance au format compact (horodatage UTC)
+        """
+        ts = pd.to_datetime(df.index)
+        ts = ts.tz_convert('UTC') if ts.tz is not None else ts.tz_localize('UTC')
+        volume = pd.to_numeric(df['Volume'], errors='coerce').fillna(0).to_numpy(dtype=np.int64)
+        return pd.DataFrame({
+            'symbol': symbol,
+            'ts': ts,
+            'open': df['Open'].to_numpy(dtype=np.float64),
+            'high': df['High'].to_numpy(dtype=np.float64),
+            'low': df['Low'].to_numpy(dtype=np.float64),
+            'close': df['Close'].to_numpy(dtype=np.float64),
+            'volume': volume
+        })
+    
+    def get_company_info(self, symbol, ticker=None):
         """
         Récupère les informations générales sur une entreprise
         
+        Les informations ne sont réécrites dans la zone brute que si leur empreinte
+        (hors champs de marché) a changé.
+        
         Args:
             symbol (str): Symbole boursier (ex: AAPL, MSFT)
+            ticker (yfinance.Ticker, optional): Objet Ticker déjà construit pour ce symbole
         
         Returns:
             dict: Dictionnaire contenant les informations de l'entreprise
         """
         try:
-            logger.info(f"Extraction des informations de l'entreprise pour {symbol}")
-            
-            # Récupérer les informations de l'entreprise
-            ticker = yf.Ticker(symbol)
-            info = ticker.info
-            
-            # Convertir en DataFrame pour la sauvegarde
-            df = pd.DataFrame([info])
-            
-            # Sauvegarder les données brutes
-            self._save_raw_data(df, symbol, "company_info")
-            
+            info, _ = self._fetch_company_info(symbol, ticker)
             return info
             
         except Exception as e:
             logger.error(f"Erreur lors de l'extraction des informations pour {symbol}: {e}")
             return None
+        finally:
+            self.fingerprints.save()
     
-    def get_financials(self, symbol):
+    def get_financials(self, symbol, ticker=None):
         """
         Récupère les données financières d'une entreprise
         
+        Seuls les exercices dont l'empreinte a changé sont écrits dans la zone brute.
+        
         Args:
             symbol (str): Symbole boursier (ex: AAPL, MSFT)
+            ticker (yfinance.Ticker, optional): Objet Ticker déjà construit pour ce symbole
         
         Returns:
             dict: Dictionnaire contenant les différents états financiers
         """
         try:
-            logger.info(f"Extraction des données financières pour {symbol}")
-            
-            # Récupérer les données financières
-            ticker = yf.Ticker(symbol)
-            
-            # Récupérer les différents états financiers
-            income_stmt = ticker.income_stmt
-            balance_sheet = ticker.balance_sheet
-            cash_flow = ticker.cashflow
-            
-            # Sauvegarder les données brutes
-            if not income_stmt.empty:
-                self._save_raw_data(income_stmt.reset_index(), symbol, "income_statement")
-            
-            if not balance_sheet.empty:
-                self._save_raw_data(balance_sheet.reset_index(), symbol, "balance_sheet")
-            
-            if not cash_flow.empty:
-                self._save_raw_data(cash_flow.reset_index(), symbol, "cash_flow")
-            
-            return {
-                'income_statement': income_stmt,
-                'balance_sheet': balance_sheet,
-                'cash_flow': cash_flow
-            }
+            statements, _ = self._fetch_financials(symbol, ticker)
+            return statements
             
         except Exception as e:
             logger.error(f"Erreur lors de l'extraction des données financières pour {symbol}: {e}")
             return None
+        finally:
+            self.fingerprints.save()
     
-    def _save_raw_data(self, df, symbol, data_type):
-    
+    def iter_fundamentals(self, symbols, include_info=True, include_financials=True, max_workers=16,
+                          force=False):
+        """
+        Récupère en parallèle les informations et états financiers nouveaux d'un univers de symboles
+        
+        Seuls les contenus dus selon le calendrier de publication (FingerprintIndex.is_due)
+        sont redemandés à l'API, et seuls ceux dont l'empreinte a changé sont écrits et
+        restitués : un symbole sans nouveauté n'est pas restitué du tout.
+        
+        Le travail est réparti sur un pool de threads borné ; un seul objet yf.Ticker est
+        construit par symbole et partagé entre les différents appels. Les résultats sont
+        restitués au fil de l'eau, dans l'ordre de terminaison, de sorte qu'un symbole
+        lent ne bloque pas les autres.
+        
+        Args:
+            symbols (iterable): Symboles boursiers à traiter
+            include_info (bool, optional): Récupérer les informations de l'entreprise
+            include_financials (bool, optional): Récupérer les états financiers
+            max_workers (int, optional): Taille du pool de threads
+            force (bool, optional): Interroger l'API sans tenir compte du calendrier
+        
+        Yields:
+            tuple: (symbole, dict avec la clé 'company_info' (informations modifiées) et/ou
+                   'financials' ({type d'état: exercices modifiés})). Une clé vaut None en cas d'erreur
+        """
+        def fetch(symbol):
+            result = {}
+            due_info = include_info and (force or self.fingerprints.is_due(symbol, 'company_info'))
+            due_financials = include_financials and (force or self.fingerprints.is_due(symbol, 'financials'))
+            if not (due_info or due_financials):
+                return result
+            
+            ticker = self._ticker(symbol)
+            # Les informations d'abord : elles portent la date de publication des prochains états
+            if due_info:
+                try:
+                    info, changed = self._fetch_company_info(symbol, ticker)
+                    if changed:
+                        result['company_info'] = info
+                except Exception as e:
+                    logger.error(f"Erreur lors de l'extraction des informations pour {symbol}: {e}")
+                    result['company_info'] = None
+            if due_financials:
+                try:
+                    _, changed = self._fetch_financials(symbol, ticker)
+                    if changed:
+                        result['financials'] = changed
+                except Exception as e:
+                    logger.error(f"Erreur lors de l'extraction des données financières pour {symbol}: {e}")
+                    result['financials'] = None
+            return result
+        
+        # Appels HTTP et octets écrits par les workers comptés dans l'étape appelante
+        fetch = metrics.bind(fetch)
+        executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='yahoo_fundamentals')
+        unchanged = 0
         try:
-            # Créer un nom de fichier avec horodatage
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"{symbol}_{data_type}_{timestamp}.csv"
-            filepath = os.path.join(self.raw_data_dir, filename)
+            for symbol, future in bounded_as_completed(executor, fetch, symbols, max_workers * 2):
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logger.error(f"Erreur lors de l'extraction des fondamentaux pour {symbol}: {e}")
+                    yield symbol, None
+                    continue
+                if not result:
+                    unchanged += 1
+                    continue
+                yield symbol, result
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+            self.fingerprints.save()
+            metrics.count(fundamentals_unchanged=unchanged)
+            logger.info(f"Fondamentaux: {unchanged} symboles sans nouveauté")
+    
+    def _fetch_company_info(self, symbol, ticker=None):
+        """
+        Interroge l'API pour les informations d'une entreprise et ne les écrit que si elles ont changé
+        
+        Returns:
+            tuple: (informations, True si elles ont été écrites)
+        """
+        logger.info(f"Extraction des informations de l'entreprise pour {symbol}")
+        
+        ticker = ticker or self._ticker(symbol)
+        info = self._call_api('info', {'symbol': symbol}, 'overview', lambda: ticker.info)
+        self._expect_statements(symbol, info)
+        
+        hashes = {FingerprintIndex.SNAPSHOT: FingerprintIndex.hash_record(info, ignore=self._is_market_field)}
+        if not self.fingerprints.changed(symbol, 'company_info', hashes):
+            logger.info(f"Informations inchangées pour {symbol}, écriture ignorée")
+            self.fingerprints.mark_checked(symbol, 'company_info')
+            return info, False
+        
+        # En cas d'échec d'écriture, le contenu n'est pas marqué comme vérifié : il sera
+        # redemandé au prochain passage au lieu d'attendre le délai de revérification
+        if not self._save_raw_data(pd.DataFrame([info]), symbol, "company_info"):
+            return info, False
+        self.fingerprints.record(symbol, 'company_info', hashes)
+        self.fingerprints.mark_checked(symbol, 'company_info')
+        return info, True
+    
+    def _fetch_financials(self, symbol, ticker=None):
+        """
+        Interroge l'API pour les états financiers et n'écrit que les exercices nouveaux ou modifiés
+        
+        Returns:
+            tuple: (états complets, {type d'état: exercices écrits})
+        """
+        logger.info(f"Extraction des données financières pour {symbol}")
+        
+        ticker = ticker or self._ticker(symbol)
+        statements = {}
+        changed = {}
+        failed = []
+        latest_period = None
+        for data_type, attribute in self.STATEMENTS.items():
+            statement = self._call_api(attribute, {'symbol': symbol}, 'financials',
+                                       lambda attribute=attribute: getattr(ticker, attribute))
+            statements[data_type] = statement
             
-            # Sauvegarder en CSV
-            df.to_csv(filepath, index=False)
-            logger.info(f"Données sauvegardées dans {filepath}")
+            hashes = FingerprintIndex.hash_statement(statement)
+            if not hashes:
+                continue
+            latest_period = max([latest_period or '', *hashes])
+            periods = set(self.fingerprints.changed(symbol, data_type, hashes))
+            if not periods:
+                continue
+            
+            # Une ligne par poste comptable, limitée aux exercices nouveaux ou modifiés
+            subset = statement.loc[:, [FingerprintIndex.period_key(column) in periods
+                                       for column in statement.columns]]
+            frame = subset.reset_index()
+            if self._save_raw_data(frame, symbol, data_type, key_columns=[str(frame.columns[0])]):
+                self.fingerprints.record(symbol, data_type, {period: hashes[period] for period in periods})
+                changed[data_type] = subset
+            else:
+                failed.append(data_type)
+        
+        # Vérification enregistrée seulement si tous les exercices modifiés ont été écrits
+        if failed:
+            logger.warning(f"États non écrits pour {symbol} ({', '.join(failed)}), nouvelle vérification au prochain passage")
+        else:
+            self.fingerprints.mark_checked(symbol, 'financials')
+        if latest_period:
+            # Les états de l'exercice suivant ne peuvent paraître qu'après sa clôture
+            next_filing = pd.Timestamp(latest_period) + pd.DateOffset(years=1, days=self.EARLIEST_FILING_DAYS)
+            self.fingerprints.expect(symbol, 'financials', next_filing)
+        if not changed:
+            logger.info(f"États financiers inchangés pour {symbol}, écriture ignorée")
+        return statements, changed
+    
+    def _expect_statements(self, symbol, info):
+        """
+        Déduit des informations de l'entreprise la date de publication des prochains états annuels
+        
+        Les états annuels paraissent avec les résultats qui suivent la clôture de l'exercice
+        ('nextFiscalYearEnd') : la date d'annonce est retenue si elle est connue, sinon la
+        clôture augmentée de EARLIEST_FILING_DAYS.
+        """
+        fiscal_year_end = info.get('nextFiscalYearEnd')
+        if not fiscal_year_end:
+            return
+        try:
+            fiscal_year_end = datetime.fromtimestamp(fiscal_year_end)
+            expected = fiscal_year_end + timedelta(days=self.EARLIEST_FILING_DAYS)
+            announcements = [datetime.fromtimestamp(info[key])
+                             for key in ('earningsTimestampStart', 'earningsTimestamp') if info.get(key)]
+            announcements = [date for date in announcements if date >= fiscal_year_end]
+            if announcements:
+                expected = min(announcements)
+        except (TypeError, ValueError, OverflowError, OSError):
+            return
+        self.fingerprints.expect(symbol, 'financials', expected)
+    
+    @classmethod
+    def _is_market_field(cls, name):
+        return name in cls.INFO_MARKET_FIELDS or name.startswith(cls.INFO_MARKET_PREFIXES)
+    
+    def _call_api(self, endpoint, params, data_type, loader):
+        """
+        Exécute un appel yfinance via le cache de réponses et la limite de concurrence par hôte
+        
+        Args:
+            endpoint (str): Nom de l'appel yfinance ('history', 'info', ...)
+            params (dict): Paramètres identifiant l'appel
+            data_type (str): Type de données fixant la durée de vie en cache
+            loader (callable): Fonction sans argument effectuant l'appel réel
+        
+        Returns:
+            La réponse de yfinance, éventuellement issue du cache
+        """
+        def limited_loader():
+            with self.host_limiter.limit(self.API_HOST):
+                metrics.count(http_calls=1)
+                return loader()
+        
+        # Les réponses vides ne sont pas conservées pour être retentées au prochain passage
+        return self.cache.fetch(f"yfinance/{endpoint}", params, data_type, limited_loader,
+                                cacheable=lambda payload: len(payload) > 0)
+    
+    def _ticker(self, symbol):
+        """
+        Construit un objet yf.Ticker utilisant la session partagée de l'extracteur
+        """
+        yf = _yfinance()
+        if self.session is not None:
+            return yf.Ticker(symbol, session=self.session)
+        return yf.Ticker(symbol)
+    
+    def _save_raw_data(self, df, symbol, data_type, key_columns=None, date_column='date'):
+        """
+        Sauvegarde les données brutes dans la zone brute partitionnée
+        
+        Args:
+            df (pandas.DataFrame): DataFrame à sauvegarder
+            symbol (str): Symbole boursier, ignoré si le DataFrame contient une colonne 'symbol'
+            data_type (str): Type de données ('historical_1d', 'company_info', etc.)
+            key_columns (list, optional): Colonnes de dédoublonnage en plus de la date
+            date_column (str, optional): Colonne de date servant au partitionnement
+        
+        Returns:
+            bool: True si les données ont été écrites
+        """
+        try:
+            bytes_written = self.raw_store.write(df, self.SOURCE, data_type, symbol=symbol,
+                                                 date_column=date_column, key_columns=key_columns)
+            logger.info(f"Données sauvegardées dans la zone brute ({data_type}, {len(df)} lignes, "
+                        f"{bytes_written} octets)")
+            return True
         except Exception as e:
             logger.error(f"Erreur lors de la sauvegarde des données: {e}")
+            return False
     
-    def get_multiple_tickers_data(self, symbols, start_date=None, end_date=None):
+    def get_multiple_tickers_data(self, symbols, start_date=None, end_date=None, period="1y"):
         """
         Récupère les données historiques pour plusieurs symboles boursiers
         
         Args:
             symbols (list): Liste des symboles boursiers
             start_date (str, optional): Date de début au format 'YYYY-MM-DD'
-            end_date (str, optional): Date de fin au format 'YYYY-MM-DD'
+            end_date (str, optional): Date de fin au format 'YYYY-MM-DD'. Sans date de fin,
+                                      les données sont récupérées jusqu'à aujourd'hui
+            period (str, optional): Période utilisée lorsque `start_date` n'est pas spécifiée.
+                                    Par défaut '1y'
         
         Returns:
             pandas.DataFrame: DataFrame contenant les données historiques pour tous les symboles
@@ -177,26 +570,31 @@ class YahooFinanceExtractor:
         try:
             logger.info(f"Extraction des données pour plusieurs symboles: {symbols}")
             
+            yf = _yfinance()
+            
             # Vérifier si les dates sont spécifiées
-            if start_date is None or end_date is None:
+            if start_date is None:
                 # Si les dates ne sont pas spécifiées, utiliser yfinance avec period
-                data = yf.download(
-                    tickers=symbols,
-                    period="1y",  # Par défaut, récupérer les données de la dernière année
-                    group_by='ticker',
-                    auto_adjust=True,
-                    threads=True
-                )
+                data = self._call_api('download', {'tickers': sorted(symbols), 'period': period}, 'daily',
+                                      lambda: yf.download(
+                                          tickers=symbols,
+                                          period=period,
+                                          group_by='ticker',
+                                          auto_adjust=True,
+                                          threads=True
+                                      ))
             else:
                 # Si les dates sont spécifiées, les utiliser
-                data = yf.download(
-                    tickers=symbols,
-                    start=start_date,
-                    end=end_date,
-                    group_by='ticker',
-                    auto_adjust=True,
-                    threads=True
-                )
+                data = self._call_api('download', {'tickers': sorted(symbols), 'start': start_date,
+                                                   'end': end_date}, 'daily',
+                                      lambda: yf.download(
+                                          tickers=symbols,
+                                          start=start_date,
+                                          end=end_date,
+                                          group_by='ticker',
+                                          auto_adjust=True,
+                                          threads=True
+                                      ))
             
             # Vérifier si des données ont été récupérées
             if data.empty:
@@ -221,7 +619,7 @@ class YahooFinanceExtractor:
                 }, inplace=True)
                 
                 # Sauvegarder les données brutes
-                self._save_raw_data(df, symbol, "historical_multiple")
+                self._save_raw_data(df, symbol, "historical_1d")
                 return df
             
             # Traitement pour plusieurs symboles
@@ -253,18 +651,102 @@ class YahooFinanceExtractor:
             # Combiner tous les DataFrames
             combined_df = pd.concat(all_data, ignore_index=True)
             
-            # Sauvegarder les données brutes
-            symbols_str = "_".join(symbols)
-            self._save_raw_data(combined_df, symbols_str, "historical_multiple")
+            # Sauvegarder les données brutes (partitionnées par symbole)
+            self._save_raw_data(combined_df, None, "historical_1d")
             
             return combined_df
         
         except Exception as e:
             logger.error(f"Erreur lors de l'extraction des données pour plusieurs symboles: {e}")
             return None
+    
+    def get_last_stored_dates(self, symbols):
+        """
+        Récupère la dernière date stockée (watermark) pour chaque symbole
+        
+        La base de données (raw.stock_prices) est interrogée en priorité. Sans connecteur,
+        les partitions quotidiennes de la zone brute locale servent de référence.
+        
+        Args:
+            symbols (list): Liste des symboles boursiers
+        
+        Returns:
+            dict: Dictionnaire {symbole: datetime.date} limité aux symboles déjà stockés
+        """
+        if self.db_connector is not None:
+            try:
+                rows = self.db_connector.execute_query(
+                    """
+                    SELECT symbol, MAX(date) AS last_date
+                    FROM raw.stock_prices
+                    WHERE symbol = ANY(%s)
+                    GROUP BY symbol
+                    """,
+                    (list(symbols),)
+                )
+                return {row['symbol']: row['last_date'] for row in rows if row['last_date'] is not None}
+            except Exception as e:
+                logger.error(f"Erreur lors de la lecture des dernières dates stockées: {e}")
+                return {}
+        
+        return self.raw_store.last_dates(self.SOURCE, 'historical_1d', symbols)
+    
+    def get_incremental_data(self, symbols, overlap_days=None, end_date=None, initial_period="max"):
+        """
+        Récupère uniquement les données manquantes pour plusieurs symboles boursiers
+        
+        Pour chaque symbole, l'extraction repart de la dernière date stockée moins une
+        fenêtre de recouvrement. Les symboles partageant la même date de départ sont
+        regroupés dans un seul téléchargement. Les symboles jamais stockés sont chargés
+        sur `initial_period`.
+        
+        Args:
+            symbols (list): Liste des symboles boursiers
+            overlap_days (int, optional): Nombre de jours calendaires relus avant la dernière
+                                          date stockée. Par défaut DEFAULT_OVERLAP_DAYS
+            end_date (str, optional): Date de fin au format 'YYYY-MM-DD'
+            initial_period (str, optional): Période utilisée pour un premier chargement. Par défaut 'max'
+        
+        Returns:
+            pandas.DataFrame: DataFrame contenant les nouvelles données pour tous les symboles
+        """
+        if overlap_days is None:
+            overlap_days = self.DEFAULT_OVERLAP_DAYS
+        
+        watermarks = self.get_last_stored_dates(symbols)
+        
+        # Regrouper les symboles par date de départ pour limiter le nombre d'appels
+        groups = defaultdict(list)
+        for symbol in symbols:
+            last_date = watermarks.get(symbol)
+            start_date = None
+            if last_date is not None:
+                start_date = (last_date - timedelta(days=overlap_days)).strftime("%Y-%m-%d")
+            groups[start_date].append(symbol)
+        
+        logger.info(f"Extraction incrémentale: {len(watermarks)} symboles avec historique, "
+                    f"{len(symbols) - len(watermarks)} en chargement initial")
+        
+        frames = []
+        for start_date, group in groups.items():
+            if start_date is None:
+                df = self.get_multiple_tickers_data(group, period=initial_period)
+            else:
+                df = self.get_multiple_tickers_data(group, start_date=start_date, end_date=end_date)
+            if df is not None:
+                frames.append(df)
+        
+        if not frames:
+            logger.warning(f"Aucune nouvelle donnée récupérée pour les symboles {symbols}")
+            return None
+        
+        return pd.concat(frames, ignore_index=True)
             
 # Exemple d'utilisation
 if __name__ == "__main__":
+    from src.utils.logger import setup_logging
+    
+    setup_logging()
     extractor = YahooFinanceExtractor()
     
     # Extraire les données historiques pour Apple
@@ -276,7 +758,7 @@ if __name__ == "__main__":
     # Extraire les informations de l'entreprise pour Microsoft
     msft_info = extractor.get_company_info("MSFT")
     if msft_info is not None:
-        print(f"Informations sur MSFT récupérées")
+        print("Informations sur MSFT récupérées")
     
     # Extraire les données financières pour Google
     googl_financials = extractor.get_financials("GOOGL")
@@ -290,4 +772,4 @@ if __name__ == "__main__":
         end_date=datetime.now().strftime("%Y-%m-%d")
     )
     if multi_data is not None:
-        print(f"Données multi-symboles récupérées")
\ No newline at end of file
+        print("Données multi-symboles récupérées")
\ No newline at end of file
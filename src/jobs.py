@@ -0,0 +1,435 @@
+# Jobs du pipeline ETL-Finance (quotidien et intraday)
+#
+# Ce module importe toute la chaîne (pandas, yfinance, psycopg2...) : il n'est chargé
+# qu'à l'exécution d'un job, par main.py ou par les tâches des DAG Airflow
+import os
+import signal
+import logging
+import threading
+
+import yaml
+import numpy as np
+import pandas as pd
+
+from src.extraction.yahoo_finance import YahooFinanceExtractor
+from src.loading.postgres_loader import PostgresLoader
+from src.transformation.data_cleaning import clean
+from src.transformation.financial_indicators import IndicatorState
+from src.transformation.intraday_aggregation import aggregate_daily
+from src.transformation.statistical_analysis import CovarianceState
+from src.utils.data_validation import DataValidator
+from src.utils.db_connection import DatabaseConnector
+from src.utils.db_maintenance import DatabaseMaintenance
+from src.utils.logger import metrics
+from src.utils.parallel import ShardedExecutor
+from src.utils.pipeline import Pipeline, Stage
+
+logger = logging.getLogger('jobs')
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PIPELINE_CONFIG_PATH = os.path.join(BASE_DIR, 'config', 'pipeline.yml')
+DB_CONFIG_PATH = os.path.join(BASE_DIR, 'config', 'db_config.yml')
+
+
+class JobFailed(RuntimeError):
+    """Levée par un job lorsqu'au moins un lot a échoué, pour que la tâche soit en échec"""
+
+    def __init__(self, errors):
+        self.errors = list(errors)
+        failed = ', '.join(f"{stage}: {type(error).__name__}: {error}" for stage, error in self.errors[:5])
+        super().__init__(f"{len(self.errors)} lots en erreur ({failed})")
+
+
+def load_pipeline_config(path=None, section='daily'):
+    """
+    Charge la configuration du pipeline
+
+    Args:
+        path (str, optional): Chemin du fichier. Par défaut, config/pipeline.yml
+        section (str, optional): Section à charger ('daily', 'intraday')
+
+    Returns:
+        dict: Section demandée de la configuration
+    """
+    with open(path or PIPELINE_CONFIG_PATH, 'r') as file:
+        config = yaml.safe_load(file) or {}
+    return config.get(section, {})
+
+
+class DailyJob:
+    """
+    Job quotidien : extraction incrémentale, validation, nettoyage, indicateurs et chargement
+
+    Les trois étapes s'exécutent en flux sur des lots de symboles : le téléchargement
+    des lots suivants se poursuit pendant la transformation et le COPY des premiers.
+    """
+
+    SOURCE = YahooFinanceExtractor.SOURCE
+
+    # Tables partitionnées alimentées par le job
+    TABLES = ('raw.stock_prices', 'processed.stock_metrics')
+
+    def __init__(self, config, env='development'):
+        """
+        Args:
+            config (dict): Section 'daily' de config/pipeline.yml
+            env (str, optional): Environnement de base de données ('development', 'production')
+        """
+        self.config = config
+        self.env = env
+        self.db = DatabaseConnector(config_path=DB_CONFIG_PATH, env=env)
+        self.extractor = YahooFinanceExtractor(db_connector=self.db)
+        self.loader = PostgresLoader(self.db)
+        validation = dict(config.get('validation', {}))
+        quarantine_dir = os.path.join(BASE_DIR, validation.pop('quarantine_dir', 'data/quarantine'))
+        self.validator = DataValidator(quarantine_dir=quarantine_dir, **validation)
+        # Nettoyage par shards de symboles : un symbole en erreur est écarté sans faire
+        # échouer son lot. En série par défaut, les lots étant déjà répartis entre les
+        # workers de transformation
+        self.cleaning_config = {'kind': 'serial', **config.get('cleaning', {})}
+        self.state_path = os.path.join(BASE_DIR, config.get('indicator_state', 'data/state/indicators.npz'))
+        self.state = None
+        self._state_lock = threading.Lock()
+
+        # Covariances de l'univers : une séance doit être complète, elles sont mises à
+        # jour une fois tous les lots transformés
+        self.covariance_config = dict(config.get('covariance', {}))
+        self.covariance_path = os.path.join(BASE_DIR, self.covariance_config.pop('state', 'data/state/covariance.npz'))
+        self.snapshot_dir = os.path.join(BASE_DIR, self.covariance_config.pop('snapshots', 'data/snapshots/covariance'))
+        self._closes = []
+
+    def extract(self, symbols):
+        """Étape d'extraction : nouvelles barres d'un lot de symboles"""
+        return self.extractor.get_incremental_data(
+            symbols,
+            overlap_days=self.config.get('overlap_days'),
+            initial_period=self.config.get('initial_period', 'max')
+        )
+
+    def transform(self, prices):
+        """Étape de transformation : validation, nettoyage puis mise à jour de l'état des indicateurs"""
+        result = self.validator.validate(prices)
+        self.validator.save_quarantine(result, self.SOURCE)
+        # Un exécuteur par lot : ses `failures` ne sont pas partagées entre workers
+        prices = clean(result.valid, executor=ShardedExecutor(**self.cleaning_config))
+        # L'état glissant est partagé : ses mises à jour sont sérialisées
+        with self._state_lock:
+            indicators = self.state.update(prices)
+        return prices, indicators
+
+    def load(self, frames):
+        """Étape de chargement : cours bruts puis indicateurs, par COPY"""
+        prices, indicators = frames
+        if not prices.empty:
+            # Premier passage ou backfill : partitions des séances antérieures au mois courant
+            self.maintenance.ensure_partitions(prices['date'].min(), self.TABLES)
+        self.loader.load('raw.stock_prices', prices, source=self.SOURCE)
+        if indicators is not None and not indicators.empty:
+            self.loader.load('processed.stock_metrics', indicators)
+        # Seules les clôtures d'un lot entièrement chargé alimentent les covariances
+        with self._state_lock:
+            self._closes.append(prices[['symbol', 'date', 'close']])
+
+    def run(self, symbols=None):
+        """
+        Exécute le job
+
+        Args:
+            symbols (list, optional): Symboles à traiter. Par défaut, ceux de la configuration
+
+        Returns:
+            dict: Statistiques par étape
+
+        Raises:
+            JobFailed: Si au moins un lot a échoué
+        """
+        symbols = list(symbols or self.config.get('symbols', []))
+        batch_size = self.config.get('batch_size', 5)
+        batches = [symbols[i:i + batch_size] for i in range(0, len(symbols), batch_size)]
+        workers = self.config.get('workers', {})
+
+        self.maintenance = maintenance = DatabaseMaintenance(config_path=DB_CONFIG_PATH, env=self.env)
+        maintenance.create_partitions()
+        self.state = self._load_state(symbols)
+
+        self.pipeline = Pipeline([
+            Stage('extract', self.extract, workers=workers.get('extract', 4)),
+            Stage('transform', self.transform, workers=workers.get('transform', 2)),
+            Stage('load', self.load, workers=workers.get('load', 2))
+        ], queue_size=self.config.get('queue_size', 4), fail_fast=self.config.get('fail_fast', False))
+
+        try:
+            with metrics.stage('daily_etl', symbols=len(symbols)):
+                stats = self.pipeline.run(batches)
+                # Les lots chargés sont visibles dans les vues et agrégats, même si d'autres ont échoué
+                touched = self.loader.touched.get('raw.stock_prices', {})
+                maintenance.refresh_analytics(touched)
+                maintenance.refresh_rollups(touched)
+                if self.pipeline.errors:
+                    # Ni l'état des indicateurs ni les covariances ne sont sauvegardés : ils
+                    # intégreraient des barres absentes de la base. Le prochain passage repart
+                    # du dernier état complet et relit ces séances (overlap_days)
+                    raise JobFailed(self.pipeline.errors)
+                self.state.save(self.state_path)
+                self._update_covariance(symbols)
+            logger.info(f"Job quotidien terminé: {stats}")
+            return stats
+        finally:
+            _export_metrics(self.config)
+            maintenance.close()
+            self.db.close()
+
+    def cancel(self):
+        """Annule le job en cours"""
+        pipeline = getattr(self, 'pipeline', None)
+        if pipeline is not None:
+            pipeline.cancel()
+
+    def _load_state(self, symbols):
+        state = IndicatorState.load(self.state_path) if os.path.exists(self.state_path) else IndicatorState()
+
+        # Symboles absents de l'état (premier passage, nouvel univers) : l'extraction ne
+        # télécharge que les séances postérieures au watermark de raw.stock_prices, l'état
+        # est donc reconstruit à partir de la même table, et non de la zone brute locale
+        known = set(state.symbols)
+        missing = [symbol for symbol in symbols if symbol not in known]
+        if missing:
+            bars = 0
+            for sessions in self._stored_sessions(missing):
+                state.update(sessions, return_rows=False)
+                bars += len(sessions)
+            if bars:
+                logger.info(f"État des indicateurs reconstruit depuis {bars} barres de raw.stock_prices")
+        return state
+
+    def _update_covariance(self, symbols):
+        # Appelé seulement lorsque tous les lots ont été chargés : une séance partielle
+        # de l'univers fausserait les covariances de façon définitive
+        if os.path.exists(self.covariance_path):
+            covariance = CovarianceState.load(self.covariance_path)
+            if self._closes:
+                covariance.update(pd.concat(self._closes, ignore_index=True))
+        else:
+            # Premier passage : historique de raw.stock_prices, barres du jour comprises
+            covariance = CovarianceState(**self.covariance_config)
+            for sessions in self._stored_sessions(symbols):
+                covariance.update(sessions)
+            if np.isnat(covariance.last_date):
+                return
+        self._closes = []
+
+        covariance.save(self.covariance_path)
+        covariance.save_snapshot(self.snapshot_dir)
+
+    def _stored_sessions(self, symbols):
+        """
+        Clôtures stockées dans raw.stock_prices, par lots de séances complètes
+
+        Le résultat est lu avec un curseur côté serveur, par ordre de date : les lignes
+        de la dernière séance d'un lot sont reportées sur le suivant, pour que chaque
+        séance soit transmise en une fois (exigence de CovarianceState.update).
+
+        Args:
+            symbols (list): Symboles à relire
+
+        Yields:
+            pandas.DataFrame: Colonnes 'symbol', 'date' et 'close' (float)
+        """
+        pending = None
+        for batch in self.db.stream_batches(
+                "SELECT symbol, date, close FROM raw.stock_prices "
+                "WHERE symbol = ANY(%s) AND close IS NOT NULL ORDER BY date",
+                (list(symbols),)):
+            batch = batch.astype({'close': float})
+            if pending is not None:
+                batch = pd.concat([pending, batch], ignore_index=True)
+            last = batch['date'] == batch['date'].iloc[-1]
+            pending = batch[last]
+            if not last.all():
+                yield batch[~last]
+        if pending is not None:
+            yield pending
+
+
+class IntradayJob:
+    """
+    Job intraday : barres par fenêtres, chargement compact et agrégation quotidienne
+
+    Chaque lot de symboles est téléchargé par fenêtres parallèles, chargé dans
+    raw.intraday_bars, puis agrégé en séances (OHLCV et VWAP) en une passe vectorisée.
+    Les séances agrégées complètent raw.stock_prices : une séance absente y est insérée,
+    une séance déjà chargée par le job quotidien ne reçoit que son VWAP.
+    """
+
+    SOURCE = YahooFinanceExtractor.SOURCE
+
+    def __init__(self, config, env='development'):
+        """
+        Args:
+            config (dict): Section 'intraday' de config/pipeline.yml
+            env (str, optional): Environnement de base de données ('development', 'production')
+        """
+        self.config = config
+        self.interval = config.get('interval', '1m')
+        self.env = env
+        self.db = DatabaseConnector(config_path=DB_CONFIG_PATH, env=env)
+        self.extractor = YahooFinanceExtractor(db_connector=self.db)
+        self.loader = PostgresLoader(self.db)
+
+    def extract(self, symbols):
+        """Étape d'extraction : barres intraday d'un lot de symboles depuis le dernier jour stocké"""
+        return self.extractor.get_intraday_data(symbols, interval=self.interval,
+                                                max_workers=self.config.get('window_workers', 8))
+
+    def transform(self, bars):
+        """Étape de transformation : agrégation des barres en séances"""
+        return bars, aggregate_daily(bars)
+
+    def load(self, frames):
+        """Étape de chargement : barres puis séances agrégées, par COPY"""
+        bars, daily = frames
+        if not bars.empty:
+            self.maintenance.ensure_partitions(bars['ts'].min(), ['raw.intraday_bars'])
+        self.loader.load('raw.intraday_bars', bars)
+        if not daily.empty:
+            self.maintenance.ensure_partitions(daily['date'].min(), ['raw.stock_prices'])
+            self.loader.load('raw.stock_prices', daily, source=f"{self.SOURCE}_{self.interval}",
+                             update_columns=['vwap'])
+
+    def run(self, symbols=None):
+        """
+        Exécute le job
+
+        Args:
+            symbols (list, optional): Symboles à traiter. Par défaut, ceux de la configuration
+
+        Returns:
+            dict: Statistiques par étape
+
+        Raises:
+            JobFailed: Si au moins un lot a échoué
+        """
+        symbols = list(symbols or self.config.get('symbols', []))
+        batch_size = self.config.get('batch_size', 20)
+        batches = [symbols[i:i + batch_size] for i in range(0, len(symbols), batch_size)]
+        workers = self.config.get('workers', {})
+
+        self.maintenance = maintenance = DatabaseMaintenance(config_path=DB_CONFIG_PATH, env=self.env)
+        maintenance.create_partitions()
+
+        self.pipeline = Pipeline([
+            Stage('extract', self.extract, workers=workers.get('extract', 2)),
+            Stage('transform', self.transform, workers=workers.get('transform', 1)),
+            Stage('load', self.load, workers=workers.get('load', 2))
+        ], queue_size=self.config.get('queue_size', 2), fail_fast=self.config.get('fail_fast', False))
+
+        try:
+            with metrics.stage('intraday_etl', symbols=len(symbols), interval=self.interval):
+                stats = self.pipeline.run(batches)
+                touched = self.loader.touched.get('raw.stock_prices', {})
+                maintenance.refresh_analytics(touched)
+                maintenance.refresh_rollups(touched)
+                if self.pipeline.errors:
+                    raise JobFailed(self.pipeline.errors)
+            logger.info(f"Job intraday terminé: {stats}")
+            return stats
+        finally:
+            _export_metrics(self.config)
+            maintenance.close()
+            self.db.close()
+
+    def cancel(self):
+        """Annule le job en cours"""
+        pipeline = getattr(self, 'pipeline', None)
+        if pipeline is not None:
+            pipeline.cancel()
+
+
+class MaintenanceJob:
+    """
+    Job de maintenance : partitions à venir, rétention puis nettoyage de la base
+
+    Planifié chaque semaine (DAG weekly_report) : la rétention détache et supprime les
+    partitions expirées, puis cleanup.sql met à jour les statistiques du planificateur.
+    """
+
+    def __init__(self, config, env='development'):
+        """
+        Args:
+            config (dict): Section 'maintenance' de config/pipeline.yml (facultative)
+            env (str, optional): Environnement de base de données ('development', 'production')
+        """
+        self.config = config
+        self.env = env
+
+    def run(self, symbols=None):
+        """
+        Exécute le job
+
+        Args:
+            symbols (list, optional): Ignoré, la maintenance porte sur toutes les tables
+
+        Returns:
+            dict: Partitions créées
+
+        Raises:
+            JobFailed: Si la rétention ou le nettoyage a échoué
+        """
+        maintenance = DatabaseMaintenance(config_path=DB_CONFIG_PATH, env=self.env)
+        try:
+            with metrics.stage('db_maintenance'):
+                created = maintenance.create_partitions()
+                if not maintenance.cleanup_database():
+                    raise JobFailed([('cleanup', RuntimeError("rétention ou cleanup.sql en échec"))])
+            logger.info(f"Maintenance terminée: {len(created)} partitions créées")
+            return {'partitions_created': len(created)}
+        finally:
+            _export_metrics(self.config)
+            maintenance.close()
+
+    def cancel(self):
+        """Aucune étape à interrompre : les opérations de maintenance sont transactionnelles"""
+
+
+def _export_metrics(config):
+    exports = config.get('metrics', {})
+    if exports.get('prometheus'):
+        metrics.export_prometheus(os.path.join(BASE_DIR, exports['prometheus']))
+    if exports.get('jsonl'):
+        metrics.export_jsonl(os.path.join(BASE_DIR, exports['jsonl']))
+
+
+JOBS = {
+    'daily': DailyJob,
+    'intraday': IntradayJob,
+    'maintenance': MaintenanceJob
+}
+
+
+def run_job(mode, config_path=None, env='development', symbols=None):
+    """
+    Exécute un job du pipeline
+
+    Args:
+        mode (str): Job à exécuter (clé de JOBS)
+        config_path (str, optional): Chemin de config/pipeline.yml
+        env (str, optional): Environnement de base de données
+        symbols (list, optional): Symboles à traiter à la place de ceux de la configuration
+
+    Returns:
+        dict: Statistiques par étape
+    """
+    config = load_pipeline_config(config_path, section=mode)
+    if mode == 'intraday' and not config.get('symbols'):
+        # Par défaut, l'univers du job quotidien
+        config['symbols'] = load_pipeline_config(config_path).get('symbols', [])
+    job = JOBS[mode](config, env=env)
+
+    # Arrêt propre sur SIGTERM (arrêt du conteneur) lorsque le job tourne dans le thread principal
+    if threading.current_thread() is threading.main_thread():
+        previous = signal.signal(signal.SIGTERM, lambda signum, frame: job.cancel())
+        try:
+            return job.run(symbols)
+        finally:
+            signal.signal(signal.SIGTERM, previous)
+    return job.run(symbols)
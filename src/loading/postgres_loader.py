@@ -1 +1,159 @@
-# Charge les données dans PostgreSQL
\ No newline at end of file
+import io
+import logging
+import threading
+
+import pandas as pd
+
+from src.loading.postgres_schema import TABLES
+from src.utils.logger import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class PostgresLoader:
+    """
+    Chargement en masse de DataFrames (ou de lots Arrow) dans PostgreSQL
+
+    Chaque lot est copié avec COPY FROM STDIN dans une table de transit temporaire
+    (non journalisée), puis fusionné dans la table cible par un unique
+    INSERT ... ON CONFLICT (symbol, date) DO UPDATE ensembliste.
+    """
+
+    def __init__(self, db_connector, batch_size=100_000):
+        """
+        Args:
+            db_connector (DatabaseConnector): Connecteur à la base de données
+            batch_size (int, optional): Nombre de lignes copiées puis fusionnées par transaction
+        """
+        self.db = db_connector
+        self.batch_size = batch_size
+        # Première date chargée par symbole, pour chaque table : {table: {symbole: date}}.
+        # Permet de ne rafraîchir que les séances touchées (DatabaseMaintenance.refresh_analytics)
+        self.touched = {}
+        self._touched_lock = threading.Lock()
+
+    def load(self, table, data, source=None, update_columns=None):
+        """
+        Charge des données dans une table en mettant à jour les lignes existantes
+
+        Args:
+            table (str): Table cible ('raw.stock_prices', 'raw.intraday_bars',
+                         'processed.stock_metrics', 'analytics.financial_kpis')
+            data: DataFrame, table ou lot Arrow, ou itérable de ces objets
+            source (str, optional): Valeur de la colonne 'source' lorsqu'elle est absente des données
+            update_columns (list, optional): Colonnes mises à jour sur une ligne existante. Par
+                                             défaut, toutes les colonnes hors clé d'unicité. Les
+                                             lignes nouvelles sont toujours insérées en entier
+
+        Returns:
+            int: Nombre de lignes chargées
+        """
+        if table not in TABLES:
+            raise ValueError(f"Table non prise en charge par le chargeur: {table}")
+        spec = TABLES[table]
+
+        staging = f"staging_{table.replace('.', '_')}"
+        total = 0
+
+        # Chaque appel emprunte sa propre connexion : plusieurs chargements peuvent
+        # s'exécuter en parallèle, chacun avec sa table de transit
+        with self.db.get_connection() as connection:
+            try:
+                with connection.cursor() as cursor:
+                    # Table temporaire : propre à la session et jamais écrite dans le WAL
+                    cursor.execute(
+                        f"CREATE TEMP TABLE IF NOT EXISTS {staging} "
+                        f"(LIKE {table} INCLUDING DEFAULTS) ON COMMIT DELETE ROWS"
+                    )
+
+                    for batch in self._iter_batches(data):
+                        frame = self._prepare(batch, spec, source)
+                        if frame.empty:
+                            continue
+                        self._copy(cursor, staging, frame, spec)
+                        cursor.execute(self._upsert_sql(table, staging, spec, update_columns))
+                        connection.commit()
+                        total += len(frame)
+                        self._track(table, frame, spec)
+                        metrics.count(rows_out=len(frame))
+
+            except Exception as e:
+                logger.error(f"Error loading data into {table}: {e}")
+                raise
+
+        logger.info(f"Loaded {total} rows into {table}")
+        return total
+
+    def _track(self, table, frame, spec):
+        column = (spec['date_columns'] or spec['datetime_columns'])[0]
+        first_dates = frame.groupby('symbol', observed=True)[column].min()
+        with self._touched_lock:
+            touched = self.touched.setdefault(table, {})
+            for symbol, day in first_dates.items():
+                day = day.date()
+                if symbol not in touched or day < touched[symbol]:
+                    touched[symbol] = day
+
+    def _iter_batches(self, data):
+        if isinstance(data, pd.DataFrame) or hasattr(data, 'to_pandas'):
+            data = [data]
+        for item in data:
+            frame = item.to_pandas() if hasattr(item, 'to_pandas') else item
+            for start in range(0, len(frame), self.batch_size):
+                yield frame.iloc[start:start + self.batch_size]
+
+    @staticmethod
+    def _prepare(frame, spec, source):
+        columns = spec['columns']
+        frame = frame.reindex(columns=columns)
+
+        if 'source' in columns and source is not None:
+            frame['source'] = frame['source'].fillna(source)
+
+        for col in spec['date_columns']:
+            dates = pd.to_datetime(frame[col])
+            if dates.dt.tz is not None:
+                # Dates localisées (Yahoo Finance) : on conserve la date du marché
+                dates = dates.dt.tz_localize(None)
+            frame[col] = dates.dt.normalize()
+
+        for col in spec['datetime_columns']:
+            # Horodatages stockés en UTC, sans fuseau (TIMESTAMP)
+            frame[col] = pd.to_datetime(frame[col], utc=True).dt.tz_localize(None)
+
+        for col in spec['integer_columns']:
+            frame[col] = pd.to_numeric(frame[col]).round().astype('Int64')
+
+        # Un même lot ne peut pas mettre à jour deux fois la même ligne
+        return frame.drop_duplicates(subset=spec['conflict_columns'], keep='last')
+
+    @staticmethod
+    def _copy(cursor, staging, frame, spec):
+        date_format = '%Y-%m-%d %H:%M:%S' if spec['datetime_columns'] else '%Y-%m-%d'
+        buffer = io.StringIO()
+        frame.to_csv(buffer, index=False, header=False, na_rep='', date_format=date_format)
+        buffer.seek(0)
+        cursor.copy_expert(
+            f"COPY {staging} ({', '.join(frame.columns)}) FROM STDIN WITH (FORMAT csv)",
+            buffer
+        )
+
+    @staticmethod
+    def _upsert_sql(table, staging, spec, update_columns=None):
+        columns = spec['columns']
+        conflict = spec['conflict_columns']
+        updated = [col for col in (update_columns or columns) if col in columns and col not in conflict]
+        # Une colonne préservée n'est remplacée que par une valeur non nulle
+        updates = [f"{col} = COALESCE(EXCLUDED.{col}, target.{col})" if col in spec['preserve_columns']
+                   else f"{col} = EXCLUDED.{col}" for col in updated]
+        if spec['timestamp_column']:
+            updates.append(f"{spec['timestamp_column']} = CURRENT_TIMESTAMP")
+
+        column_list = ', '.join(columns)
+        # Aucune colonne à mettre à jour : les lignes déjà présentes sont conservées
+        action = f"DO UPDATE SET {', '.join(updates)}" if updates else "DO NOTHING"
+        return (
+            f"INSERT INTO {table} AS target ({column_list}) "
+            f"SELECT {column_list} FROM {staging} "
+            f"ON CONFLICT ({', '.join(conflict)}) {action}"
+        )
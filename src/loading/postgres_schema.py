@@ -1 +1,44 @@
 # Définit le schéma de la base de données
+
+# Tables alimentées par le chargeur : colonnes chargées, clé d'unicité utilisée
+# par l'upsert et colonne d'horodatage rafraîchie lors d'une mise à jour.
+# Les colonnes de 'preserve_columns' ne sont pas effacées par un chargement qui ne
+# les fournit pas ; les colonnes de 'datetime_columns' sont chargées en UTC
+TABLES = {
+    'raw.stock_prices': {
+        'columns': ['symbol', 'date', 'open', 'high', 'low', 'close', 'volume', 'vwap', 'source'],
+        'conflict_columns': ['symbol', 'date'],
+        'date_columns': ['date'],
+        'datetime_columns': [],
+        'integer_columns': ['volume'],
+        'preserve_columns': ['vwap'],
+        'timestamp_column': None
+    },
+    'raw.intraday_bars': {
+        'columns': ['symbol', 'ts', 'open', 'high', 'low', 'close', 'volume'],
+        'conflict_columns': ['symbol', 'ts'],
+        'date_columns': [],
+        'datetime_columns': ['ts'],
+        'integer_columns': ['volume'],
+        'preserve_columns': [],
+        'timestamp_column': None
+    },
+    'processed.stock_metrics': {
+        'columns': ['symbol', 'date', 'close', 'ma_20', 'ma_50', 'ma_200', 'rsi', 'volatility'],
+        'conflict_columns': ['symbol', 'date'],
+        'date_columns': ['date'],
+        'datetime_columns': [],
+        'integer_columns': [],
+        'preserve_columns': [],
+        'timestamp_column': 'processed_at'
+    },
+    'analytics.financial_kpis': {
+        'columns': ['symbol', 'sector', 'region', 'date', 'revenue', 'profit_margin', 'risk_score'],
+        'conflict_columns': ['symbol', 'date'],
+        'date_columns': ['date'],
+        'datetime_columns': [],
+        'integer_columns': [],
+        'preserve_columns': [],
+        'timestamp_column': 'updated_at'
+    }
+}
@@ -1 +1,76 @@
-# Nettoyage des données
\ No newline at end of file
+# Nettoyage des données
+import logging
+
+import numpy as np
+import pandas as pd
+
+from src.utils.parallel import ShardedExecutor
+
+logger = logging.getLogger('data_cleaning')
+
+PRICE_COLUMNS = ['open', 'high', 'low', 'close', 'adj_close', 'adjusted_close']
+
+
+def clean_prices(df):
+    """
+    Nettoie les cours d'un ou plusieurs symboles entiers
+
+    - noms de colonnes en minuscules ('Adj Close' -> 'adj_close')
+    - dates ramenées au jour, sans fuseau horaire
+    - doublons (symbole, date) supprimés, la dernière ligne l'emporte
+    - prix non positifs ou infinis remplacés par NaN, lignes sans clôture supprimées
+    - high et low rendus cohérents avec open et close, volumes négatifs remplacés par NaN
+
+    Args:
+        df (pandas.DataFrame): Données avec au moins les colonnes 'symbol', 'date' et 'close'
+
+    Returns:
+        pandas.DataFrame: Données nettoyées, triées par symbole et date
+    """
+    df = df.rename(columns=lambda col: str(col).strip().lower().replace(' ', '_'))
+    df = df.dropna(subset=['symbol', 'date'])
+
+    dates = pd.to_datetime(df['date'])
+    if dates.dt.tz is not None:
+        # Dates localisées (Yahoo Finance) : on conserve la date du marché
+        dates = dates.dt.tz_localize(None)
+    df = df.assign(date=dates.dt.normalize())
+
+    df = df.drop_duplicates(subset=['symbol', 'date'], keep='last')
+
+    prices = [col for col in PRICE_COLUMNS if col in df.columns]
+    # Copie explicite : sur un bloc float64 homogène, to_numpy peut renvoyer une vue
+    # des données de l'appelant, que le masquage ci-dessous modifierait en place
+    values = df[prices].to_numpy(dtype=np.float64, copy=True)
+    values[~np.isfinite(values) | (values <= 0)] = np.nan
+    df = df.assign(**{col: values[:, i] for i, col in enumerate(prices)})
+    df = df[df['close'].notna()]
+
+    if {'open', 'high', 'low'}.issubset(df.columns):
+        bounds = df[['open', 'high', 'low', 'close']]
+        df = df.assign(high=bounds.max(axis=1), low=bounds.min(axis=1))
+
+    if 'volume' in df.columns:
+        volume = pd.to_numeric(df['volume'], errors='coerce')
+        df = df.assign(volume=volume.where(volume >= 0))
+
+    return df.sort_values(['symbol', 'date'], ignore_index=True)
+
+
+def clean(df, executor=None):
+    """
+    Nettoie un univers de symboles en parallèle, par shards de symboles
+
+    Args:
+        df (pandas.DataFrame): Données brutes de prix
+        executor (ShardedExecutor, optional): Exécuteur utilisé. Par défaut, un pool
+                                              de processus sur tous les cœurs
+
+    Returns:
+        pandas.DataFrame: Données nettoyées, triées par symbole et date
+    """
+    executor = executor or ShardedExecutor()
+    result = executor.map(clean_prices, df)
+    logger.info(f"Nettoyage: {len(df)} lignes en entrée, {len(result)} conservées, "
+                f"{len(executor.failures)} symboles en erreur")
+    return result
@@ -1 +1,86 @@
-# Enrichissement avec métadonnées
\ No newline at end of file
+# Enrichissement avec métadonnées
+import logging
+
+import numpy as np
+
+from src.utils.parallel import ShardedExecutor
+
+logger = logging.getLogger('data_enrichment')
+
+METADATA_COLUMNS = ['sector', 'industry', 'region', 'currency']
+
+
+def enrich_prices(df, metadata=None):
+    """
+    Ajoute les mesures dérivées et les métadonnées d'entreprise aux cours de symboles entiers
+
+    Colonnes ajoutées :
+        - daily_return_pct, log_return : rendements d'une séance à l'autre
+        - range_pct : amplitude de la séance (high - low) en % de la clôture
+        - typical_price : (high + low + close) / 3
+        - dollar_volume : close * volume
+        - colonnes de METADATA_COLUMNS présentes dans `metadata`
+
+    Args:
+        df (pandas.DataFrame): Cours nettoyés, triés par symbole et date
+        metadata (pandas.DataFrame, optional): Informations d'entreprise indexées ou
+                                               identifiées par la colonne 'symbol'
+
+    Returns:
+        pandas.DataFrame: Données enrichies
+    """
+    close = df['close'].to_numpy(dtype=np.float64)
+    symbols = df['symbol'].to_numpy()
+
+    # Clôture précédente du même symbole (les lignes sont contiguës par symbole)
+    previous = np.full(len(close), np.nan)
+    if len(close) > 1:
+        same_symbol = symbols[1:] == symbols[:-1]
+        previous[1:] = np.where(same_symbol, close[:-1], np.nan)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        columns = {
+            'daily_return_pct': (close - previous) / previous * 100,
+            'log_return': np.log(close / previous)
+        }
+        if {'high', 'low'}.issubset(df.columns):
+            high = df['high'].to_numpy(dtype=np.float64)
+            low = df['low'].to_numpy(dtype=np.float64)
+            columns['range_pct'] = (high - low) / close * 100
+            columns['typical_price'] = (high + low + close) / 3
+        if 'volume' in df.columns:
+            columns['dollar_volume'] = close * df['volume'].to_numpy(dtype=np.float64)
+
+    df = df.assign(**columns)
+
+    if metadata is not None and not metadata.empty:
+        if 'symbol' in metadata.columns:
+            metadata = metadata.set_index('symbol')
+        extra = [col for col in METADATA_COLUMNS if col in metadata.columns and col not in df.columns]
+        if extra:
+            df = df.join(metadata[extra], on='symbol')
+
+    return df
+
+
+def enrich(df, metadata=None, executor=None):
+    """
+    Enrichit un univers de symboles en parallèle, par shards de symboles
+
+    Aucun job ne l'appelle : les colonnes ajoutées n'ont pas de table cible
+    (raw.stock_prices et processed.stock_metrics ont un schéma fixe). Il sert aux
+    analyses ponctuelles et au benchmark, sur des cours nettoyés par `clean`.
+
+    Args:
+        df (pandas.DataFrame): Cours nettoyés (voir data_cleaning.clean)
+        metadata (pandas.DataFrame, optional): Informations d'entreprise par symbole
+        executor (ShardedExecutor, optional): Exécuteur utilisé. Par défaut, un pool
+                                              de processus sur tous les cœurs
+
+    Returns:
+        pandas.DataFrame: Données enrichies
+    """
+    executor = executor or ShardedExecutor()
+    result = executor.map(enrich_prices, df, metadata=metadata)
+    logger.info(f"Enrichissement: {len(result)} lignes, {len(executor.failures)} symboles en erreur")
+    return result
@@ -1 +1,282 @@
 # Fusion des dataframes
+import logging
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger('data_integration')
+
+# Champs comparés entre sources (cours ajustés)
+PRICE_FIELDS = ('open', 'high', 'low', 'close')
+
+# Colonnes de la série de référence
+GOLDEN_FIELDS = ('open', 'high', 'low', 'close', 'volume', 'dividend', 'split_coefficient')
+
+
+def normalize_yahoo(df):
+    """
+    Ramène des cours Yahoo Finance au format commun
+
+    Les cours de yfinance sont déjà ajustés (auto_adjust) : ils sont repris tels quels.
+
+    Args:
+        df (pandas.DataFrame): Sortie de YahooFinanceExtractor (symbol, date, open, high, low, close, volume)
+
+    Returns:
+        pandas.DataFrame: Colonnes 'symbol', 'date' et champs de GOLDEN_FIELDS disponibles
+    """
+    return df[['symbol', 'date'] + [col for col in GOLDEN_FIELDS if col in df.columns]]
+
+
+def normalize_alpha_vantage(df):
+    """
+    Ramène des cours Alpha Vantage (TIME_SERIES_DAILY_ADJUSTED) au format commun
+
+    Les cours bruts sont ajustés par le rapport adjusted_close / close, pour être
+    comparables aux cours ajustés de Yahoo Finance.
+
+    Args:
+        df (pandas.DataFrame): Sortie de AlphaVantageExtractor.get_daily_adjusted
+
+    Returns:
+        pandas.DataFrame: Colonnes 'symbol', 'date' et champs de GOLDEN_FIELDS disponibles
+    """
+    close = df['close'].to_numpy(dtype=np.float64)
+    adjusted = df['adjusted_close'].to_numpy(dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        factor = np.where(close > 0, adjusted / close, np.nan)
+
+    result = {'symbol': df['symbol'], 'date': df['date']}
+    for col in ('open', 'high', 'low'):
+        result[col] = df[col].to_numpy(dtype=np.float64) * factor
+    result['close'] = adjusted
+    for col in ('volume', 'dividend', 'split_coefficient'):
+        if col in df.columns:
+            result[col] = df[col]
+    return pd.DataFrame(result)
+
+
+SOURCE_ADAPTERS = {
+    'yahoo_finance': normalize_yahoo,
+    'alpha_vantage': normalize_alpha_vantage
+}
+
+
+class ReconciliationResult:
+    """
+    Résultat d'un rapprochement : série de référence, écarts et synthèse
+    """
+
+    def __init__(self, golden, discrepancies, summary):
+        """
+        Args:
+            golden (pandas.DataFrame): Une ligne par (symbole, date), triée, avec la source retenue
+            discrepancies (pandas.DataFrame): Un écart hors tolérance par ligne
+            summary (dict): Couverture par source et nombre d'écarts par champ
+        """
+        self.golden = golden
+        self.discrepancies = discrepancies
+        self.summary = summary
+
+
+class _SortedSource:
+    # Clés (symbole, date) triées et valeurs d'une source, alignables par recherche dichotomique
+    def __init__(self, name, df, days, symbols, first_day, span):
+        self.name = name
+        # Factorisation locale puis correspondance des seuls symboles distincts
+        local_codes, uniques = pd.factorize(df['symbol'])
+        codes = symbols.get_indexer(uniques)[local_codes]
+        keys = codes.astype(np.int64) * span + (days.astype(np.int64) - first_day)
+
+        n = len(keys)
+        if n and not np.all(keys[1:] >= keys[:-1]):
+            # La position départage les doublons, dont seule la dernière occurrence est gardée
+            order = np.argsort(keys * n + np.arange(n), kind='quicksort')
+        else:
+            order = np.arange(n)
+        keys = keys[order]
+        last = np.ones(n, dtype=bool)
+        if n:
+            last[:-1] = keys[:-1] != keys[1:]
+        self.order = order[last]
+        self.keys = keys[last]
+        self.df = df
+
+    def align(self, keys):
+        """Position de chaque clé dans la source (-1 si absente)"""
+        if not len(self.keys):
+            return np.full(len(keys), -1, dtype=np.int64)
+        positions = np.minimum(np.searchsorted(self.keys, keys), len(self.keys) - 1)
+        return np.where(self.keys[positions] == keys, positions, -1)
+
+    def values(self, column, positions):
+        """Valeurs d'une colonne aux positions alignées (NaN si absente)"""
+        out = np.full(len(positions), np.nan)
+        if column not in self.df.columns:
+            return out
+        data = pd.to_numeric(self.df[column], errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+        present = positions >= 0
+        out[present] = data[self.order[positions[present]]]
+        return out
+
+
+class SourceReconciler:
+    """
+    Rapproche les cours de plusieurs sources par fusion de tableaux triés
+
+    Chaque source est ramenée au format commun (SOURCE_ADAPTERS), puis ses clés
+    (symbole, date) sont codées en entiers et triées une fois. Les clés de toutes
+    les sources sont fusionnées et chaque source y est alignée par recherche
+    dichotomique : seuls des tableaux numpy d'une colonne sont manipulés, sans
+    fusion externe pandas des DataFrames complets.
+
+    Pour chaque champ, la série de référence prend la valeur de la source la plus
+    prioritaire qui la fournit. Une autre source dont la valeur s'en écarte de plus
+    de la tolérance produit une ligne d'écart.
+
+    Le rapprochement est un outil de bibliothèque, hors des jobs planifiés : le job
+    quotidien n'extrait que Yahoo Finance, et le quota d'Alpha Vantage ne permet pas
+    de télécharger tout l'univers chaque jour. Il s'utilise ponctuellement, pour
+    auditer une source ou construire une référence :
+
+        reconciler = SourceReconciler()
+        result = reconciler.reconcile({'alpha_vantage': av_prices, 'yahoo_finance': yahoo_prices})
+    """
+
+    DEFAULT_TOLERANCES = dict.fromkeys(PRICE_FIELDS, 0.005)
+
+    def __init__(self, priority=('alpha_vantage', 'yahoo_finance'), tolerances=None, abs_tolerance=0.01,
+                 on_conflict='priority'):
+        """
+        Args:
+            priority (tuple, optional): Sources par ordre de priorité décroissante
+            tolerances (dict, optional): Écart relatif toléré par champ comparé. Par défaut,
+                                         DEFAULT_TOLERANCES (0,5 % sur les prix)
+            abs_tolerance (float, optional): Écart absolu toujours toléré (arrondi au centime)
+            on_conflict (str, optional): 'priority' (la source prioritaire l'emporte) ou
+                                         'exclude' (la ligne en conflit est retirée de la référence)
+        """
+        if on_conflict not in ('priority', 'exclude'):
+            raise ValueError(f"Règle de conflit inconnue: {on_conflict}")
+        self.priority = list(priority)
+        self.tolerances = dict(tolerances if tolerances is not None else self.DEFAULT_TOLERANCES)
+        self.abs_tolerance = abs_tolerance
+        self.on_conflict = on_conflict
+
+    def reconcile(self, frames):
+        """
+        Construit la série de référence à partir des données de chaque source
+
+        Args:
+            frames (dict): {source: DataFrame} au format de l'extracteur de chaque source
+
+        Returns:
+            ReconciliationResult: Série de référence, écarts et synthèse
+        """
+        unknown = [name for name in frames if name not in self.priority]
+        if unknown:
+            raise ValueError(f"Sources absentes de la priorité: {unknown}")
+        names = [name for name in self.priority if frames.get(name) is not None and len(frames[name])]
+        if not names:
+            raise ValueError("Aucune donnée à rapprocher")
+        normalized = {name: SOURCE_ADAPTERS.get(name, normalize_yahoo)(frames[name]) for name in names}
+
+        # Dictionnaire commun des symboles et plage des dates, pour coder les clés en entiers
+        normalized = {name: df[df['symbol'].notna() & df['date'].notna()] for name, df in normalized.items()}
+        days = {name: _to_days(df['date']) for name, df in normalized.items()}
+        symbols = pd.Index(pd.unique(np.concatenate([df['symbol'].unique() for df in normalized.values()])))
+        first_day = min(int(values.min().astype(np.int64)) for values in days.values() if len(values))
+        span = max(int(values.max().astype(np.int64)) for values in days.values() if len(values)) - first_day + 1
+
+        sources = [_SortedSource(name, df, days[name], symbols, first_day, span) for name, df in normalized.items()]
+
+        # Fusion des clés triées : le tri stable repère les séquences déjà triées (fusion linéaire)
+        keys = np.sort(np.concatenate([source.keys for source in sources]), kind='stable')
+        if len(keys):
+            keys = keys[np.concatenate([[True], keys[1:] != keys[:-1]])]
+        positions = [source.align(keys) for source in sources]
+        n_sources = np.sum([pos >= 0 for pos in positions], axis=0)
+
+        columns = {}
+        chosen = np.full(len(keys), -1, dtype=np.int64)
+        conflict = np.zeros(len(keys), dtype=bool)
+        reports = []
+        conflicts = {}
+        for field in GOLDEN_FIELDS:
+            candidates = [source.values(field, pos) for source, pos in zip(sources, positions)]
+            value = np.full(len(keys), np.nan)
+            origin = np.full(len(keys), -1, dtype=np.int64)
+            for rank, candidate in enumerate(candidates):
+                take = np.isnan(value) & ~np.isnan(candidate)
+                value[take] = candidate[take]
+                origin[take] = rank
+            columns[field] = value
+            if field == 'close':
+                chosen = origin
+
+            tolerance = self.tolerances.get(field)
+            if tolerance is None:
+                continue
+            conflicts[field] = 0
+            for rank, candidate in enumerate(candidates):
+                with np.errstate(invalid='ignore'):
+                    gap = np.abs(candidate - value)
+                    off = (origin != rank) & (gap > np.maximum(self.abs_tolerance, tolerance * np.abs(value)))
+                rows = np.flatnonzero(off)
+                if not len(rows):
+                    continue
+                conflict[rows] = True
+                conflicts[field] += len(rows)
+                reports.append(pd.DataFrame({
+                    'key': keys[rows],
+                    'field': field,
+                    'source': sources[rank].name,
+                    'value': candidate[rows],
+                    'reference_source': np.asarray(names, dtype=object)[origin[rows]],
+                    'reference_value': value[rows],
+                    'relative_gap': gap[rows] / np.abs(value[rows])
+                }))
+
+        golden = pd.DataFrame({
+            'symbol': pd.Categorical.from_codes(keys // span, symbols),
+            'date': (keys % span + first_day).astype('datetime64[D]').astype('datetime64[ns]'),
+            **columns,
+            'source': pd.Categorical.from_codes(chosen, names),
+            'n_sources': n_sources,
+            'conflict': conflict
+        })
+        if self.on_conflict == 'exclude':
+            golden = golden[~conflict].reset_index(drop=True)
+
+        discrepancies = self._report(reports, symbols, span, first_day)
+        summary = {
+            'rows': len(keys),
+            'sources': {source.name: len(source.keys) for source in sources},
+            'only_in': {source.name: int(np.sum((pos >= 0) & (n_sources == 1)))
+                        for source, pos in zip(sources, positions)},
+            'conflicts': conflicts,
+            'conflicting_rows': int(conflict.sum())
+        }
+        logger.info(f"Rapprochement: {len(keys)} séances, {summary['conflicting_rows']} en conflit, "
+                    f"couverture {summary['sources']}")
+        return ReconciliationResult(golden, discrepancies, summary)
+
+    @staticmethod
+    def _report(reports, symbols, span, first_day):
+        columns = ['symbol', 'date', 'field', 'source', 'value', 'reference_source', 'reference_value',
+                   'relative_gap']
+        if not reports:
+            return pd.DataFrame(columns=columns)
+        report = pd.concat(reports, ignore_index=True)
+        keys = report.pop('key').to_numpy()
+        report.insert(0, 'symbol', pd.Categorical.from_codes(keys // span, symbols))
+        report.insert(1, 'date', (keys % span + first_day).astype('datetime64[D]').astype('datetime64[ns]'))
+        return report.sort_values(['symbol', 'date', 'field'], ignore_index=True)[columns]
+
+
+def _to_days(dates):
+    dates = pd.to_datetime(dates)
+    if dates.dt.tz is not None:
+        # Dates localisées (Yahoo Finance) : on conserve la date du marché
+        dates = dates.dt.tz_localize(None)
+    return dates.to_numpy(dtype='datetime64[ns]').astype('datetime64[D]')
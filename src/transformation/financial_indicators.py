@@ -1,3 +1,516 @@
 # Calcule les indicateurs financiers
+import os
+import logging
 
+import numpy as np
+import pandas as pd
 
+logger = logging.getLogger('financial_indicators')
+
+# Colonnes de la table processed.stock_metrics alimentées par le moteur
+STOCK_METRICS_COLUMNS = ['symbol', 'date', 'close', 'ma_20', 'ma_50', 'ma_200', 'rsi', 'volatility']
+
+
+class FinancialIndicators:
+    """
+    Moteur vectorisé de calcul des indicateurs techniques pour tout un univers de symboles
+
+    Les séries de clôture sont empilées dans une matrice (symbole × rang de la séance)
+    traitée par blocs de symboles : toutes les opérations sont vectorisées sur le bloc,
+    sans boucle par symbole ni `apply` ligne à ligne.
+
+    Les fenêtres sont exprimées en nombre de séances, comme les fenêtres
+    `ROWS BETWEEN n PRECEDING AND CURRENT ROW` des vues SQL :
+        - ma_20, ma_50, ma_200 : moyennes mobiles simples (fenêtres partielles en début d'historique)
+        - rsi : RSI de Wilder sur 14 séances
+        - volatility : écart-type (échantillon) des rendements quotidiens en % sur 20 séances,
+          identique à volatility_20d de analytics.volatility_analysis
+    """
+
+    def __init__(self, ma_windows=(20, 50, 200), rsi_period=14, volatility_window=20, block_cells=4_000_000):
+        """
+        Args:
+            ma_windows (tuple, optional): Fenêtres des moyennes mobiles
+            rsi_period (int, optional): Période du RSI
+            volatility_window (int, optional): Fenêtre de la volatilité
+            block_cells (int, optional): Nombre de cellules de la matrice traitée en une fois,
+                                         qui borne la mémoire de travail
+        """
+        self.ma_windows = tuple(ma_windows)
+        self.rsi_period = rsi_period
+        self.volatility_window = volatility_window
+        self.block_cells = block_cells
+
+    def compute(self, df, include_returns=False):
+        """
+        Calcule les indicateurs pour tous les symboles d'un DataFrame de prix
+
+        Args:
+            df (pandas.DataFrame): Données avec au moins les colonnes 'symbol', 'date' et 'close'
+            include_returns (bool, optional): Ajouter la colonne 'daily_return_pct'
+
+        Returns:
+            pandas.DataFrame: Lignes au format de processed.stock_metrics, triées par symbole et date
+        """
+        if df is None or df.empty:
+            return pd.DataFrame(columns=STOCK_METRICS_COLUMNS)
+
+        codes, symbols = pd.factorize(df['symbol'], sort=True)
+        dates = pd.to_datetime(df['date'])
+        if dates.dt.tz is not None:
+            # Dates localisées (Yahoo Finance) : on conserve la date du marché
+            dates = dates.dt.tz_localize(None)
+        dates = dates.to_numpy()
+        order = np.lexsort((dates, codes))
+
+        codes = codes[order]
+        close = df['close'].to_numpy(dtype=np.float64)[order]
+        offsets = np.searchsorted(codes, np.arange(len(symbols) + 1))
+
+        fields = self.metric_fields + (['daily_return_pct'] if include_returns else [])
+        indicators = self.compute_arrays(close, offsets, fields=fields)
+
+        result = pd.DataFrame({
+            'symbol': pd.Categorical.from_codes(codes, categories=symbols),
+            'date': dates[order],
+            'close': close
+        })
+        for window in self.ma_windows:
+            result[f"ma_{window}"] = indicators[f"ma_{window}"]
+        result['rsi'] = indicators['rsi']
+        result['volatility'] = indicators['volatility']
+        if include_returns:
+            result['daily_return_pct'] = indicators['daily_return_pct']
+
+        logger.info(f"Indicateurs calculés pour {len(symbols)} symboles ({len(result)} lignes)")
+        return result
+
+    @property
+    def metric_fields(self):
+        """Indicateurs correspondant aux colonnes de processed.stock_metrics"""
+        return [f"ma_{window}" for window in self.ma_windows] + ['rsi', 'volatility']
+
+    def compute_arrays(self, close, offsets, fields=None):
+        """
+        Calcule les indicateurs sur des clôtures déjà triées par symbole puis par date
+
+        Args:
+            close (numpy.ndarray): Clôtures, contiguës par symbole
+            offsets (numpy.ndarray): Bornes des symboles (le symbole i occupe close[offsets[i]:offsets[i+1]])
+            fields (list, optional): Indicateurs à restituer parmi 'ma_<n>', 'rsi', 'volatility',
+                                     'daily_return_pct', 'avg_gain' et 'avg_loss' (moyennes lissées
+                                     du RSI). Par défaut, les colonnes de processed.stock_metrics
+
+        Returns:
+            dict: Tableaux alignés sur `close`, un par indicateur demandé
+        """
+        close = np.asarray(close, dtype=np.float64)
+        offsets = np.asarray(offsets, dtype=np.int64)
+        out = {name: np.full(len(close), np.nan) for name in (fields or self.metric_fields)}
+
+        lengths = np.diff(offsets)
+        n_symbols = len(lengths)
+        start = 0
+        while start < n_symbols:
+            # Bloc de symboles dont la matrice reste sous block_cells cellules
+            stop = start + 1
+            width = max(int(lengths[start]), 1)
+            while stop < n_symbols and (stop - start + 1) * max(width, int(lengths[stop])) <= self.block_cells:
+                width = max(width, int(lengths[stop]))
+                stop += 1
+            self._compute_block(close, offsets, start, stop, width, out)
+            start = stop
+
+        return out
+
+    def _compute_block(self, close, offsets, start, stop, width, out):
+        row_start, row_stop = offsets[start], offsets[stop]
+        if row_stop == row_start:
+            return
+
+        # Matrice (symbole × rang de la séance) complétée par des NaN : parcourue ligne
+        # par ligne, la partie valide suit exactement l'ordre des lignes d'entrée
+        lengths = np.diff(offsets[start:stop + 1])
+        valid = np.arange(width) < lengths[:, None]
+
+        prices = np.full((stop - start, width), np.nan)
+        prices[valid] = close[row_start:row_stop]
+
+        def scatter(name, grid):
+            out[name][row_start:row_stop] = grid[valid]
+
+        # Moyennes mobiles : sommes cumulées par ligne (les valeurs manquantes sont ignorées)
+        windows = [window for window in self.ma_windows if f"ma_{window}" in out]
+        for window, means in _rolling_means(prices, windows).items():
+            scatter(f"ma_{window}", means)
+
+        if not {'daily_return_pct', 'volatility', 'rsi', 'avg_gain', 'avg_loss'} & out.keys():
+            return
+
+        # Rendements quotidiens en %, calculés sur les clôtures propagées
+        filled = _forward_fill(prices)
+        returns = np.full_like(prices, np.nan)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            returns[:, 1:] = (filled[:, 1:] - filled[:, :-1]) / np.where(filled[:, :-1] == 0, np.nan, filled[:, :-1]) * 100
+        if 'daily_return_pct' in out:
+            scatter('daily_return_pct', returns)
+        if 'volatility' in out:
+            scatter('volatility', _rolling_std(returns, self.volatility_window))
+
+        if {'rsi', 'avg_gain', 'avg_loss'} & out.keys():
+            avg_gain, avg_loss = _wilder_averages(filled, self.rsi_period)
+            if 'rsi' in out:
+                scatter('rsi', rsi_from_averages(avg_gain, avg_loss))
+            if 'avg_gain' in out:
+                scatter('avg_gain', avg_gain)
+            if 'avg_loss' in out:
+                scatter('avg_loss', avg_loss)
+
+
+class IndicatorState:
+    """
+    État glissant des indicateurs, mis à jour séance par séance sans relire l'historique
+
+    Pour chaque symbole sont conservés les 200 dernières clôtures (tampon circulaire),
+    les sommes glissantes des moyennes mobiles, les 20 derniers rendements et leurs
+    sommes, ainsi que les moyennes lissées des hausses et des baisses du RSI. Chaque
+    nouvelle barre met à jour ces valeurs en O(1) par symbole, avec les mêmes
+    définitions que FinancialIndicators.
+
+    Les barres antérieures ou égales à la dernière date traitée d'un symbole sont
+    ignorées : une correction d'historique nécessite de reconstruire l'état avec
+    `from_history`.
+    """
+
+    def __init__(self, ma_windows=(20, 50, 200), rsi_period=14, volatility_window=20):
+        """
+        Args:
+            ma_windows (tuple, optional): Fenêtres des moyennes mobiles
+            rsi_period (int, optional): Période du RSI
+            volatility_window (int, optional): Fenêtre de la volatilité
+        """
+        self.ma_windows = np.asarray(ma_windows, dtype=np.int64)
+        self.rsi_period = rsi_period
+        self.volatility_window = volatility_window
+        self.capacity = int(self.ma_windows.max())
+
+        self.symbols = []
+        self._index = {}
+        self._allocate(0)
+
+    @classmethod
+    def from_history(cls, df, **kwargs):
+        """
+        Construit l'état à partir d'un historique complet de prix
+
+        Args:
+            df (pandas.DataFrame): Données avec les colonnes 'symbol', 'date' et 'close'
+            **kwargs: Paramètres des indicateurs (voir __init__)
+
+        Returns:
+            IndicatorState: État positionné sur la dernière séance de chaque symbole
+        """
+        state = cls(**kwargs)
+        state.update(df, return_rows=False)
+        return state
+
+    def update(self, df, return_rows=True):
+        """
+        Intègre de nouvelles barres et calcule les indicateurs correspondants
+
+        Args:
+            df (pandas.DataFrame): Nouvelles barres avec les colonnes 'symbol', 'date' et 'close'
+            return_rows (bool, optional): Construire les lignes de processed.stock_metrics
+
+        Returns:
+            pandas.DataFrame: Nouvelles lignes au format de processed.stock_metrics
+                              (None si return_rows vaut False)
+        """
+        bars = df[['symbol', 'date', 'close']].dropna(subset=['close']).copy()
+        dates = pd.to_datetime(bars['date'])
+        if dates.dt.tz is not None:
+            dates = dates.dt.tz_localize(None)
+        bars['date'] = dates.dt.normalize().to_numpy().astype('datetime64[D]')
+        bars = bars.drop_duplicates(subset=['symbol', 'date'], keep='last')
+
+        self._register(bars['symbol'].unique())
+        idx = bars['symbol'].map(self._index).to_numpy(dtype=np.int64)
+        day = bars['date'].to_numpy()
+        close = bars['close'].to_numpy(dtype=np.float64)
+
+        # Ignorer les séances déjà intégrées
+        last_date = self.last_date[idx]
+        fresh = np.isnat(last_date) | (day > last_date)
+        idx, day, close = idx[fresh], day[fresh], close[fresh]
+
+        order = np.argsort(day, kind='stable')
+        idx, day, close = idx[order], day[order], close[order]
+
+        columns = {name: np.full(len(idx), np.nan) for name in self._metric_names()}
+        bounds = np.flatnonzero(np.diff(day.astype(np.int64))) + 1
+        for rows in np.split(np.arange(len(idx)), bounds):
+            if len(rows):
+                metrics = self._step(idx[rows], close[rows], day[rows[0]])
+                if return_rows:
+                    for name, values in metrics.items():
+                        columns[name][rows] = values
+
+        logger.info(f"État des indicateurs mis à jour: {len(idx)} nouvelles barres, {len(self.symbols)} symboles")
+        if not return_rows:
+            return None
+
+        result = pd.DataFrame({
+            'symbol': np.asarray(self.symbols, dtype=object)[idx],
+            'date': day,
+            'close': close
+        })
+        for name, values in columns.items():
+            result[name] = values
+        return result.sort_values(['symbol', 'date'], ignore_index=True)[STOCK_METRICS_COLUMNS]
+
+    def save(self, path):
+        """
+        Sauvegarde l'état dans un fichier .npz
+
+        Args:
+            path (str): Chemin du fichier
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.tmp.npz"
+        np.savez_compressed(
+            tmp_path,
+            symbols=np.asarray(self.symbols, dtype=str),
+            ma_windows=self.ma_windows,
+            params=np.array([self.rsi_period, self.volatility_window]),
+            **{name: getattr(self, name) for name in self._ARRAYS}
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Charge un état sauvegardé par `save`
+
+        Args:
+            path (str): Chemin du fichier
+
+        Returns:
+            IndicatorState: État restauré
+        """
+        with np.load(path) as data:
+            rsi_period, volatility_window = data['params'].tolist()
+            state = cls(ma_windows=tuple(data['ma_windows']), rsi_period=rsi_period,
+                        volatility_window=volatility_window)
+            state.symbols = data['symbols'].tolist()
+            state._index = {symbol: i for i, symbol in enumerate(state.symbols)}
+            for name in cls._ARRAYS:
+                setattr(state, name, data[name])
+        state._resync_sums()
+        return state
+
+    _ARRAYS = ('last_date', 'last_close', 'closes', 'close_count', 'ma_sums',
+               'returns', 'return_count', 'return_sums', 'return_squares',
+               'delta_count', 'avg_gain', 'avg_loss')
+
+    def _metric_names(self):
+        return [f"ma_{window}" for window in self.ma_windows] + ['rsi', 'volatility']
+
+    def _allocate(self, n):
+        self.last_date = np.full(n, np.datetime64('NaT'), dtype='datetime64[D]')
+        self.last_close = np.full(n, np.nan)
+        self.closes = np.zeros((n, self.capacity))
+        self.close_count = np.zeros(n, dtype=np.int64)
+        self.ma_sums = np.zeros((n, len(self.ma_windows)))
+        self.returns = np.zeros((n, self.volatility_window))
+        self.return_count = np.zeros(n, dtype=np.int64)
+        self.return_sums = np.zeros(n)
+        self.return_squares = np.zeros(n)
+        self.delta_count = np.zeros(n, dtype=np.int64)
+        self.avg_gain = np.zeros(n)
+        self.avg_loss = np.zeros(n)
+
+    def _register(self, symbols):
+        new_symbols = [symbol for symbol in symbols if symbol not in self._index]
+        if not new_symbols:
+            return
+        previous = {name: getattr(self, name) for name in self._ARRAYS}
+        n_old = len(self.symbols)
+        self._allocate(n_old + len(new_symbols))
+        for name, values in previous.items():
+            getattr(self, name)[:n_old] = values
+        for symbol in new_symbols:
+            self._index[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+
+    def _step(self, idx, close, day):
+        # Moyennes mobiles : la valeur qui sort de chaque fenêtre est lue dans le tampon circulaire
+        count = self.close_count[idx]
+        for k, window in enumerate(self.ma_windows):
+            leaving = np.where(count >= window, self.closes[idx, (count - window) % self.capacity], 0.0)
+            self.ma_sums[idx, k] += close - leaving
+        self.closes[idx, count % self.capacity] = close
+        count = count + 1
+        self.close_count[idx] = count
+        metrics = {f"ma_{window}": self.ma_sums[idx, k] / np.minimum(count, window)
+                   for k, window in enumerate(self.ma_windows)}
+
+        # Rendement et variation par rapport à la clôture précédente
+        previous = self.last_close[idx]
+        self.last_close[idx] = close
+        self.last_date[idx] = day
+        has_previous = ~np.isnan(previous)
+        metrics['rsi'] = np.full(len(idx), np.nan)
+        metrics['volatility'] = np.full(len(idx), np.nan)
+        if not has_previous.any():
+            return metrics
+
+        rows = np.flatnonzero(has_previous)
+        i = idx[rows]
+        delta = close[rows] - previous[rows]
+
+        # Volatilité : sommes glissantes des rendements sur le tampon de volatility_window valeurs
+        window = self.volatility_window
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ret = np.where(previous[rows] == 0, np.nan, delta / previous[rows] * 100)
+        valid = ~np.isnan(ret)
+        i_ret, ret = i[valid], ret[valid]
+        n_ret = self.return_count[i_ret]
+        leaving = np.where(n_ret >= window, self.returns[i_ret, n_ret % window], 0.0)
+        self.return_sums[i_ret] += ret - leaving
+        self.return_squares[i_ret] += ret * ret - leaving * leaving
+        self.returns[i_ret, n_ret % window] = ret
+        self.return_count[i_ret] = n_ret + 1
+
+        n = np.minimum(self.return_count[i], window).astype(np.float64)
+        sums, squares = self.return_sums[i], self.return_squares[i]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            variance = (squares - sums * sums / n) / (n - 1)
+        metrics['volatility'][rows] = np.where(n > 1, np.sqrt(np.maximum(variance, 0.0)), np.nan)
+
+        # RSI : cumul des premières variations, puis lissage de Wilder
+        period = self.rsi_period
+        gain = np.maximum(delta, 0.0)
+        loss = np.maximum(-delta, 0.0)
+        deltas = self.delta_count[i]
+        seeding = deltas < period
+        avg_gain = np.where(seeding, self.avg_gain[i] + gain, (self.avg_gain[i] * (period - 1) + gain) / period)
+        avg_loss = np.where(seeding, self.avg_loss[i] + loss, (self.avg_loss[i] * (period - 1) + loss) / period)
+        deltas = deltas + 1
+        seeded = deltas == period
+        avg_gain[seeded] /= period
+        avg_loss[seeded] /= period
+        self.avg_gain[i], self.avg_loss[i], self.delta_count[i] = avg_gain, avg_loss, deltas
+        metrics['rsi'][rows] = np.where(deltas >= period, rsi_from_averages(avg_gain, avg_loss), np.nan)
+
+        return metrics
+
+    def _resync_sums(self):
+        # Recalcule exactement les sommes glissantes depuis les tampons (dérive d'arrondi)
+        for k, window in enumerate(self.ma_windows):
+            n = np.minimum(self.close_count, window)
+            steps = np.arange(window)
+            positions = (self.close_count[:, None] - 1 - steps[None, :]) % self.capacity
+            values = np.take_along_axis(self.closes, positions, axis=1)
+            self.ma_sums[:, k] = np.where(steps[None, :] < n[:, None], values, 0.0).sum(axis=1)
+
+        # Les rendements occupent les positions 0..n-1 tant que le tampon n'est pas plein
+        n = np.minimum(self.return_count, self.volatility_window)
+        mask = np.arange(self.volatility_window)[None, :] < n[:, None]
+        self.return_sums = np.where(mask, self.returns, 0.0).sum(axis=1)
+        self.return_squares = np.where(mask, self.returns * self.returns, 0.0).sum(axis=1)
+
+
+def _cumulative(values):
+    # Sommes cumulées des valeurs non manquantes et de leur nombre, précédées d'une colonne de zéros
+    valid = ~np.isnan(values)
+    sums = np.zeros((values.shape[0], values.shape[1] + 1))
+    counts = np.zeros_like(sums)
+    np.cumsum(np.where(valid, values, 0.0), axis=1, out=sums[:, 1:])
+    np.cumsum(valid, axis=1, dtype=np.float64, out=counts[:, 1:])
+    return sums, counts
+
+
+def _window_diff(cumulative, window):
+    # Différence des sommes cumulées sur les `window` dernières colonnes
+    result = cumulative[:, 1:].copy()
+    if window < result.shape[1]:
+        result[:, window:] -= cumulative[:, 1:-window]
+    return result
+
+
+def _rolling_means(values, windows):
+    sums, counts = _cumulative(values)
+    means = {}
+    for window in windows:
+        window_counts = _window_diff(counts, window)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            means[window] = np.where(window_counts > 0, _window_diff(sums, window) / window_counts, np.nan)
+    return means
+
+
+def _rolling_std(values, window):
+    sums, counts = _cumulative(values)
+    squares, _ = _cumulative(values * values)
+    window_sums = _window_diff(sums, window)
+    window_counts = _window_diff(counts, window)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        variance = (_window_diff(squares, window) - window_sums * window_sums / window_counts) / (window_counts - 1)
+    # Les erreurs d'arrondi peuvent rendre la variance très légèrement négative
+    return np.where(window_counts > 1, np.sqrt(np.maximum(variance, 0.0)), np.nan)
+
+
+def _forward_fill(values):
+    # Propage la dernière valeur connue le long de chaque ligne
+    index = np.where(np.isnan(values), 0, np.arange(values.shape[1]))
+    np.maximum.accumulate(index, axis=1, out=index)
+    return values[np.arange(values.shape[0])[:, None], index]
+
+
+def _wilder_averages(prices, period):
+    n_symbols, width = prices.shape
+    if width <= period:
+        return np.full(prices.shape, np.nan), np.full(prices.shape, np.nan)
+
+    # La récurrence avance séance par séance : on travaille sur la transposée
+    # (séance × symbole) pour que chaque pas lise et écrive une ligne contiguë
+    deltas = np.ascontiguousarray(np.diff(prices, axis=1).T)
+    gains = np.where(deltas > 0, deltas, 0.0)
+    losses = np.where(deltas < 0, -deltas, 0.0)
+
+    avg_gain = np.full((width, n_symbols), np.nan)
+    avg_loss = np.full((width, n_symbols), np.nan)
+
+    # Amorçage par la moyenne simple des `period` premières variations, puis lissage de Wilder
+    # (vectorisé sur tous les symboles du bloc)
+    gain = gains[:period].mean(axis=0)
+    loss = losses[:period].mean(axis=0)
+    avg_gain[period] = gain
+    avg_loss[period] = loss
+    for step in range(period + 1, width):
+        gain *= period - 1
+        gain += gains[step - 1]
+        gain /= period
+        loss *= period - 1
+        loss += losses[step - 1]
+        loss /= period
+        avg_gain[step] = gain
+        avg_loss[step] = loss
+
+    return avg_gain.T, avg_loss.T
+
+
+def rsi_from_averages(avg_gain, avg_loss):
+    """
+    Convertit les moyennes lissées des hausses et des baisses en RSI
+
+    Args:
+        avg_gain (numpy.ndarray): Moyennes des hausses
+        avg_loss (numpy.ndarray): Moyennes des baisses
+
+    Returns:
+        numpy.ndarray: RSI entre 0 et 100 (50 lorsque le cours est resté immobile)
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsi = 100 - 100 / (1 + avg_gain / avg_loss)
+    rsi = np.where(avg_loss == 0, np.where(avg_gain == 0, 50.0, 100.0), rsi)
+    return np.where(np.isnan(avg_gain) | np.isnan(avg_loss), np.nan, rsi)
@@ -0,0 +1,100 @@
+# Agrégation des barres intraday
+import logging
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger('intraday_aggregation')
+
+# Fuseau de la séance : une barre appartient au jour de bourse de New York
+MARKET_TIMEZONE = 'America/New_York'
+
+DAILY_COLUMNS = ['symbol', 'date', 'open', 'high', 'low', 'close', 'volume', 'vwap', 'bars']
+
+
+def aggregate_daily(bars, timezone=MARKET_TIMEZONE):
+    """
+    Agrège des barres intraday en barres quotidiennes OHLCV et VWAP
+
+    Les barres sont triées une fois par (symbole, horodatage), puis chaque séance est
+    réduite en une passe vectorisée (ufunc.reduceat) : premier open, plus haut, plus
+    bas, dernier close, volume total et VWAP. Le VWAP est pondéré par le volume sur
+    le prix typique (high + low + close) / 3 de chaque barre.
+
+    Args:
+        bars (pandas.DataFrame): Barres avec les colonnes 'symbol', 'ts' (UTC si sans fuseau),
+                                 'open', 'high', 'low', 'close' et 'volume'
+        timezone (str, optional): Fuseau définissant le jour de bourse
+
+    Returns:
+        pandas.DataFrame: Une ligne par (symbole, date), triée, avec le nombre de barres agrégées
+    """
+    if bars is None or bars.empty:
+        return pd.DataFrame(columns=DAILY_COLUMNS)
+
+    prices = bars[['open', 'high', 'low', 'close']].to_numpy(dtype=np.float64)
+    volume = pd.to_numeric(bars['volume'], errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+    ts = pd.to_datetime(bars['ts'], utc=True)
+
+    # Barres incomplètes écartées : elles fausseraient l'ouverture ou la clôture
+    keep = np.isfinite(prices).all(axis=1) & bars['symbol'].notna().to_numpy()
+    if not keep.all():
+        logger.info(f"{int((~keep).sum())} barres incomplètes ignorées")
+        prices, volume, ts = prices[keep], volume[keep], ts[keep]
+    volume = np.where(np.isfinite(volume) & (volume > 0), volume, 0.0)
+
+    # Factorisation de la colonne entière (rapide sur les chaînes Arrow), puis filtrage des codes
+    codes, symbols = pd.factorize(bars['symbol'], sort=True)
+    codes = codes[keep]
+    symbols = np.asarray(symbols, dtype=object)
+    nanos = ts.to_numpy(dtype='datetime64[ns]').view(np.int64)
+    days = (ts.dt.tz_convert(timezone).dt.tz_localize(None)
+              .to_numpy(dtype='datetime64[ns]').astype('datetime64[D]').view(np.int64))
+
+    n = len(codes)
+    if not n:
+        return pd.DataFrame(columns=DAILY_COLUMNS)
+
+    # Tri par (symbole, horodatage), évité lorsque les barres arrivent déjà dans l'ordre
+    in_order = (codes[1:] > codes[:-1]) | ((codes[1:] == codes[:-1]) & (nanos[1:] >= nanos[:-1]))
+    if not in_order.all():
+        # Clé entière unique (symbole, seconde) quand elle tient sur 63 bits ; le tri
+        # stable garde l'ordre d'arrivée des doublons
+        seconds = (nanos - nanos.min()) // 1_000_000_000
+        span = int(seconds.max()) + 1
+        if len(symbols) * span < 2 ** 62 and np.all(nanos % 1_000_000_000 == 0):
+            order = np.argsort(codes.astype(np.int64) * span + seconds, kind='stable')
+        else:
+            order = np.lexsort((nanos, codes))
+        codes, nanos, days = codes[order], nanos[order], days[order]
+        prices, volume = prices[order], volume[order]
+
+    # Barres en double (fenêtres de téléchargement chevauchantes) : la dernière l'emporte
+    last = np.ones(n, dtype=bool)
+    last[:-1] = (codes[1:] != codes[:-1]) | (nanos[1:] != nanos[:-1])
+    if not last.all():
+        codes, days, prices, volume = codes[last], days[last], prices[last], volume[last]
+        n = len(codes)
+
+    starts = np.concatenate([[0], np.flatnonzero((codes[1:] != codes[:-1]) | (days[1:] != days[:-1])) + 1])
+    ends = np.append(starts[1:], n)
+
+    open_, high, low, close = prices.T
+    total_volume = np.add.reduceat(volume, starts)
+    typical = (high + low + close) / 3
+    with np.errstate(invalid='ignore', divide='ignore'):
+        vwap = np.where(total_volume > 0, np.add.reduceat(typical * volume, starts) / total_volume, np.nan)
+
+    daily = pd.DataFrame({
+        'symbol': symbols[codes[starts]],
+        'date': days[starts].astype('datetime64[D]').astype('datetime64[ns]'),
+        'open': open_[starts],
+        'high': np.maximum.reduceat(high, starts),
+        'low': np.minimum.reduceat(low, starts),
+        'close': close[ends - 1],
+        'volume': total_volume.astype(np.int64),
+        'vwap': vwap,
+        'bars': ends - starts
+    })
+    logger.info(f"{n} barres agrégées en {len(daily)} séances")
+    return daily
@@ -1,2 +1,341 @@
 #Effectue des analyses statistiques
+import os
+import logging
 
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger('statistical_analysis')
+
+
+class CovarianceState:
+    """
+    Covariances, corrélations et bêtas glissants de tout un univers de symboles
+
+    Les rendements quotidiens des `window` dernières séances sont conservés dans un
+    tampon circulaire (séance × symbole). Pour chaque paire de symboles sont tenues
+    à jour, sur les séances où les deux rendements existent, quatre matrices de
+    sommes : effectif, somme des rendements, somme des carrés et somme des produits.
+    Une nouvelle séance ajoute sa contribution et retire celle de la séance qui sort
+    de la fenêtre, sans relire l'historique : O(N²) par séance au lieu de
+    O(N² × window) pour un recalcul complet.
+
+    Les séances sont intégrées par blocs (produits matriciels k × N), eux-mêmes
+    découpés en panneaux de symboles pour borner la mémoire temporaire. Les sommes
+    sont recalculées exactement depuis le tampon toutes les `window` séances et au
+    chargement, ce qui élimine la dérive d'arrondi des ajouts et retraits successifs.
+
+    Les séances antérieures ou égales à la dernière séance intégrée sont ignorées :
+    une correction d'historique nécessite de reconstruire l'état avec `from_history`.
+    """
+
+    _ARRAYS = ('returns', 'slot_dates', 'last_close')
+
+    def __init__(self, window=63, benchmark='SPY', min_periods=20, block_cells=4_000_000):
+        """
+        Args:
+            window (int, optional): Nombre de séances de la fenêtre glissante
+            benchmark (str, optional): Symbole de référence pour le calcul des bêtas
+            min_periods (int, optional): Nombre minimal de rendements communs à une paire
+            block_cells (int, optional): Taille maximale (en cellules) des produits matriciels
+                                         intermédiaires
+        """
+        if min_periods < 2 or min_periods > window:
+            raise ValueError("min_periods doit être compris entre 2 et window")
+        self.window = int(window)
+        self.benchmark = benchmark
+        self.min_periods = int(min_periods)
+        self.block_cells = block_cells
+
+        self.symbols = []
+        self._index = {}
+        self.day_count = 0
+        self.last_date = np.datetime64('NaT', 'D')
+        self._allocate(0)
+
+    @classmethod
+    def from_history(cls, df, **kwargs):
+        """
+        Construit l'état à partir d'un historique de prix
+
+        Args:
+            df (pandas.DataFrame): Données avec les colonnes 'symbol', 'date' et 'close'
+            **kwargs: Paramètres de l'état (voir __init__)
+
+        Returns:
+            CovarianceState: État positionné sur la dernière séance de l'historique
+        """
+        state = cls(**kwargs)
+        state.update(df)
+        return state
+
+    def update(self, df):
+        """
+        Intègre de nouvelles séances de prix
+
+        Tous les symboles d'une séance doivent être transmis ensemble : une séance
+        intégrée n'est plus modifiable.
+
+        Args:
+            df (pandas.DataFrame): Nouvelles barres avec les colonnes 'symbol', 'date' et 'close'
+
+        Returns:
+            int: Nombre de séances intégrées
+        """
+        bars = df[['symbol', 'date', 'close']].dropna()
+        dates = pd.to_datetime(bars['date'])
+        if dates.dt.tz is not None:
+            dates = dates.dt.tz_localize(None)
+        bars = bars.assign(date=dates.dt.normalize())
+        if not np.isnat(self.last_date):
+            bars = bars[bars['date'] > pd.Timestamp(self.last_date)]
+        if bars.empty:
+            return 0
+
+        self._register(bars['symbol'].unique())
+
+        # Matrice des clôtures (séance × symbole), la dernière barre d'une séance l'emporte
+        day_index, days = pd.factorize(bars['date'], sort=True)
+        columns = bars['symbol'].map(self._index).to_numpy(dtype=np.int64)
+        closes = np.full((len(days), len(self.symbols)), np.nan)
+        closes[day_index, columns] = bars['close'].to_numpy(dtype=np.float64)
+        closes[~np.isfinite(closes) | (closes <= 0)] = np.nan
+
+        # Rendement par rapport à la dernière clôture connue (éventuellement d'une séance antérieure)
+        previous = np.vstack([self.last_close[None, :], closes])
+        previous = _forward_fill(previous)
+        returns = closes / previous[:-1] - 1
+        self.last_close = previous[-1]
+
+        days = days.to_numpy().astype('datetime64[D]')
+        for start in range(0, len(days), self.window):
+            stop = min(start + self.window, len(days))
+            self._push(returns[start:stop], days[start:stop])
+        self.last_date = days[-1]
+
+        logger.info(f"Covariances mises à jour: {len(days)} séances, {len(self.symbols)} symboles")
+        return len(days)
+
+    def snapshot(self):
+        """
+        Statistiques de la fenêtre courante
+
+        Returns:
+            dict: 'date', 'symbols', 'covariance' et 'correlation' (N × N), 'beta' (N)
+                  et 'observations' (effectif de chaque paire). Les valeurs reposant sur
+                  moins de min_periods rendements communs valent NaN
+        """
+        n = self.pair_count
+        with np.errstate(divide='ignore', invalid='ignore'):
+            covariance = (self.pair_product - self.pair_sum * self.pair_sum.T / n) / (n - 1)
+            # variance[i, j] : variance de i sur les séances communes avec j
+            variance = (self.pair_square - self.pair_sum * self.pair_sum / n) / (n - 1)
+            variance = np.maximum(variance, 0.0)
+            correlation = covariance / np.sqrt(variance * variance.T)
+        insufficient = n < self.min_periods
+        covariance[insufficient] = np.nan
+        correlation[insufficient] = np.nan
+        np.clip(correlation, -1.0, 1.0, out=correlation)
+
+        beta = np.full(len(self.symbols), np.nan)
+        b = self._index.get(self.benchmark)
+        if b is not None:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                beta = covariance[:, b] / variance[b, :]
+        elif self.symbols:
+            logger.warning(f"Symbole de référence {self.benchmark} absent: bêtas non calculés")
+
+        return {
+            'date': self.last_date,
+            'symbols': list(self.symbols),
+            'covariance': covariance,
+            'correlation': correlation,
+            'beta': beta,
+            'observations': n.astype(np.int64)
+        }
+
+    def beta(self):
+        """
+        Bêtas de la fenêtre courante par rapport au symbole de référence
+
+        Returns:
+            pandas.Series: Bêta par symbole
+        """
+        snapshot = self.snapshot()
+        return pd.Series(snapshot['beta'], index=snapshot['symbols'], name='beta')
+
+    def save_snapshot(self, directory):
+        """
+        Enregistre les statistiques de la fenêtre courante sous forme compacte
+
+        Seul le triangle supérieur des matrices symétriques est conservé, en float32.
+
+        Args:
+            directory (str): Dossier des instantanés (un fichier par séance)
+
+        Returns:
+            str: Chemin du fichier écrit, ou None si aucune séance n'a été intégrée
+        """
+        if np.isnat(self.last_date):
+            return None
+        snapshot = self.snapshot()
+        upper = np.triu_indices(len(self.symbols))
+
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"covariance_{self.last_date}.npz")
+        tmp_path = f"{path}.tmp.npz"
+        np.savez_compressed(
+            tmp_path,
+            date=np.array(str(self.last_date)),
+            symbols=np.asarray(self.symbols, dtype=str),
+            params=np.array([self.window, self.min_periods]),
+            benchmark=np.array(self.benchmark),
+            covariance=snapshot['covariance'][upper].astype(np.float32),
+            correlation=snapshot['correlation'][upper].astype(np.float32),
+            observations=snapshot['observations'][upper].astype(np.int32),
+            beta=snapshot['beta'].astype(np.float32)
+        )
+        os.replace(tmp_path, path)
+        logger.info(f"Instantané des covariances enregistré: {path}")
+        return path
+
+    @staticmethod
+    def load_snapshot(path):
+        """
+        Relit un instantané écrit par `save_snapshot`
+
+        Args:
+            path (str): Chemin du fichier
+
+        Returns:
+            dict: 'date', 'covariance' et 'correlation' (DataFrame N × N), 'beta' (Series)
+        """
+        with np.load(path) as data:
+            symbols = data['symbols'].tolist()
+            upper = np.triu_indices(len(symbols))
+            matrices = {}
+            for name in ('covariance', 'correlation'):
+                matrix = np.empty((len(symbols), len(symbols)))
+                matrix[upper] = data[name]
+                matrix.T[upper] = data[name]
+                matrices[name] = pd.DataFrame(matrix, index=symbols, columns=symbols)
+            return {
+                'date': pd.Timestamp(str(data['date'])),
+                **matrices,
+                'beta': pd.Series(data['beta'].astype(np.float64), index=symbols, name='beta')
+            }
+
+    def save(self, path):
+        """
+        Sauvegarde l'état dans un fichier .npz (tampon des rendements, sans les matrices de sommes)
+
+        Args:
+            path (str): Chemin du fichier
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.tmp.npz"
+        np.savez_compressed(
+            tmp_path,
+            symbols=np.asarray(self.symbols, dtype=str),
+            params=np.array([self.window, self.min_periods, self.day_count]),
+            benchmark=np.array(self.benchmark),
+            last_date=np.array([self.last_date]),
+            **{name: getattr(self, name) for name in self._ARRAYS}
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Charge un état sauvegardé par `save`
+
+        Args:
+            path (str): Chemin du fichier
+
+        Returns:
+            CovarianceState: État restauré
+        """
+        with np.load(path) as data:
+            window, min_periods, day_count = data['params'].tolist()
+            state = cls(window=window, benchmark=str(data['benchmark']), min_periods=min_periods)
+            state.symbols = data['symbols'].tolist()
+            state._index = {symbol: i for i, symbol in enumerate(state.symbols)}
+            state.day_count = day_count
+            state.last_date = data['last_date'][0]
+            for name in cls._ARRAYS:
+                setattr(state, name, data[name])
+        state._resync_sums()
+        return state
+
+    def _allocate(self, n):
+        self.returns = np.full((self.window, n), np.nan)
+        self.slot_dates = np.full(self.window, np.datetime64('NaT'), dtype='datetime64[D]')
+        self.last_close = np.full(n, np.nan)
+        self.pair_count = np.zeros((n, n))
+        self.pair_sum = np.zeros((n, n))
+        self.pair_square = np.zeros((n, n))
+        self.pair_product = np.zeros((n, n))
+
+    def _register(self, symbols):
+        new_symbols = [symbol for symbol in symbols if symbol not in self._index]
+        if not new_symbols:
+            return
+        n_old = len(self.symbols)
+        previous = {name: getattr(self, name) for name in
+                    ('returns', 'slot_dates', 'last_close', 'pair_count', 'pair_sum', 'pair_square', 'pair_product')}
+        self._allocate(n_old + len(new_symbols))
+        self.returns[:, :n_old] = previous['returns']
+        self.slot_dates[:] = previous['slot_dates']
+        self.last_close[:n_old] = previous['last_close']
+        for name in ('pair_count', 'pair_sum', 'pair_square', 'pair_product'):
+            getattr(self, name)[:n_old, :n_old] = previous[name]
+        for symbol in new_symbols:
+            self._index[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+
+    def _push(self, returns, days):
+        # Au plus `window` séances : chaque emplacement du tampon n'est réécrit qu'une fois
+        steps = self.day_count + np.arange(len(days))
+        slots = steps % self.window
+        leaving = self.returns[slots[steps >= self.window]]
+        if len(leaving):
+            self._accumulate(leaving, -1.0)
+        self._accumulate(returns, 1.0)
+        self.returns[slots] = returns
+        self.slot_dates[slots] = days
+        self.day_count += len(days)
+
+        if self.day_count // self.window != (self.day_count - len(days)) // self.window:
+            self._resync_sums()
+
+    def _accumulate(self, returns, sign):
+        present = ~np.isnan(returns)
+        mask = present.astype(np.float64)
+        values = np.where(present, returns, 0.0)
+        squares = values * values
+
+        # Panneaux de symboles : chaque produit intermédiaire compte au plus block_cells cellules
+        n = len(self.symbols)
+        panel = max(self.block_cells // max(n, 1), 1)
+        for start in range(0, n, panel):
+            stop = min(start + panel, n)
+            self.pair_count[start:stop] += sign * (mask[:, start:stop].T @ mask)
+            self.pair_sum[start:stop] += sign * (values[:, start:stop].T @ mask)
+            self.pair_square[start:stop] += sign * (squares[:, start:stop].T @ mask)
+            self.pair_product[start:stop] += sign * (values[:, start:stop].T @ values)
+
+    def _resync_sums(self):
+        # Recalcule exactement les sommes depuis le tampon (dérive d'arrondi)
+        n = len(self.symbols)
+        for name in ('pair_count', 'pair_sum', 'pair_square', 'pair_product'):
+            setattr(self, name, np.zeros((n, n)))
+        filled = min(self.day_count, self.window)
+        if filled:
+            self._accumulate(self.returns[:filled] if self.day_count < self.window else self.returns, 1.0)
+
+
+def _forward_fill(values):
+    # Propage vers le bas la dernière valeur non manquante de chaque colonne
+    rows = np.where(~np.isnan(values), np.arange(len(values))[:, None], 0)
+    np.maximum.accumulate(rows, axis=0, out=rows)
+    return values[rows, np.arange(values.shape[1])[None, :]]
@@ -0,0 +1,77 @@
+import threading
+from concurrent.futures import FIRST_COMPLETED, wait
+from contextlib import contextmanager
+
+
+class HostConcurrencyLimiter:
+    """
+    Limite le nombre de requêtes simultanées envoyées à un même hôte
+
+    Les pools de threads des extracteurs peuvent compter plus de workers que ce
+    qu'un fournisseur tolère : chaque appel réseau est donc encadré par un
+    sémaphore propre à l'hôte visé.
+    """
+
+    def __init__(self, max_per_host=4, overrides=None):
+        """
+        Args:
+            max_per_host (int, optional): Nombre maximal d'appels simultanés par hôte
+            overrides (dict, optional): Limites spécifiques {hôte: limite}
+        """
+        self.max_per_host = max_per_host
+        self.overrides = dict(overrides or {})
+        self._semaphores = {}
+        self._guard = threading.Lock()
+
+    @contextmanager
+    def limit(self, host):
+        """
+        Context manager réservant un créneau pour l'hôte donné
+
+        Args:
+            host (str): Nom d'hôte (ex: 'query2.finance.yahoo.com')
+        """
+        with self._guard:
+            semaphore = self._semaphores.get(host)
+            if semaphore is None:
+                semaphore = threading.BoundedSemaphore(self.overrides.get(host, self.max_per_host))
+                self._semaphores[host] = semaphore
+        with semaphore:
+            yield
+
+
+def bounded_as_completed(executor, fn, items, max_in_flight):
+    """
+    Soumet fn(item) pour chaque élément en gardant au plus `max_in_flight` tâches en cours
+
+    Les résultats sont restitués dans l'ordre de terminaison, de sorte qu'un élément
+    lent ne bloque pas les suivants, et la mémoire reste bornée quelle que soit la
+    taille de l'univers traité.
+
+    Args:
+        executor (concurrent.futures.Executor): Exécuteur utilisé pour les tâches
+        fn (callable): Fonction appliquée à chaque élément
+        items (iterable): Éléments à traiter
+        max_in_flight (int): Nombre maximal de tâches soumises simultanément
+
+    Yields:
+        tuple: (élément, future terminée)
+    """
+    items = iter(items)
+    pending = {}
+
+    def submit_next():
+        for item in items:
+            pending[executor.submit(fn, item)] = item
+            return
+
+    for _ in range(max_in_flight):
+        submit_next()
+
+    while pending:
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            item = pending.pop(future)
+            submit_next()
+            yield item, future
+
@@ -1 +1,346 @@
-# Validation des données
\ No newline at end of file
+# Validation des données
+import os
+import logging
+import threading
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger('data_validation')
+
+
+class Rule:
+    """
+    Règle de validation déclarative
+
+    Chaque règle occupe un bit du masque de motifs et produit, en une opération
+    vectorisée sur le lot trié, le tableau booléen des lignes en défaut.
+    """
+
+    def __init__(self, code, check, severity='error', description=''):
+        """
+        Args:
+            code (str): Code du motif (ex: 'ohlc_inconsistent'), repris dans la quarantaine
+            check (callable): Fonction (batch, params) -> tableau booléen des lignes en défaut,
+                              dans l'ordre trié de `batch`
+            severity (str, optional): 'error' (ligne mise en quarantaine) ou 'warning'
+                                      (ligne signalée mais conservée)
+            description (str, optional): Description lisible de la règle
+        """
+        if severity not in ('error', 'warning'):
+            raise ValueError(f"Sévérité inconnue: {severity}")
+        self.code = code
+        self.check = check
+        self.severity = severity
+        self.description = description
+
+
+class Batch:
+    """
+    Colonnes d'un lot triées par symbole puis date, calculées une fois pour toutes les règles
+    """
+
+    def __init__(self, df, date_column='date'):
+        """
+        Args:
+            df (pandas.DataFrame): Lot à valider, avec les colonnes 'symbol' et date
+            date_column (str, optional): Colonne des dates
+        """
+        self.df = df
+        self.n = len(df)
+
+        codes, _ = pd.factorize(df['symbol'], sort=False)
+        days = _to_days(df[date_column])
+
+        # Tri par (symbole, date) via une clé entière unique
+        valid_days = ~np.isnat(days)
+        day_numbers = days.astype(np.int64)
+        first_day = int(day_numbers[valid_days].min()) if valid_days.any() else 0
+        span = (int(day_numbers[valid_days].max()) - first_day + 2) if valid_days.any() else 1
+        key = (codes.astype(np.int64) + 1) * span
+        key += np.where(valid_days, day_numbers - first_day + 1, 0)
+
+        if self.n and np.all(key[1:] >= key[:-1]):
+            self.order = None
+        else:
+            # La position d'entrée départage les doublons (la dernière occurrence reste la
+            # dernière), ce qui évite un tri stable, bien plus lent qu'un tri rapide
+            if (int(codes.max()) + 2) * span * self.n < 2 ** 62:
+                self.order = np.argsort(key * self.n + np.arange(self.n), kind='quicksort')
+            else:
+                self.order = np.argsort(key, kind='stable')
+            codes, days = codes[self.order], days[self.order]
+
+        self.codes = codes
+        self.days = days
+        # Séance précédente du même symbole (base des règles d'écart et de rendement) ;
+        # un doublon n'est pas une séance précédente
+        self.has_previous = np.zeros(self.n, dtype=bool)
+        if self.n:
+            self.has_previous[1:] = (codes[1:] == codes[:-1]) & (codes[1:] >= 0) & (days[1:] != days[:-1])
+        self._columns = {}
+
+    def column(self, name):
+        """
+        Colonne numérique triée (float64, NaN si la colonne est absente)
+        """
+        values = self._columns.get(name)
+        if values is None:
+            if name in self.df.columns:
+                values = self.df[name]
+                if not pd.api.types.is_numeric_dtype(values):
+                    values = pd.to_numeric(values, errors='coerce')
+                values = values.to_numpy(dtype=np.float64, na_value=np.nan)
+                if self.order is not None:
+                    values = values[self.order]
+            else:
+                values = np.full(self.n, np.nan)
+            self._columns[name] = values
+        return values
+
+    def has(self, name):
+        return name in self.df.columns
+
+    def previous(self, values):
+        """
+        Valeur de la ligne précédente du même symbole (NaN en début de série)
+        """
+        shifted = np.full(self.n, np.nan)
+        if self.n:
+            shifted[1:] = values[:-1]
+        shifted[~self.has_previous] = np.nan
+        return shifted
+
+
+class ValidationResult:
+    """
+    Résultat d'une validation : lignes valides, quarantaine et synthèse
+    """
+
+    def __init__(self, valid, quarantine, flags, summary):
+        """
+        Args:
+            valid (pandas.DataFrame): Lignes sans motif bloquant, dans l'ordre d'entrée
+            quarantine (pandas.DataFrame): Lignes rejetées avec 'reason_mask' et 'reasons'
+            flags (numpy.ndarray): Masque de motifs de chaque ligne d'entrée (uint32)
+            summary (dict): Nombre de lignes par motif et totaux
+        """
+        self.valid = valid
+        self.quarantine = quarantine
+        self.flags = flags
+        self.summary = summary
+
+
+def _missing_key(batch, params):
+    return (batch.codes < 0) | np.isnat(batch.days)
+
+
+def _invalid_price(batch, params):
+    close = batch.column('close')
+    invalid = ~np.isfinite(close) | (close <= 0)
+    for name in params['price_columns']:
+        if name != 'close' and batch.has(name):
+            values = batch.column(name)
+            # Une valeur manquante est tolérée, une valeur infinie ou non positive ne l'est pas
+            invalid |= np.isinf(values) | (values <= 0)
+    return invalid
+
+
+def _ohlc_inconsistent(batch, params):
+    if not (batch.has('high') and batch.has('low')):
+        return np.zeros(batch.n, dtype=bool)
+    high = batch.column('high')
+    low = batch.column('low')
+    slack = params['price_tolerance'] * np.abs(high)
+
+    # Les comparaisons avec NaN sont fausses : une valeur manquante n'est pas une incohérence
+    inconsistent = low > high + slack
+    for name in ('open', 'close'):
+        if batch.has(name):
+            values = batch.column(name)
+            inconsistent |= (values > high + slack) | (values < low - slack)
+    return inconsistent
+
+
+def _negative_volume(batch, params):
+    return batch.column('volume') < 0
+
+
+def _duplicate_key(batch, params):
+    # La dernière occurrence d'une clé (symbole, date) est conservée
+    duplicate = np.zeros(batch.n, dtype=bool)
+    if batch.n:
+        duplicate[:-1] = (batch.codes[:-1] == batch.codes[1:]) & (batch.days[:-1] == batch.days[1:])
+    return duplicate
+
+
+def _calendar_gap(batch, params):
+    gap = np.zeros(batch.n, dtype=bool)
+    candidates = np.flatnonzero(batch.has_previous)
+    candidates = candidates[~np.isnat(batch.days[candidates]) & ~np.isnat(batch.days[candidates - 1])]
+    # Jours ouvrés manquants entre deux séances consécutives d'un symbole
+    missing = np.busday_count(batch.days[candidates - 1] + 1, batch.days[candidates])
+    gap[candidates] = missing > params['max_gap_days']
+    return gap
+
+
+def _return_outlier(batch, params):
+    close = batch.column(params['return_column'])
+    previous = batch.previous(close)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        log_return = np.log(close / previous)
+    return np.abs(log_return) > params['max_abs_log_return']
+
+
+DEFAULT_RULES = [
+    Rule('missing_key', _missing_key, 'error', "Symbole ou date manquant"),
+    Rule('invalid_price', _invalid_price, 'error', "Clôture manquante, prix infini ou non positif"),
+    Rule('ohlc_inconsistent', _ohlc_inconsistent, 'error', "Open ou close hors de [low, high], ou low > high"),
+    Rule('negative_volume', _negative_volume, 'error', "Volume négatif"),
+    Rule('duplicate_key', _duplicate_key, 'error', "Doublon (symbole, date), la dernière ligne est conservée"),
+    Rule('calendar_gap', _calendar_gap, 'warning', "Jours ouvrés manquants avant la séance"),
+    Rule('return_outlier', _return_outlier, 'warning', "Rendement journalier anormal")
+]
+
+
+class DataValidator:
+    """
+    Moteur de règles vectorisé pour les lots de cours
+
+    Le lot est trié une seule fois par (symbole, date), puis chaque règle produit un
+    tableau booléen combiné dans un masque de motifs (un bit par règle). Les lignes
+    portant un motif de sévérité 'error' partent en quarantaine avec leurs codes ;
+    les motifs 'warning' sont comptés sans bloquer la ligne.
+    """
+
+    DEFAULT_PARAMS = {
+        'price_columns': ('open', 'high', 'low', 'close', 'adj_close', 'adjusted_close'),
+        'price_tolerance': 1e-6,
+        'max_gap_days': 5,
+        'max_abs_log_return': 0.5,
+        'return_column': 'close'
+    }
+
+    def __init__(self, rules=None, quarantine_dir=None, quarantine_warnings=False, **params):
+        """
+        Args:
+            rules (list, optional): Règles appliquées (Rule). Par défaut, DEFAULT_RULES
+            quarantine_dir (str, optional): Dossier des fichiers de quarantaine. Par défaut,
+                                            data/quarantine
+            quarantine_warnings (bool, optional): Mettre aussi en quarantaine les motifs 'warning'
+            **params: Seuils remplaçant ceux de DEFAULT_PARAMS (max_gap_days, max_abs_log_return...)
+        """
+        self.rules = list(rules or DEFAULT_RULES)
+        if len(self.rules) > 32:
+            raise ValueError("32 règles au maximum")
+        unknown = set(params) - set(self.DEFAULT_PARAMS)
+        if unknown:
+            raise ValueError(f"Paramètres de validation inconnus: {sorted(unknown)}")
+        self.params = {**self.DEFAULT_PARAMS, **params}
+        self.quarantine_warnings = quarantine_warnings
+
+        if quarantine_dir is None:
+            quarantine_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
+                                          'data', 'quarantine')
+        self.quarantine_dir = quarantine_dir
+
+        self.blocking_mask = 0
+        for bit, rule in enumerate(self.rules):
+            if rule.severity == 'error' or quarantine_warnings:
+                self.blocking_mask |= 1 << bit
+        self._lock = threading.Lock()
+
+    def validate(self, df, date_column='date'):
+        """
+        Valide un lot de cours en une passe vectorisée
+
+        Args:
+            df (pandas.DataFrame): Lot avec les colonnes 'symbol', date et les prix
+            date_column (str, optional): Colonne des dates
+
+        Returns:
+            ValidationResult: Lignes valides, quarantaine, masques et synthèse
+        """
+        batch = Batch(df, date_column=date_column)
+
+        flags = np.zeros(batch.n, dtype=np.uint32)
+        counts = {}
+        for bit, rule in enumerate(self.rules):
+            failed = np.asarray(rule.check(batch, self.params), dtype=bool)
+            counts[rule.code] = int(np.count_nonzero(failed))
+            flags |= failed.astype(np.uint32) << np.uint32(bit)
+
+        # Retour à l'ordre d'entrée
+        if batch.order is not None:
+            unsorted = np.empty_like(flags)
+            unsorted[batch.order] = flags
+            flags = unsorted
+
+        rejected = (flags & np.uint32(self.blocking_mask)) != 0
+        # Cas courant : aucun rejet, le lot est restitué sans copie
+        valid = df[~rejected] if rejected.any() else df
+        quarantine = df[rejected].assign(reason_mask=flags[rejected].astype(np.int64))
+        quarantine['reasons'] = self.describe(quarantine['reason_mask'].to_numpy())
+
+        summary = {
+            'rows': batch.n,
+            'valid': len(valid),
+            'quarantined': len(quarantine),
+            'rules': counts
+        }
+        if len(quarantine) or any(counts.values()):
+            logger.warning(f"Validation: {len(quarantine)}/{batch.n} lignes en quarantaine, "
+                           f"motifs {({code: n for code, n in counts.items() if n})}")
+        else:
+            logger.info(f"Validation: {batch.n} lignes valides")
+        return ValidationResult(valid, quarantine, flags, summary)
+
+    def describe(self, masks):
+        """
+        Traduit des masques de motifs en codes séparés par '|'
+
+        Args:
+            masks (numpy.ndarray): Masques de motifs
+
+        Returns:
+            numpy.ndarray: Codes des motifs (ex: 'ohlc_inconsistent|negative_volume')
+        """
+        masks = np.asarray(masks, dtype=np.int64)
+        # Peu de combinaisons distinctes : chacune n'est traduite qu'une fois
+        unique, inverse = np.unique(masks, return_inverse=True)
+        labels = np.array(['|'.join(rule.code for bit, rule in enumerate(self.rules) if mask >> bit & 1)
+                           for mask in unique], dtype=object)
+        return labels[inverse.reshape(-1)] if len(masks) else np.array([], dtype=object)
+
+    def save_quarantine(self, result, source):
+        """
+        Écrit les lignes en quarantaine dans un fichier Parquet horodaté
+
+        Args:
+            result (ValidationResult): Résultat de `validate`
+            source (str): Source des données (sous-dossier de la quarantaine)
+
+        Returns:
+            str: Chemin du fichier écrit, ou None si la quarantaine est vide
+        """
+        if result.quarantine.empty:
+            return None
+
+        directory = os.path.join(self.quarantine_dir, source)
+        os.makedirs(directory, exist_ok=True)
+        now = datetime.now()
+        with self._lock:
+            path = os.path.join(directory, f"quarantine_{now:%Y%m%d_%H%M%S_%f}_{threading.get_ident()}.parquet")
+            frame = result.quarantine.assign(quarantined_at=now)
+            frame.to_parquet(path, index=False)
+        logger.info(f"{len(frame)} lignes mises en quarantaine dans {path}")
+        return path
+
+
+def _to_days(dates):
+    dates = pd.to_datetime(dates)
+    if dates.dt.tz is not None:
+        # Dates localisées (Yahoo Finance) : on conserve la date du marché
+        dates = dates.dt.tz_localize(None)
+    return dates.to_numpy(dtype='datetime64[ns]').astype('datetime64[D]')
@@ -1,15 +1,30 @@
-import yaml
-import psycopg2
-from psycopg2.extras import RealDictCursor
+import threading
+import uuid
+from contextlib import contextmanager
+
 import logging
 
+# yaml, psycopg2 et pandas sont importés au premier usage : importer ce module
+# (ou DatabaseMaintenance) ne coûte rien tant qu'aucune connexion n'est ouverte
+
 class DatabaseConnector:
+    DEFAULT_POOL_SIZE = 5
+    DEFAULT_ITERSIZE = 10_000
+
     def __init__(self, config_path='config/db_config.yml', env='development'):
         self.logger = logging.getLogger(__name__)
         self.connection = None
         self.config = self._load_config(config_path, env)
-        
+        self.pool_size = int(self.config.get('connection_pool', self.DEFAULT_POOL_SIZE))
+        self.pool = None
+        # ThreadedConnectionPool lève une erreur lorsqu'il est épuisé : le sémaphore
+        # fait patienter les threads jusqu'à ce qu'une connexion soit rendue
+        self._slots = threading.BoundedSemaphore(self.pool_size)
+        self._pool_lock = threading.Lock()
+
     def _load_config(self, config_path, env):
+        import yaml
+
         try:
             with open(config_path, 'r') as file:
                 config = yaml.safe_load(file)
@@ -19,35 +34,182 @@ class DatabaseConnector:
         except Exception as e:
             self.logger.error(f"Error loading database configuration: {e}")
             raise
-    
+
+    def _get_pool(self):
+        with self._pool_lock:
+            if self.pool is None:
+                from psycopg2.pool import ThreadedConnectionPool
+
+                self.pool = ThreadedConnectionPool(
+                    minconn=1,
+                    maxconn=self.pool_size,
+                    host=self.config['host'],
+                    port=self.config['port'],
+                    database=self.config['database'],
+                    user=self.config['username'],
+                    password=self.config['password']
+                )
+                self.logger.info(f"Database connection pool created ({self.pool_size} connections)")
+            return self.pool
+
+    def acquire(self):
+        """
+        Emprunte une connexion au pool, en attendant qu'une connexion se libère si besoin
+
+        Returns:
+            psycopg2.extensions.connection: Connexion à rendre avec `release`
+        """
+        self._slots.acquire()
+        try:
+            return self._get_pool().getconn()
+        except Exception as e:
+            self._slots.release()
+            self.logger.error(f"Error connecting to database: {e}")
+            raise
+
+    def release(self, connection):
+        """
+        Rend une connexion empruntée au pool
+
+        Args:
+            connection (psycopg2.extensions.connection): Connexion obtenue par `acquire`
+        """
+        try:
+            if self.pool is None:
+                # Pool déjà fermé (générateur de flux finalisé après `close`) : la connexion
+                # n'a plus de pool où retourner
+                if not connection.closed:
+                    connection.close()
+            else:
+                self.pool.putconn(connection, close=bool(connection.closed))
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def get_connection(self):
+        """
+        Context manager empruntant une connexion au pool
+
+        La transaction est validée à la sortie du bloc, ou annulée dans tous les autres cas
+        (exception, interruption, générateur de flux abandonné avant la fin : GeneratorExit),
+        puis la connexion est rendue au pool sans transaction ouverte.
+        """
+        connection = self.acquire()
+        committed = False
+        try:
+            yield connection
+            connection.commit()
+            committed = True
+        finally:
+            if not committed and not connection.closed:
+                try:
+                    connection.rollback()
+                except Exception as e:
+                    # Connexion dans un état inconnu : fermée pour que le pool la remplace
+                    self.logger.error(f"Rollback failed, discarding connection: {e}")
+                    connection.close()
+            self.release(connection)
+
+    @contextmanager
+    def cursor(self, cursor_factory=None):
+        """
+        Context manager fournissant un curseur sur une connexion empruntée au pool
+
+        Args:
+            cursor_factory (optional): Classe de curseur psycopg2 (ex: RealDictCursor)
+        """
+        with self.get_connection() as connection:
+            with connection.cursor(cursor_factory=cursor_factory) as cursor:
+                yield cursor
+
     def connect(self):
         try:
-            self.connection = psycopg2.connect(
-                host=self.config['host'],
-                port=self.config['port'],
-                database=self.config['database'],
-                user=self.config['username'],
-                password=self.config['password']
-            )
-            self.logger.info("Database connection established")
+            if self.connection is None:
+                self.connection = self.acquire()
+                self.logger.info("Database connection established")
             return self.connection
         except Exception as e:
             self.logger.error(f"Error connecting to database: {e}")
             raise
-    
+
     def execute_query(self, query, params=None, fetch=True):
+        if self.connection is None:
+            with self.get_connection() as connection:
+                return self._execute(connection, query, params, fetch)
+        return self._execute(self.connection, query, params, fetch)
+
+    def _execute(self, connection, query, params, fetch):
+        from psycopg2.extras import RealDictCursor
+
         try:
-            with self.connection.cursor(cursor_factory=RealDictCursor) as cursor:
+            with connection.cursor(cursor_factory=RealDictCursor) as cursor:
                 cursor.execute(query, params)
                 if fetch:
                     return cursor.fetchall()
-                self.connection.commit()
+                connection.commit()
         except Exception as e:
             self.logger.error(f"Error executing query: {e}")
-            self.connection.rollback()
+            connection.rollback()
             raise
-    
+
+    def stream_query(self, query, params=None, itersize=None):
+        """
+        Exécute une requête avec un curseur côté serveur et restitue les lignes au fil de l'eau
+
+        Seules `itersize` lignes sont transférées à la fois : la mémoire reste bornée
+        quelle que soit la taille du résultat.
+
+        Args:
+            query (str): Requête SQL
+            params (tuple|dict, optional): Paramètres de la requête
+            itersize (int, optional): Nombre de lignes récupérées par aller-retour
+
+        Yields:
+            tuple: Une ligne du résultat
+        """
+        with self._server_cursor(query, params, itersize) as cursor:
+            yield from cursor
+
+    def stream_batches(self, query, params=None, batch_size=None):
+        """
+        Exécute une requête avec un curseur côté serveur et restitue le résultat par lots de colonnes
+
+        Args:
+            query (str): Requête SQL
+            params (tuple|dict, optional): Paramètres de la requête
+            batch_size (int, optional): Nombre de lignes par lot
+
+        Yields:
+            pd.DataFrame: Lot de lignes du résultat
+        """
+        import pandas as pd
+
+        batch_size = batch_size or self.DEFAULT_ITERSIZE
+        with self._server_cursor(query, params, batch_size) as cursor:
+            columns = None
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                if columns is None:
+                    columns = [col[0] for col in cursor.description]
+                yield pd.DataFrame.from_records(rows, columns=columns)
+
+    @contextmanager
+    def _server_cursor(self, query, params, itersize):
+        # Un curseur nommé n'existe que dans une transaction : il occupe sa propre
+        # connexion jusqu'à épuisement du résultat
+        with self.get_connection() as connection:
+            with connection.cursor(name=f"stream_{uuid.uuid4().hex}") as cursor:
+                cursor.itersize = itersize or self.DEFAULT_ITERSIZE
+                cursor.execute(query, params)
+                yield cursor
+
     def close(self):
         if self.connection:
-            self.connection.close()
-            self.logger.info("Database connection closed")
\ No newline at end of file
+            self.release(self.connection)
+            self.connection = None
+        if self.pool:
+            self.pool.closeall()
+            self.pool = None
+            self.logger.info("Database connection closed")
@@ -1,70 +1,346 @@
 import os
+import re
 import logging
+import threading
+from datetime import date
 from src.utils.db_connection import DatabaseConnector
 
 logger = logging.getLogger(__name__)
 
 class DatabaseMaintenance:
-    def __init__(self):
-        self.db = DatabaseConnector()
+    # Tables partitionnées par mois et durée de conservation (en mois, None = illimitée)
+    PARTITIONED_TABLES = {
+        'raw.stock_prices': 24,
+        'raw.intraday_bars': 6,
+        'processed.stock_metrics': None
+    }
+
+    # Colonne de partitionnement, lorsqu'elle n'est pas 'date'
+    PARTITION_COLUMNS = {
+        'raw.intraday_bars': 'ts'
+    }
+
+    _BOUND_PATTERN = re.compile(r"FROM \('(\d{4}-\d{2}-\d{2})[^']*'\) TO \('(\d{4}-\d{2}-\d{2})[^']*'\)")
+
+    def __init__(self, config_path=None, env='development'):
+        """
+        Args:
+            config_path (str, optional): Configuration de la base. Par défaut, config/db_config.yml
+            env (str, optional): Environnement de base de données ('development', 'production')
+        """
+        base_dir = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+        self.config_path = config_path or os.path.join(base_dir, 'config', 'db_config.yml')
+        self.env = env
         self.conn = None
-        self.sql_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'sql')
-    
+        self.sql_dir = os.path.join(base_dir, 'sql')
+        self._db = None
+        # Premier mois couvert par des partitions, par table (créées par cette instance)
+        self._covered_from = {}
+        self._partition_lock = threading.Lock()
+
+    @property
+    def db(self):
+        """Connecteur à la base, créé (et sa configuration lue) au premier usage"""
+        if self._db is None:
+            self._db = DatabaseConnector(config_path=self.config_path, env=self.env)
+        return self._db
+
     def connect(self):
         """Établit une connexion à la base de données"""
         self.conn = self.db.connect()
         return self.conn
-    
+
     def close(self):
         """Ferme la connexion à la base de données"""
-        self.db.close()
-    
+        if self._db is not None:
+            self._db.close()
+
     def create_indexes(self):
         """Crée les index définis dans le fichier indexes.sql"""
         try:
             if self.conn is None:
                 self.connect()
-            
+
             indexes_sql_path = os.path.join(self.sql_dir, 'maintenance', 'indexes.sql')
-            
+
             with open(indexes_sql_path, 'r') as f:
                 indexes_sql = f.read()
-            
+
             # Exécuter la création d'index
             with self.conn.cursor() as cursor:
                 cursor.execute(indexes_sql)
                 self.conn.commit()
-            
+
             logger.info("Successfully created database indexes")
             return True
-            
+
         except Exception as e:
             logger.error(f"Error creating database indexes: {e}")
             if self.conn:
                 self.conn.rollback()
-                
-def cleanup_database(self):
-  try:
-    if self.conn is None:
-      self.connect()
-        
-      cleanup_sql_path = os.path.join(self.sql_dir, 'maintenance', 'cleanup.sql')
-        
-      with open(cleanup_sql_path, 'r') as f:
-            cleanup_sql = f.read()
-        
-      # Exécuter les opérations de nettoyage
-      with self.conn.cursor() as cursor:
-        cursor.execute(cleanup_sql)
-        self.conn.commit()
-        
-        logger.info("Successfully cleaned up database")
-        return True
-        
-  except Exception as e:
-    logger.error(f"Error cleaning up database: {e}")
-    if self.conn:
-      self.conn.rollback()
-      return False
-                
-    
\ No newline at end of file
+            return False
+
+    def cleanup_database(self):
+        """Applique la rétention puis exécute le fichier cleanup.sql"""
+        try:
+            if self.conn is None:
+                self.connect()
+
+            if self.apply_retention() is None:
+                return False
+
+            cleanup_sql_path = os.path.join(self.sql_dir, 'maintenance', 'cleanup.sql')
+
+            with open(cleanup_sql_path, 'r') as f:
+                cleanup_sql = f.read()
+
+            # Exécuter les opérations de nettoyage
+            with self.conn.cursor() as cursor:
+                cursor.execute(cleanup_sql)
+                self.conn.commit()
+
+            logger.info("Successfully cleaned up database")
+            return True
+
+        except Exception as e:
+            logger.error(f"Error cleaning up database: {e}")
+            if self.conn:
+                self.conn.rollback()
+            return False
+
+    def refresh_analytics(self, touched=None):
+        """
+        Met à jour analytics.price_signals et le tableau de bord après un chargement
+
+        Args:
+            touched (dict, optional): {symbole: première date modifiée}, tel que
+                                      PostgresLoader.touched['raw.stock_prices'].
+                                      Par défaut, tout l'historique est recalculé
+
+        Returns:
+            bool: True si le rafraîchissement a réussi
+        """
+        return self._refresh_touched('refresh_analytics.sql', touched, 'analytics')
+
+    def refresh_rollups(self, touched=None):
+        """
+        Met à jour les agrégats hebdomadaires et mensuels des périodes touchées par un chargement
+
+        Args:
+            touched (dict, optional): {symbole: première date modifiée}, tel que
+                                      PostgresLoader.touched['raw.stock_prices'].
+                                      Par défaut, tout l'historique est recalculé
+
+        Returns:
+            bool: True si le rafraîchissement a réussi
+        """
+        return self._refresh_touched('refresh_rollups.sql', touched, 'rollups')
+
+    def _refresh_touched(self, filename, touched, label):
+        try:
+            if self.conn is None:
+                self.connect()
+
+            refresh_sql_path = os.path.join(self.sql_dir, 'maintenance', filename)
+
+            with open(refresh_sql_path, 'r') as f:
+                refresh_sql = f.read()
+
+            with self.conn.cursor() as cursor:
+                if touched is None:
+                    cursor.execute("SELECT symbol, MIN(date) FROM raw.stock_prices GROUP BY symbol")
+                    touched = dict(cursor.fetchall())
+
+                symbols = list(touched)
+                cursor.execute(refresh_sql, {
+                    'symbols': symbols,
+                    'start_dates': [touched[symbol] for symbol in symbols]
+                })
+                self.conn.commit()
+
+            logger.info(f"Refreshed {label} for {len(symbols)} symbols")
+            return True
+
+        except Exception as e:
+            logger.error(f"Error refreshing {label}: {e}")
+            if self.conn:
+                self.conn.rollback()
+            return False
+
+    def create_partitions(self, start=None, months_ahead=3, tables=None):
+        """
+        Crée les partitions mensuelles manquantes des tables partitionnées
+
+        Les lignes déjà rangées dans la partition par défaut pour un mois créé y
+        sont déplacées avant le rattachement de la nouvelle partition.
+
+        Args:
+            start (date, optional): Premier mois à couvrir (ex: début d'un backfill).
+                                    Par défaut, l'horizon de rétention de chaque table
+                                    (le mois courant pour une conservation illimitée)
+            months_ahead (int, optional): Nombre de mois futurs créés à l'avance
+            tables (list, optional): Tables à couvrir. Par défaut, PARTITIONED_TABLES
+
+        Returns:
+            list: Noms des partitions créées
+        """
+        today = date.today()
+        last = _add_months(_month_start(today), months_ahead)
+        tables = list(tables or self.PARTITIONED_TABLES)
+        firsts = {}
+        for table in tables:
+            retention_months = self.PARTITIONED_TABLES[table]
+            if start is not None:
+                firsts[table] = _month_start(start)
+            elif retention_months is not None:
+                firsts[table] = _add_months(_month_start(today), -retention_months)
+            else:
+                firsts[table] = _month_start(today)
+        created = []
+
+        try:
+            if self.conn is None:
+                self.connect()
+
+            with self.conn.cursor() as cursor:
+                for table in tables:
+                    month = firsts[table]
+                    while month <= last:
+                        name = f"{table}_y{month.year}m{month.month:02d}"
+                        cursor.execute("SELECT to_regclass(%s)", (name,))
+                        if cursor.fetchone()[0] is None:
+                            self._create_partition(cursor, table, name, month, _add_months(month, 1),
+                                                   self.PARTITION_COLUMNS.get(table, 'date'))
+                            created.append(name)
+                        month = _add_months(month, 1)
+                self.conn.commit()
+
+            for table, first in firsts.items():
+                self._covered_from[table] = min(first, self._covered_from.get(table, first))
+            logger.info(f"Created {len(created)} partitions")
+            return created
+
+        except Exception as e:
+            logger.error(f"Error creating partitions: {e}")
+            if self.conn:
+                self.conn.rollback()
+            return []
+
+    def ensure_partitions(self, day, tables=None):
+        """
+        Crée au besoin les partitions depuis le mois d'une date, avant un chargement
+
+        Un premier chargement (initial_period='max') ou un backfill remonte au-delà des
+        partitions créées en début de job : sans partition, ses lignes seraient rangées
+        dans la partition par défaut. Appelé par les étapes de chargement concurrentes,
+        il ne crée les partitions que lorsque la date précède la couverture connue.
+
+        Args:
+            day (date): Date la plus ancienne du lot à charger
+            tables (list, optional): Tables chargées. Par défaut, PARTITIONED_TABLES
+
+        Returns:
+            list: Noms des partitions créées
+        """
+        first = _month_start(day)
+        with self._partition_lock:
+            missing = [table for table in (tables or self.PARTITIONED_TABLES)
+                       if table not in self._covered_from or first < self._covered_from[table]]
+            if not missing:
+                return []
+            return self.create_partitions(start=first, tables=missing)
+
+    def apply_retention(self, today=None):
+        """
+        Supprime les partitions entièrement antérieures à la durée de conservation
+
+        Les partitions expirées sont détachées puis supprimées : l'opération ne
+        touche que le catalogue, sans DELETE ni VACUUM.
+
+        Args:
+            today (date, optional): Date de référence. Par défaut, aujourd'hui
+
+        Returns:
+            list: Noms des partitions supprimées, ou None en cas d'erreur
+        """
+        today = today or date.today()
+        dropped = []
+
+        try:
+            if self.conn is None:
+                self.connect()
+
+            with self.conn.cursor() as cursor:
+                for table, retention_months in self.PARTITIONED_TABLES.items():
+                    if retention_months is None:
+                        continue
+                    cutoff = _add_months(_month_start(today), -retention_months)
+
+                    for name, bound in self._list_partitions(cursor, table):
+                        match = self._BOUND_PATTERN.search(bound)
+                        if match is None:
+                            continue
+                        if date.fromisoformat(match.group(2)) <= cutoff:
+                            cursor.execute(f"ALTER TABLE {table} DETACH PARTITION {name}")
+                            cursor.execute(f"DROP TABLE {name}")
+                            dropped.append(name)
+
+                    # Les chargements créent leurs partitions (ensure_partitions) : des lignes
+                    # anciennes dans la partition par défaut signalent une partition manquante
+                    column = self.PARTITION_COLUMNS.get(table, 'date')
+                    cursor.execute(f"DELETE FROM {table}_default WHERE {column} < %s", (cutoff,))
+                    if cursor.rowcount:
+                        logger.warning(f"Deleted {cursor.rowcount} expired rows from {table}_default: "
+                                       f"partitions were missing when they were loaded")
+                self.conn.commit()
+
+            logger.info(f"Dropped {len(dropped)} expired partitions")
+            return dropped
+
+        except Exception as e:
+            logger.error(f"Error applying retention: {e}")
+            if self.conn:
+                self.conn.rollback()
+            return None
+
+    @staticmethod
+    def _list_partitions(cursor, table):
+        cursor.execute(
+            """
+            SELECT ns.nspname || '.' || child.relname, pg_get_expr(child.relpartbound, child.oid)
+            FROM pg_inherits
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            JOIN pg_namespace ns ON ns.oid = child.relnamespace
+            WHERE pg_inherits.inhparent = %s::regclass
+            """,
+            (table,)
+        )
+        return cursor.fetchall()
+
+    @staticmethod
+    def _create_partition(cursor, table, name, lower, upper, column='date'):
+        # Créer la table seule, y déplacer les lignes du mois présentes dans la
+        # partition par défaut, puis la rattacher
+        cursor.execute(f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+        cursor.execute(
+            f"""
+            WITH moved AS (
+                DELETE FROM {table}_default WHERE {column} >= %s AND {column} < %s RETURNING *
+            )
+            INSERT INTO {name} SELECT * FROM moved
+            """,
+            (lower, upper)
+        )
+        cursor.execute(
+            f"ALTER TABLE {table} ATTACH PARTITION {name} FOR VALUES FROM (%s) TO (%s)",
+            (lower, upper)
+        )
+
+
+def _month_start(day):
+    return date(day.year, day.month, 1)
+
+
+def _add_months(day, months):
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
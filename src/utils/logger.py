@@ -1 +1,397 @@
-# Configuration des logs
\ No newline at end of file
+import os
+import io
+import json
+import time
+import pstats
+import logging
+import cProfile
+import threading
+import functools
+from contextlib import contextmanager
+from datetime import datetime
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+COUNTERS = ('rows_in', 'rows_out', 'bytes_read', 'bytes_written', 'http_calls')
+
+logger = logging.getLogger(__name__)
+
+
+def setup_logging(level='INFO', log_file=None):
+    """
+    Configure la journalisation de l'application (à appeler une fois, par le point d'entrée)
+
+    Args:
+        level (str, optional): Niveau de journalisation ('DEBUG', 'INFO', ...)
+        log_file (str, optional): Fichier où copier les messages
+    """
+    handlers = [logging.StreamHandler()]
+    if log_file:
+        os.makedirs(os.path.dirname(os.path.abspath(log_file)), exist_ok=True)
+        handlers.append(logging.FileHandler(log_file))
+    logging.basicConfig(level=getattr(logging, str(level).upper(), logging.INFO),
+                        format=LOG_FORMAT, handlers=handlers, force=True)
+
+
+class StageRecord:
+    """
+    Mesures d'une exécution d'étape : durée, compteurs, mémoire et libellés (symbole, source...)
+    """
+
+    def __init__(self, name, labels, parent=None):
+        self.name = name
+        self.labels = labels
+        self.parent = parent
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        # Des tâches rattachées par `bind` peuvent incrémenter l'étape depuis d'autres threads
+        self._lock = threading.Lock()
+        self.started_at = datetime.now()
+        self.duration = None
+        self.status = 'running'
+        self.error = None
+        self.rss_start_mb = _memory_mb('VmRSS:')
+        self.rss_end_mb = None
+        # VmHWM est un pic de tout le processus depuis son démarrage : il borne la mémoire
+        # de l'étape sans lui être propre (étapes concurrentes, étapes précédentes)
+        self.process_peak_rss_mb = None
+        self.profile = None
+
+    def add(self, **counts):
+        """
+        Incrémente des compteurs de l'étape (ex: add(rows_out=120, http_calls=1))
+        """
+        with self._lock:
+            for name, value in counts.items():
+                self.counters[name] = self.counters.get(name, 0) + value
+
+    @property
+    def rss_delta_mb(self):
+        """Variation de la mémoire résidente entre le début et la fin de l'étape"""
+        if self.rss_start_mb is None or self.rss_end_mb is None:
+            return None
+        return round(self.rss_end_mb - self.rss_start_mb, 1)
+
+    def to_dict(self):
+        return {
+            'stage': self.name,
+            'parent': self.parent,
+            'labels': self.labels,
+            'started_at': self.started_at.isoformat(timespec='milliseconds'),
+            'duration_seconds': round(self.duration, 6) if self.duration is not None else None,
+            'status': self.status,
+            'error': self.error,
+            **self.counters,
+            'rss_start_mb': self.rss_start_mb,
+            'rss_end_mb': self.rss_end_mb,
+            'rss_delta_mb': self.rss_delta_mb,
+            'process_peak_rss_mb': self.process_peak_rss_mb,
+            'profile': self.profile
+        }
+
+
+class MetricsRegistry:
+    """
+    Collecte des mesures par étape du pipeline
+
+    Les étapes s'imbriquent (pile propre à chaque thread) : `count` incrémente les
+    compteurs de l'étape en cours du thread appelant, ce qui permet aux modules bas
+    niveau (extracteurs, zone brute, chargeur) de remonter leurs appels HTTP ou
+    octets écrits sans connaître l'étape qui les englobe. Les tâches confiées à un
+    pool de threads sont rattachées à l'étape qui les soumet avec `bind`.
+
+    Le profilage est activé par étape avec `profile=True`, ou par la variable
+    d'environnement ETL_PROFILE_STAGES (noms séparés par des virgules, '*' pour toutes).
+    """
+
+    def __init__(self, profile_dir=None, profile_stages=None):
+        """
+        Args:
+            profile_dir (str, optional): Dossier des profils. Par défaut, logs/profiles
+            profile_stages (iterable, optional): Étapes à profiler. Par défaut, ETL_PROFILE_STAGES
+        """
+        if profile_dir is None:
+            profile_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
+                                       'logs', 'profiles')
+        if profile_stages is None:
+            profile_stages = [s.strip() for s in os.environ.get('ETL_PROFILE_STAGES', '').split(',') if s.strip()]
+        self.profile_dir = profile_dir
+        self.profile_stages = set(profile_stages)
+        self.records = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @contextmanager
+    def stage(self, name, profile=None, profiler='cprofile', **labels):
+        """
+        Context manager mesurant une étape
+
+        Args:
+            name (str): Nom de l'étape (ex: 'extraction', 'indicators')
+            profile (bool, optional): Profiler l'étape. Par défaut, selon ETL_PROFILE_STAGES
+            profiler (str, optional): 'cprofile' (déterministe) ou 'pyinstrument' (échantillonnage,
+                                      si la bibliothèque est installée)
+            **labels: Libellés de l'exécution (symbol='AAPL', source='yahoo_finance'...)
+
+        Yields:
+            StageRecord: Mesures de l'étape, complétées par `add`
+        """
+        stack = self._stack()
+        record = StageRecord(name, labels, parent=stack[-1].name if stack else None)
+        stack.append(record)
+
+        if profile is None:
+            profile = name in self.profile_stages or '*' in self.profile_stages
+        session = _start_profiler(profiler) if profile else None
+
+        start = time.perf_counter()
+        try:
+            yield record
+            record.status = 'success'
+        except Exception as e:
+            record.status = 'error'
+            record.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            record.duration = time.perf_counter() - start
+            if session is not None:
+                record.profile = self._save_profile(session, record)
+            record.rss_end_mb = _memory_mb('VmRSS:')
+            record.process_peak_rss_mb = _memory_mb('VmHWM:')
+            stack.pop()
+            with self._lock:
+                self.records.append(record)
+            logger.debug(f"Étape {name} {labels or ''}: {record.duration:.3f}s {record.counters}")
+
+    def timed(self, name=None, **labels):
+        """
+        Décorateur mesurant chaque appel de la fonction comme une étape
+
+        Args:
+            name (str, optional): Nom de l'étape. Par défaut, le nom qualifié de la fonction
+            **labels: Libellés fixes de l'étape
+        """
+        def decorator(fn):
+            stage_name = name or fn.__qualname__
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.stage(stage_name, **labels):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def count(self, **counts):
+        """
+        Incrémente les compteurs des étapes en cours du thread appelant (sans effet hors étape)
+
+        Les compteurs sont inclusifs : une étape englobante cumule ceux de ses sous-étapes.
+        """
+        for record in self._stack():
+            record.add(**counts)
+
+    def bind(self, fn):
+        """
+        Rattache une fonction exécutée dans un autre thread aux étapes en cours du thread appelant
+
+        À appeler dans le thread qui soumet les tâches (ex: bounded_as_completed(executor,
+        metrics.bind(fetch), ...)) : les `count` et sous-étapes des workers sont alors
+        comptés dans l'étape englobante au lieu d'être perdus.
+
+        Args:
+            fn (callable): Fonction exécutée par les workers
+
+        Returns:
+            callable: Fonction enveloppée
+        """
+        parents = list(self._stack())
+        if not parents:
+            return fn
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            stack = self._stack()
+            depth = len(stack)
+            stack.extend(parents)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                del stack[depth:]
+        return wrapper
+
+    def current(self):
+        """Étape en cours du thread appelant, ou None"""
+        stack = self._stack()
+        return stack[-1] if stack else None
+
+    def summary(self):
+        """
+        Agrège les mesures par étape
+
+        Returns:
+            dict: {étape: {'runs', 'errors', 'duration_seconds', compteurs..., 'process_peak_rss_mb'}}
+        """
+        with self._lock:
+            records = list(self.records)
+
+        summary = {}
+        for record in records:
+            entry = summary.setdefault(record.name, {
+                'runs': 0, 'errors': 0, 'duration_seconds': 0.0, **dict.fromkeys(COUNTERS, 0),
+                'process_peak_rss_mb': 0.0
+            })
+            entry['runs'] += 1
+            entry['errors'] += record.status == 'error'
+            entry['duration_seconds'] += record.duration or 0.0
+            for counter in COUNTERS:
+                entry[counter] += record.counters.get(counter, 0)
+            entry['process_peak_rss_mb'] = max(entry['process_peak_rss_mb'], record.process_peak_rss_mb or 0.0)
+        return summary
+
+    def slowest(self, name=None, n=10):
+        """
+        Exécutions les plus longues, pour identifier l'étape ou le symbole en cause
+
+        Args:
+            name (str, optional): Restreindre à une étape
+            n (int, optional): Nombre d'exécutions restituées
+
+        Returns:
+            list: Enregistrements (dict) triés par durée décroissante
+        """
+        with self._lock:
+            records = [r for r in self.records if name is None or r.name == name]
+        records.sort(key=lambda r: r.duration or 0.0, reverse=True)
+        return [r.to_dict() for r in records[:n]]
+
+    def export_jsonl(self, path, clear=True):
+        """
+        Ajoute les enregistrements à un fichier JSON lines (une exécution d'étape par ligne)
+
+        Args:
+            path (str): Fichier de destination
+            clear (bool, optional): Vider les enregistrements exportés
+        """
+        with self._lock:
+            records = list(self.records)
+            if clear:
+                self.records = []
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'a') as f:
+            for record in records:
+                f.write(json.dumps(record.to_dict(), default=str) + '\n')
+
+    def export_prometheus(self, path, prefix='etl'):
+        """
+        Écrit les mesures agrégées par étape au format textfile de Prometheus (node_exporter)
+
+        Les libellés par symbole ne sont pas exportés, pour borner la cardinalité : le
+        détail reste disponible dans l'export JSON lines.
+
+        Args:
+            path (str): Fichier .prom de destination (remplacé de façon atomique)
+            prefix (str, optional): Préfixe des métriques
+        """
+        metrics = [
+            ('runs', 'counter', "Nombre d'exécutions de l'étape"),
+            ('errors', 'counter', "Nombre d'exécutions en erreur"),
+            ('duration_seconds', 'counter', "Durée cumulée de l'étape"),
+            ('rows_in', 'counter', "Lignes lues"),
+            ('rows_out', 'counter', "Lignes produites"),
+            ('bytes_read', 'counter', "Octets lus"),
+            ('bytes_written', 'counter', "Octets écrits"),
+            ('http_calls', 'counter', "Appels HTTP"),
+            ('process_peak_rss_mb', 'gauge', "Pic de mémoire résidente du processus (non propre à l'étape)")
+        ]
+        summary = self.summary()
+
+        buffer = io.StringIO()
+        for metric, kind, description in metrics:
+            full_name = f"{prefix}_stage_{metric}" + ('_total' if kind == 'counter' else '')
+            buffer.write(f"# HELP {full_name} {description}\n")
+            buffer.write(f"# TYPE {full_name} {kind}\n")
+            for stage_name, values in sorted(summary.items()):
+                buffer.write(f'{full_name}{{stage="{_escape(stage_name)}"}} {values[metric]}\n')
+        buffer.write(f"# TYPE {prefix}_last_export_timestamp_seconds gauge\n")
+        buffer.write(f"{prefix}_last_export_timestamp_seconds {time.time():.0f}\n")
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(buffer.getvalue())
+        os.replace(tmp_path, path)
+
+    def reset(self):
+        """Supprime tous les enregistrements"""
+        with self._lock:
+            self.records = []
+
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _save_profile(self, session, record):
+        kind, profiler = session
+        os.makedirs(self.profile_dir, exist_ok=True)
+        suffix = '_'.join('-'.join(map(str, value)) if isinstance(value, (list, tuple)) else str(value)
+                          for value in record.labels.values())[:80]
+        base = f"{record.name}{'_' + suffix if suffix else ''}_{record.started_at:%Y%m%d_%H%M%S_%f}"
+        try:
+            if kind == 'pyinstrument':
+                profiler.stop()
+                path = os.path.join(self.profile_dir, f"{base}.html")
+                with open(path, 'w') as f:
+                    f.write(profiler.output_html())
+            else:
+                profiler.disable()
+                path = os.path.join(self.profile_dir, f"{base}.prof")
+                profiler.dump_stats(path)
+                text = io.StringIO()
+                pstats.Stats(profiler, stream=text).sort_stats('cumulative').print_stats(15)
+                logger.info(f"Profil de l'étape {record.name} ({path}):\n{text.getvalue()}")
+            return path
+        except Exception as e:
+            logger.warning(f"Impossible d'enregistrer le profil de l'étape {record.name}: {e}")
+            return None
+
+
+def _start_profiler(kind):
+    if kind == 'pyinstrument':
+        try:
+            from pyinstrument import Profiler
+            profiler = Profiler()
+            profiler.start()
+            return 'pyinstrument', profiler
+        except ImportError:
+            logger.warning("pyinstrument n'est pas installé, profilage avec cProfile")
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Un autre profileur est déjà actif (étape imbriquée profilée)
+        return None
+    return 'cprofile', profiler
+
+
+def _memory_mb(field):
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith(field):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+# Registre partagé par tous les modules
+metrics = MetricsRegistry()
+stage = metrics.stage
+timed = metrics.timed
+count = metrics.count
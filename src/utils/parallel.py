@@ -0,0 +1,142 @@
+import os
+import logging
+import traceback
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from src.utils.concurrency import bounded_as_completed
+
+logger = logging.getLogger(__name__)
+
+
+class ShardedExecutor:
+    """
+    Exécute une étape de transformation par lots de symboles (shards) sur un pool de processus
+
+    Les lignes sont réparties en shards de symboles entiers, d'environ `shard_size`
+    lignes, traités en parallèle par une fonction `fn(frame, **kwargs) -> DataFrame`.
+    Les résultats sont réassemblés dans l'ordre des shards, quel que soit leur ordre
+    de terminaison.
+
+    Les erreurs sont isolées : si un shard échoue, ses symboles sont retraités un à
+    un et seuls les symboles fautifs sont écartés (et listés dans `failures`).
+    """
+
+    def __init__(self, max_workers=None, shard_size=None, shards_per_worker=4, kind='process'):
+        """
+        Args:
+            max_workers (int, optional): Nombre de workers. Par défaut, le nombre de cœurs
+            shard_size (int, optional): Nombre de lignes visé par shard. Par défaut, calculé
+                                        pour obtenir `shards_per_worker` shards par worker
+            shards_per_worker (int, optional): Nombre de shards par worker lorsque shard_size
+                                               n'est pas fixé (équilibre la charge)
+            kind (str, optional): 'process', 'thread' ou 'serial' (exécution dans le processus
+                                  appelant, utile pour le débogage)
+        """
+        if kind not in ('process', 'thread', 'serial'):
+            raise ValueError(f"Type d'exécuteur inconnu: {kind}")
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.shard_size = shard_size
+        self.shards_per_worker = shards_per_worker
+        self.kind = kind
+        self.failures = {}
+
+    def map(self, fn, frame, key='symbol', **kwargs):
+        """
+        Applique `fn` à chaque shard de symboles et concatène les résultats
+
+        Args:
+            fn (callable): Fonction de niveau module (sérialisable) recevant un DataFrame
+                           de symboles entiers et renvoyant un DataFrame
+            frame (pandas.DataFrame): Données à traiter
+            key (str, optional): Colonne identifiant le symbole
+            **kwargs: Arguments supplémentaires transmis à `fn`
+
+        Returns:
+            pandas.DataFrame: Résultats concaténés dans l'ordre des shards
+        """
+        self.failures = {}
+        if frame is None:
+            return pd.DataFrame()
+        if frame.empty:
+            return fn(frame, **kwargs)
+
+        shards = self.shard(frame, key)
+        results = [None] * len(shards)
+        tasks = [(i, fn, shard, key, kwargs) for i, shard in enumerate(shards)]
+
+        if self.kind == 'serial' or self.max_workers == 1 or len(shards) == 1:
+            outcomes = (_run_shard(task) for task in tasks)
+            for index, result, failures in outcomes:
+                results[index] = result
+                self.failures.update(failures)
+        else:
+            pool_class = ProcessPoolExecutor if self.kind == 'process' else ThreadPoolExecutor
+            with pool_class(max_workers=self.max_workers) as executor:
+                # Au plus deux shards en attente par worker : la mémoire reste bornée
+                for task, future in bounded_as_completed(executor, _run_shard, tasks, 2 * self.max_workers):
+                    index, result, failures = future.result()
+                    results[index] = result
+                    self.failures.update(failures)
+
+        for symbol, error in self.failures.items():
+            logger.error(f"Shard {fn.__name__}: symbole {symbol} écarté: {error}")
+
+        results = [result for result in results if result is not None and not result.empty]
+        if not results:
+            return pd.DataFrame(columns=frame.columns)
+        return pd.concat(results, ignore_index=True)
+
+    def shard(self, frame, key='symbol'):
+        """
+        Découpe un DataFrame en shards de symboles entiers
+
+        Args:
+            frame (pandas.DataFrame): Données à découper
+            key (str, optional): Colonne identifiant le symbole
+
+        Returns:
+            list: DataFrames, chacun contenant toutes les lignes de ses symboles
+        """
+        codes, _ = pd.factorize(frame[key], sort=True)
+        # Les lignes sans symbole (code -1) sont écartées
+        valid = np.flatnonzero(codes >= 0)
+        order = valid[np.argsort(codes[valid], kind='stable')]
+        counts = np.bincount(codes[valid])
+
+        shard_size = self.shard_size or max(len(frame) // (self.max_workers * self.shards_per_worker), 1)
+
+        # Bornes des shards : on coupe après le symbole qui fait dépasser shard_size
+        boundaries = [0]
+        rows = 0
+        for count in counts:
+            rows += int(count)
+            if rows - boundaries[-1] >= shard_size:
+                boundaries.append(rows)
+        if boundaries[-1] != rows:
+            boundaries.append(rows)
+
+        return [frame.iloc[order[start:stop]] for start, stop in zip(boundaries[:-1], boundaries[1:])]
+
+
+def _run_shard(task):
+    index, fn, frame, key, kwargs = task
+    try:
+        return index, fn(frame, **kwargs), {}
+    except Exception:
+        pass
+
+    # Le shard a échoué : isoler le ou les symboles fautifs
+    results = []
+    failures = {}
+    for symbol, group in frame.groupby(key, sort=False, observed=True):
+        try:
+            results.append(fn(group, **kwargs))
+        except Exception as e:
+            failures[symbol] = f"{type(e).__name__}: {e}"
+            logger.debug(traceback.format_exc())
+
+    result = pd.concat(results, ignore_index=True) if results else None
+    return index, result, failures
@@ -0,0 +1,197 @@
+import queue
+import logging
+import threading
+
+from src.utils.logger import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class PipelineCancelled(Exception):
+    """Levée par Pipeline.run lorsque l'exécution a été annulée"""
+
+
+class Stage:
+    """
+    Étape d'un pipeline : une fonction appliquée à chaque élément par un groupe de workers
+    """
+
+    def __init__(self, name, fn, workers=1, queue_size=None):
+        """
+        Args:
+            name (str): Nom de l'étape (utilisé pour les mesures et les journaux)
+            fn (callable): Fonction appliquée à chaque élément. Son résultat est transmis à
+                           l'étape suivante, sauf s'il vaut None
+            workers (int, optional): Nombre de threads de l'étape
+            queue_size (int, optional): Capacité de la file d'entrée de l'étape. Par défaut,
+                                        celle du pipeline
+        """
+        self.name = name
+        self.fn = fn
+        self.workers = max(int(workers), 1)
+        self.queue_size = queue_size
+
+
+class Pipeline:
+    """
+    Enchaîne des étapes reliées par des files bornées
+
+    Chaque étape a ses propres workers : pendant que l'étape de chargement écrit
+    un lot, la transformation traite le suivant et l'extraction télécharge les
+    lots d'après. La durée totale tend vers celle de l'étape la plus lente plutôt
+    que vers la somme des étapes.
+
+    Les files sont bornées : une étape rapide attend lorsque la suivante est en
+    retard (contre-pression), ce qui plafonne la mémoire. Une erreur sur un élément
+    est journalisée et l'élément abandonné, sauf avec fail_fast, qui annule tout
+    le pipeline. `cancel` arrête proprement tous les workers.
+    """
+
+    _END = object()
+    _POLL_SECONDS = 0.2
+
+    def __init__(self, stages, queue_size=4, fail_fast=False):
+        """
+        Args:
+            stages (list): Étapes (Stage) dans l'ordre d'exécution
+            queue_size (int, optional): Capacité par défaut des files entre étapes
+            fail_fast (bool, optional): Annuler le pipeline à la première erreur
+        """
+        if not stages:
+            raise ValueError("Un pipeline nécessite au moins une étape")
+        self.stages = list(stages)
+        self.queue_size = queue_size
+        self.fail_fast = fail_fast
+        self.errors = []
+        self.stats = {}
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+
+    def cancel(self):
+        """
+        Demande l'arrêt du pipeline : les workers terminent l'élément en cours puis s'arrêtent
+        """
+        if not self._cancelled.is_set():
+            logger.warning("Annulation du pipeline demandée")
+            self._cancelled.set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def run(self, items):
+        """
+        Fait passer les éléments dans toutes les étapes
+
+        Args:
+            items (iterable): Éléments d'entrée de la première étape (ex: lots de symboles)
+
+        Returns:
+            dict: Statistiques par étape {nom: {'processed', 'emitted', 'failed'}}
+
+        Raises:
+            PipelineCancelled: Si le pipeline a été annulé avant la fin
+        """
+        self.errors = []
+        self.stats = {stage.name: {'processed': 0, 'emitted': 0, 'failed': 0} for stage in self.stages}
+
+        queues = [queue.Queue(maxsize=stage.queue_size or self.queue_size) for stage in self.stages]
+        remaining = [stage.workers for stage in self.stages]
+        threads = []
+
+        for position, stage in enumerate(self.stages):
+            for n in range(stage.workers):
+                thread = threading.Thread(
+                    target=self._work, args=(position, queues, remaining),
+                    name=f"{stage.name}-{n}", daemon=True
+                )
+                thread.start()
+                threads.append(thread)
+
+        try:
+            for item in items:
+                if not self._put(queues[0], item):
+                    break
+            for _ in range(self.stages[0].workers):
+                self._put(queues[0], self._END)
+
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(self._POLL_SECONDS)
+        except BaseException:
+            # Interruption (Ctrl+C) ou erreur du générateur d'entrée
+            self.cancel()
+            raise
+        finally:
+            for thread in threads:
+                thread.join()
+
+        if self.cancelled:
+            raise PipelineCancelled(f"Pipeline annulé ({len(self.errors)} erreurs)")
+        return self.stats
+
+    def _work(self, position, queues, remaining):
+        stage = self.stages[position]
+        inbox = queues[position]
+        outbox = queues[position + 1] if position + 1 < len(queues) else None
+
+        while not self.cancelled:
+            try:
+                item = inbox.get(timeout=self._POLL_SECONDS)
+            except queue.Empty:
+                continue
+            if item is self._END:
+                break
+
+            try:
+                with metrics.stage(stage.name, **_item_labels(item)):
+                    result = stage.fn(item)
+            except Exception as e:
+                logger.error(f"Étape {stage.name}: élément abandonné ({type(e).__name__}: {e})")
+                self._record(stage.name, 'failed')
+                with self._lock:
+                    self.errors.append((stage.name, e))
+                if self.fail_fast:
+                    self.cancel()
+                continue
+
+            self._record(stage.name, 'processed')
+            if result is not None and outbox is not None:
+                if not self._put(outbox, result):
+                    break
+                self._record(stage.name, 'emitted')
+
+        # Le dernier worker d'une étape signale la fin de flux à l'étape suivante
+        with self._lock:
+            remaining[position] -= 1
+            last = remaining[position] == 0
+        if last and outbox is not None:
+            for _ in range(self.stages[position + 1].workers):
+                self._put(outbox, self._END)
+
+    def _put(self, target, item):
+        # Attente interruptible : un worker bloqué par la contre-pression voit l'annulation
+        while not self.cancelled:
+            try:
+                target.put(item, timeout=self._POLL_SECONDS)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _record(self, stage_name, field):
+        with self._lock:
+            self.stats[stage_name][field] += 1
+
+
+def _item_labels(item):
+    # Libellés des mesures d'un élément : symboles d'un lot (liste de symboles, DataFrame
+    # avec une colonne 'symbol', ou tuple dont le premier élément en porte)
+    if isinstance(item, tuple) and item:
+        return _item_labels(item[0])
+    if isinstance(item, list) and item and all(isinstance(value, str) for value in item):
+        return {'symbols': item}
+    columns = getattr(item, 'columns', None)
+    if columns is not None and 'symbol' in columns:
+        return {'symbols': sorted(str(symbol) for symbol in item['symbol'].dropna().unique())}
+    return {}
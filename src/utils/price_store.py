@@ -0,0 +1,308 @@
+import os
+import json
+import logging
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+class PriceStore:
+    """
+    Stockage compact en colonnes des cours OHLCV de tout un univers de symboles
+
+    Les lignes sont triées par symbole puis par date et chaque colonne est un
+    tableau numpy contigu. Les symboles sont stockés une seule fois (dictionnaire
+    `symbols`) : le symbole i occupe les lignes offsets[i]:offsets[i+1]. Une plage
+    de dates d'un symbole se retrouve par recherche dichotomique (O(log n)) et les
+    tranches renvoyées sont des vues, sans copie.
+
+    Toutes les colonnes peuvent être placées dans un seul segment de mémoire partagée
+    (`share` / `attach`) ou dans des fichiers .npy projetés en mémoire (`save` /
+    `load`) : des processus de travail y accèdent alors sans copie ni sérialisation.
+
+    `close` et `offsets` ont le format attendu par FinancialIndicators.compute_arrays.
+
+    Le store est une brique de bibliothèque : aucun job ne l'utilise encore. Il ne
+    remplace pas les shards sérialisés de ShardedExecutor pour le nettoyage : sa
+    construction et sa copie en mémoire partagée coûtent plus que la sérialisation
+    des shards, et le retour des résultats, qui domine, reste sérialisé. Il vise les
+    traitements qui relisent plusieurs fois l'historique complet de l'univers.
+    """
+
+    # Le volume est stocké en flottant pour représenter les valeurs manquantes (NaN) ;
+    # les volumes sont exacts jusqu'à 2**53
+    COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+    DATE_DTYPE = 'datetime64[D]'
+    _ALIGNMENT = 64
+
+    def __init__(self, symbols, offsets, dates, columns, _buffer=None):
+        """
+        Args:
+            symbols (list): Symboles, dans l'ordre de stockage
+            offsets (numpy.ndarray): Bornes des symboles (len(symbols) + 1 valeurs)
+            dates (numpy.ndarray): Dates des séances, croissantes au sein de chaque symbole
+            columns (dict): Tableaux des colonnes, alignés sur `dates`
+        """
+        self.symbols = list(symbols)
+        self.offsets = offsets
+        self.dates = dates
+        self.columns = columns
+        self._index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        # Segment de mémoire partagée ou fichiers projetés maintenus ouverts par le store
+        self._buffer = _buffer
+
+    @classmethod
+    def from_frame(cls, df, date_column='date', columns=None):
+        """
+        Construit le store à partir d'un DataFrame de prix
+
+        Les doublons (symbole, date) sont supprimés, la dernière ligne l'emporte.
+
+        Args:
+            df (pandas.DataFrame): Données avec les colonnes 'symbol', date et OHLCV
+            date_column (str, optional): Colonne des dates
+            columns (tuple, optional): Colonnes numériques à stocker. Par défaut, COLUMNS
+                                       (les colonnes absentes du DataFrame sont ignorées)
+
+        Returns:
+            PriceStore: Store construit
+        """
+        columns = [col for col in (columns or cls.COLUMNS) if col in df.columns]
+
+        codes, symbols = pd.factorize(df['symbol'], sort=True)
+        dates = pd.to_datetime(df[date_column])
+        if dates.dt.tz is not None:
+            # Dates localisées (Yahoo Finance) : on conserve la date du marché
+            dates = dates.dt.tz_localize(None)
+        dates = dates.to_numpy().astype(cls.DATE_DTYPE)
+
+        order = np.lexsort((dates, codes))
+        codes, dates = codes[order], dates[order]
+
+        # Dernière occurrence de chaque couple (symbole, date)
+        keep = np.ones(len(order), dtype=bool)
+        keep[:-1] = (codes[1:] != codes[:-1]) | (dates[1:] != dates[:-1])
+        order, codes, dates = order[keep], codes[keep], dates[keep]
+
+        data = {col: df[col].to_numpy(dtype=np.float64)[order] for col in columns}
+        offsets = np.searchsorted(codes, np.arange(len(symbols) + 1)).astype(np.int64)
+
+        return cls([str(symbol) for symbol in symbols], offsets, dates, data)
+
+    def to_frame(self, symbols=None, start=None, end=None):
+        """
+        Reconstitue un DataFrame (symbole catégoriel) pour des symboles et une période
+
+        Args:
+            symbols (list, optional): Symboles à restituer. Par défaut, tous
+            start (str|date, optional): Première date incluse
+            end (str|date, optional): Dernière date incluse
+
+        Returns:
+            pandas.DataFrame: Colonnes 'symbol', 'date' et colonnes numériques
+        """
+        symbols = self.symbols if symbols is None else [s for s in symbols if s in self._index]
+        ranges = [self.date_range(symbol, start, end) for symbol in symbols]
+        rows = np.concatenate([np.arange(lo, hi) for lo, hi in ranges]) if ranges else np.array([], dtype=np.int64)
+        codes = np.repeat(np.arange(len(symbols)), [hi - lo for lo, hi in ranges])
+
+        frame = pd.DataFrame({
+            'symbol': pd.Categorical.from_codes(codes, categories=symbols),
+            'date': self.dates[rows].astype('datetime64[ns]')
+        })
+        for name, values in self.columns.items():
+            frame[name] = values[rows]
+        return frame
+
+    def symbol_range(self, symbol):
+        """
+        Retourne les bornes (début, fin) des lignes d'un symbole
+
+        Args:
+            symbol (str): Symbole boursier
+
+        Returns:
+            tuple: (début, fin), (0, 0) si le symbole est inconnu
+        """
+        i = self._index.get(symbol)
+        if i is None:
+            return 0, 0
+        return int(self.offsets[i]), int(self.offsets[i + 1])
+
+    def date_range(self, symbol, start=None, end=None):
+        """
+        Retourne les bornes des lignes d'un symbole comprises entre deux dates (incluses)
+
+        Args:
+            symbol (str): Symbole boursier
+            start (str|date, optional): Première date incluse
+            end (str|date, optional): Dernière date incluse
+
+        Returns:
+            tuple: (début, fin) en indices de ligne
+        """
+        lo, hi = self.symbol_range(symbol)
+        dates = self.dates[lo:hi]
+        first = lo + (np.searchsorted(dates, np.datetime64(start, 'D'), side='left') if start is not None else 0)
+        last = lo + (np.searchsorted(dates, np.datetime64(end, 'D'), side='right') if end is not None else hi - lo)
+        return int(first), int(last)
+
+    def locate(self, symbol, date):
+        """
+        Retourne l'indice de la ligne d'un symbole à une date
+
+        Args:
+            symbol (str): Symbole boursier
+            date (str|date): Date de la séance
+
+        Returns:
+            int: Indice de la ligne, -1 si la séance est absente
+        """
+        lo, hi = self.date_range(symbol, date, date)
+        return lo if hi > lo else -1
+
+    def slice(self, symbol, start=None, end=None):
+        """
+        Retourne les données d'un symbole sur une période, sous forme de vues
+
+        Args:
+            symbol (str): Symbole boursier
+            start (str|date, optional): Première date incluse
+            end (str|date, optional): Dernière date incluse
+
+        Returns:
+            dict: {'date': ..., colonne: ...}, tableaux partageant la mémoire du store
+        """
+        lo, hi = self.date_range(symbol, start, end)
+        result = {'date': self.dates[lo:hi]}
+        for name, values in self.columns.items():
+            result[name] = values[lo:hi]
+        return result
+
+    def __len__(self):
+        return len(self.dates)
+
+    @property
+    def nbytes(self):
+        """Mémoire occupée par les tableaux du store, en octets"""
+        return self.offsets.nbytes + self.dates.nbytes + sum(v.nbytes for v in self.columns.values())
+
+    def share(self, name=None):
+        """
+        Copie le store dans un segment de mémoire partagée
+
+        Le descripteur renvoyé est léger et sérialisable : il se transmet aux processus
+        de travail, qui s'y rattachent avec `PriceStore.attach` sans copier les données.
+        Le processus propriétaire doit appeler `unlink` sur le store partagé une fois
+        le traitement terminé.
+
+        Args:
+            name (str, optional): Nom du segment. Par défaut, un nom unique est généré
+
+        Returns:
+            tuple: (PriceStore adossé au segment, descripteur)
+        """
+        arrays = self._arrays()
+        layout, size = self._layout(arrays)
+
+        shm = shared_memory.SharedMemory(name=name, create=True, size=max(size, 1))
+        for (key, dtype, offset, length), values in zip(layout, arrays.values()):
+            np.ndarray(length, dtype=dtype, buffer=shm.buf, offset=offset)[:] = values
+
+        descriptor = {'shm_name': shm.name, 'symbols': self.symbols, 'layout': layout}
+        logger.info(f"Store partagé dans le segment {shm.name} ({size} octets)")
+        return self._from_buffer(shm, descriptor), descriptor
+
+    @classmethod
+    def attach(cls, descriptor):
+        """
+        Se rattache à un store partagé par `share`
+
+        Args:
+            descriptor (dict): Descripteur renvoyé par `share`
+
+        Returns:
+            PriceStore: Store en lecture adossé au segment partagé
+        """
+        shm = shared_memory.SharedMemory(name=descriptor['shm_name'])
+        return cls._from_buffer(shm, descriptor)
+
+    def close(self):
+        """
+        Détache le store de son segment partagé ou de ses fichiers projetés
+        """
+        buffer, self._buffer = self._buffer, None
+        if isinstance(buffer, shared_memory.SharedMemory):
+            # Les vues numpy doivent être libérées avant la fermeture du segment
+            self.offsets = self.dates = None
+            self.columns = {}
+            buffer.close()
+
+    def unlink(self):
+        """
+        Détruit le segment de mémoire partagée (à appeler par le processus propriétaire)
+        """
+        buffer = self._buffer
+        self.close()
+        if isinstance(buffer, shared_memory.SharedMemory):
+            buffer.unlink()
+
+    def save(self, path):
+        """
+        Sauvegarde le store dans un dossier de fichiers .npy
+
+        Args:
+            path (str): Dossier de destination
+        """
+        os.makedirs(path, exist_ok=True)
+        for key, values in self._arrays().items():
+            np.save(os.path.join(path, f"{key}.npy"), values)
+        with open(os.path.join(path, 'symbols.json'), 'w') as f:
+            json.dump({'symbols': self.symbols, 'columns': list(self.columns)}, f)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """
+        Charge un store sauvegardé par `save`
+
+        Args:
+            path (str): Dossier du store
+            mmap (bool, optional): Projeter les fichiers en mémoire (lecture seule, partagée
+                                   entre processus par le cache du système) plutôt que les lire
+
+        Returns:
+            PriceStore: Store chargé
+        """
+        with open(os.path.join(path, 'symbols.json'), 'r') as f:
+            meta = json.load(f)
+
+        mmap_mode = 'r' if mmap else None
+        offsets = np.load(os.path.join(path, 'offsets.npy'), mmap_mode=mmap_mode)
+        dates = np.load(os.path.join(path, 'dates.npy'), mmap_mode=mmap_mode)
+        columns = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode)
+                   for name in meta['columns']}
+        return cls(meta['symbols'], offsets, dates, columns, _buffer=path if mmap else None)
+
+    def _arrays(self):
+        return {'offsets': self.offsets, 'dates': self.dates, **self.columns}
+
+    def _layout(self, arrays):
+        layout = []
+        position = 0
+        for key, values in arrays.items():
+            # Chaque tableau commence sur une frontière de ligne de cache
+            position = -(-position // self._ALIGNMENT) * self._ALIGNMENT
+            layout.append((key, values.dtype.str, position, len(values)))
+            position += values.nbytes
+        return layout, position
+
+    @classmethod
+    def _from_buffer(cls, shm, descriptor):
+        arrays = {key: np.ndarray(length, dtype=np.dtype(dtype), buffer=shm.buf, offset=offset)
+                  for key, dtype, offset, length in descriptor['layout']}
+        offsets = arrays.pop('offsets')
+        dates = arrays.pop('dates')
+        return cls(descriptor['symbols'], offsets, dates, arrays, _buffer=shm)
@@ -0,0 +1,106 @@
+import logging
+import threading
+import time
+from datetime import date
+
+logger = logging.getLogger(__name__)
+
+
+class QuotaExceededError(Exception):
+    """Levée lorsque le quota journalier de l'API est épuisé"""
+
+
+class RateLimiter:
+    """
+    Limiteur de débit à seau de jetons partagé entre threads
+
+    Le seau se remplit au rythme du quota par minute ; chaque appel consomme un
+    jeton. Un quota journalier optionnel est compté séparément. Lorsque l'API
+    signale un dépassement, `backoff` suspend tous les appels pendant une durée
+    qui double à chaque signal consécutif.
+    """
+
+    def __init__(self, calls_per_minute, calls_per_day=None, burst=1, max_backoff=300):
+        """
+        Args:
+            calls_per_minute (float): Nombre d'appels autorisés par minute
+            calls_per_day (int, optional): Nombre d'appels autorisés par jour. Par défaut, illimité
+            burst (int, optional): Taille du seau (appels pouvant partir d'un coup). Par défaut 1,
+                                   ce qui espace régulièrement les appels
+            max_backoff (float, optional): Pause maximale en secondes après un signal de dépassement
+        """
+        self.rate = calls_per_minute / 60.0
+        self.capacity = float(max(burst, 1))
+        self.calls_per_day = calls_per_day
+        self.max_backoff = max_backoff
+
+        self._tokens = self.capacity
+        self._last_refill = time.monotonic()
+        self._paused_until = 0.0
+        self._penalty = 0.0
+        self._day = date.today()
+        self._day_count = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Bloque jusqu'à ce qu'un appel soit autorisé puis le comptabilise
+
+        Raises:
+            QuotaExceededError: Si le quota journalier est atteint
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+
+                if date.today() != self._day:
+                    self._day = date.today()
+                    self._day_count = 0
+                if self.calls_per_day is not None and self._day_count >= self.calls_per_day:
+                    raise QuotaExceededError(f"Quota journalier de {self.calls_per_day} appels atteint")
+
+                if now >= self._paused_until and self._tokens >= 1:
+                    self._tokens -= 1
+                    self._day_count += 1
+                    return
+
+                wait = max(self._paused_until - now, (1 - self._tokens) / self.rate)
+            time.sleep(wait)
+
+    def backoff(self):
+        """
+        Signale un dépassement de débit renvoyé par l'API
+
+        Le seau est vidé et les appels sont suspendus pendant une pause croissante.
+
+        Returns:
+            float: Durée de la pause appliquée, en secondes
+        """
+        with self._lock:
+            self._penalty = min(max(self._penalty * 2, 1 / self.rate), self.max_backoff)
+            self._tokens = 0.0
+            self._paused_until = time.monotonic() + self._penalty
+            logger.warning(f"Rate limit signalé par l'API, pause de {self._penalty:.1f}s")
+            return self._penalty
+
+    def record_success(self):
+        """
+        Réinitialise la pause adaptative après un appel accepté
+        """
+        with self._lock:
+            self._penalty = 0.0
+
+    @property
+    def remaining_today(self):
+        """Nombre d'appels restants sur le quota journalier (None si illimité)"""
+        if self.calls_per_day is None:
+            return None
+        with self._lock:
+            if date.today() != self._day:
+                return self.calls_per_day
+            return max(self.calls_per_day - self._day_count, 0)
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
@@ -0,0 +1,86 @@
+import os
+import re
+import logging
+from datetime import datetime
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+class ReportRunner:
+    """
+    Exécute les requêtes nommées de sql/queries/reporting_queries.sql
+
+    Chaque requête est délimitée par `-- BEGIN NOM` et `-- END NOM`. Les rapports
+    hebdomadaire et mensuel lisent les agrégats analytics.weekly_rollup et
+    analytics.monthly_rollup (tenus à jour par DatabaseMaintenance.refresh_rollups) :
+    leur durée ne dépend que du nombre de symboles, pas de la profondeur de l'historique.
+    """
+
+    _BLOCK_PATTERN = re.compile(r'^-- BEGIN (\w+)[ \t]*\n(.*?)^-- END \1\b', re.MULTILINE | re.DOTALL)
+
+    def __init__(self, db_connector, queries_path=None, output_dir=None):
+        """
+        Args:
+            db_connector (DatabaseConnector): Connecteur partagé (pool de connexions)
+            queries_path (str, optional): Fichier des requêtes. Par défaut, sql/queries/reporting_queries.sql
+            output_dir (str, optional): Dossier des exports. Par défaut, data/reports
+        """
+        base_dir = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+        self.db = db_connector
+        self.queries_path = queries_path or os.path.join(base_dir, 'sql', 'queries', 'reporting_queries.sql')
+        self.output_dir = output_dir or os.path.join(base_dir, 'data', 'reports')
+        self._queries = None
+
+    @property
+    def queries(self):
+        """Requêtes nommées du fichier, lues une seule fois"""
+        if self._queries is None:
+            with open(self.queries_path, 'r') as f:
+                text = f.read()
+            self._queries = {name: sql.strip() for name, sql in self._BLOCK_PATTERN.findall(text)}
+        return self._queries
+
+    def run(self, name, params=None):
+        """
+        Exécute une requête nommée
+
+        Args:
+            name (str): Nom du bloc (ex: 'WEEKLY_REPORT')
+            params (dict, optional): Paramètres de la requête
+
+        Returns:
+            pandas.DataFrame: Résultat de la requête
+        """
+        if name not in self.queries:
+            raise KeyError(f"Requête inconnue: {name} (disponibles: {sorted(self.queries)})")
+
+        with self.db.cursor() as cursor:
+            cursor.execute(self.queries[name], params)
+            rows = cursor.fetchall()
+            columns = [col[0] for col in cursor.description]
+
+        report = pd.DataFrame.from_records(rows, columns=columns)
+        logger.info(f"Rapport {name}: {len(report)} lignes")
+        return report
+
+    def export(self, name, params=None, run_date=None):
+        """
+        Exécute une requête nommée et écrit son résultat en CSV
+
+        Args:
+            name (str): Nom du bloc
+            params (dict, optional): Paramètres de la requête
+            run_date (datetime, optional): Date portée par le nom du fichier. Par défaut, maintenant
+
+        Returns:
+            str: Chemin du fichier écrit
+        """
+        report = self.run(name, params)
+        run_date = run_date or datetime.now()
+        os.makedirs(self.output_dir, exist_ok=True)
+        path = os.path.join(self.output_dir, f"{name.lower()}_{run_date:%Y%m%d}.csv")
+        report.to_csv(path, index=False)
+        logger.info(f"Rapport {name} exporté dans {path}")
+        return path
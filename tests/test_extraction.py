@@ -0,0 +1,191 @@
+import os
+
+import pytest
+
+pd = pytest.importorskip('pandas')
+
+from src.extraction.alpha_vantage import AlphaVantageExtractor  # noqa: E402
+from src.extraction.raw_store import RawDataStore  # noqa: E402
+from src.extraction.response_cache import CacheMissError, ResponseCache  # noqa: E402
+
+BASE_URL = "https://www.alphavantage.co/query"
+
+
+def _alpha_vantage(tmp_path, responses):
+    # Extracteur sans configuration ni session : seules la mise en cache et la décision
+    # de stockage sont exercées, les réponses de l'API sont fournies par le test
+    extractor = AlphaVantageExtractor.__new__(AlphaVantageExtractor)
+    extractor.base_url = BASE_URL
+    extractor.cache = ResponseCache(cache_dir=str(tmp_path / 'cache'))
+    responses = iter(responses)
+    extractor._request_api = lambda params: next(responses)
+    return extractor
+
+
+@pytest.mark.parametrize('payload', [
+    {},
+    {"Error Message": "Invalid API call."},
+    {"Information": "The **demo** API key is for demo purposes only."},
+    {"Information": "Thank you for using Alpha Vantage! This is a premium endpoint."},
+    {"Note": "Thank you for using Alpha Vantage!"},
+    '{"Error Message": "Invalid API call."}',
+    ''
+])
+def test_alpha_vantage_error_payloads_are_not_cached(tmp_path, payload):
+    extractor = _alpha_vantage(tmp_path, [payload, {"Symbol": "AAPL"}])
+    params = {"function": "OVERVIEW", "symbol": "AAPL", "apikey": "bad"}
+
+    assert extractor._request(params, 'overview') == payload
+    # Clé corrigée : la réponse suivante vient de l'API, pas de l'erreur en cache
+    assert extractor._request({**params, "apikey": "good"}, 'overview') == {"Symbol": "AAPL"}
+    assert extractor.cache.stats['stores'] == 1
+
+
+@pytest.mark.parametrize('payload', [
+    {"Symbol": "AAPL", "Name": "Apple Inc"},
+    "timestamp,open,high,low,close\n2024-01-02,1,2,0.5,1.5\n"
+])
+def test_alpha_vantage_valid_payloads_are_cached(tmp_path, payload):
+    extractor = _alpha_vantage(tmp_path, [payload])
+    params = {"function": "OVERVIEW", "symbol": "AAPL", "apikey": "key"}
+
+    assert extractor._request(params, 'overview') == payload
+    # Servie depuis le cache : l'API n'est plus appelée
+    assert extractor._request(params, 'overview') == payload
+    assert extractor.cache.stats['hits'] == 1
+
+
+class Loader:
+    """Appel d'API simulé qui compte ses appels"""
+
+    def __init__(self, payload):
+        self.payload = payload
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.payload
+
+
+def test_cache_serves_fresh_entries_without_calling_the_api(tmp_path):
+    cache = ResponseCache(cache_dir=str(tmp_path))
+    loader = Loader({'price': 1})
+
+    assert cache.fetch('quote', {'symbol': 'AAPL'}, 'overview', loader) == {'price': 1}
+    assert cache.fetch('quote', {'symbol': 'AAPL'}, 'overview', loader) == {'price': 1}
+    assert loader.calls == 1
+
+
+def test_cache_key_ignores_parameter_order_and_api_key():
+    cache = ResponseCache(mode='disabled')
+
+    assert (cache.make_key('quote', {'symbol': 'AAPL', 'apikey': 'a', 'interval': '1d'})
+            == cache.make_key('quote', {'interval': '1d', 'symbol': 'AAPL', 'apikey': 'b'}))
+
+
+def test_cache_entries_expire_after_their_ttl(tmp_path):
+    cache = ResponseCache(cache_dir=str(tmp_path), ttls={'intraday': 0, 'overview': 3600})
+    intraday, overview = Loader('bars'), Loader('info')
+
+    for _ in range(2):
+        cache.fetch('history', {'symbol': 'AAPL'}, 'intraday', intraday)
+        cache.fetch('info', {'symbol': 'AAPL'}, 'overview', overview)
+
+    assert intraday.calls == 2
+    assert overview.calls == 1
+
+
+def test_cache_evicts_least_recently_used_entries(tmp_path):
+    payload = 'x' * 4000
+    cache = ResponseCache(cache_dir=str(tmp_path), max_bytes=10_000)
+    for symbol in ('A', 'B'):
+        cache.fetch('quote', {'symbol': symbol}, 'overview', Loader(payload))
+
+    # A utilisée plus récemment que B (horodatages fixés pour ne pas dépendre de l'horloge)
+    path_a = cache._path(cache.make_key('quote', {'symbol': 'A'}))
+    path_b = cache._path(cache.make_key('quote', {'symbol': 'B'}))
+    os.utime(path_b, (1_000, 1_000))
+    os.utime(path_a, (2_000, 2_000))
+    cache.fetch('quote', {'symbol': 'C'}, 'overview', Loader(payload))
+
+    assert not os.path.exists(path_b)
+    assert os.path.exists(path_a)
+    assert cache.stats['evictions'] == 1
+
+
+def test_replay_mode_never_calls_the_api(tmp_path):
+    ResponseCache(cache_dir=str(tmp_path), mode='record').fetch('quote', {'symbol': 'AAPL'}, 'intraday',
+                                                                 Loader('recorded'))
+    replay = ResponseCache(cache_dir=str(tmp_path), mode='replay', ttls={'intraday': 0})
+    loader = Loader('live')
+
+    # En rejeu, une entrée expirée reste servie ; une entrée absente est une erreur
+    assert replay.fetch('quote', {'symbol': 'AAPL'}, 'intraday', loader) == 'recorded'
+    with pytest.raises(CacheMissError):
+        replay.fetch('quote', {'symbol': 'MSFT'}, 'intraday', loader)
+    assert loader.calls == 0
+
+
+def test_cache_stores_only_cacheable_payloads(tmp_path):
+    cache = ResponseCache(cache_dir=str(tmp_path))
+    loader = Loader({'error': 'quota'})
+
+    for _ in range(2):
+        cache.fetch('quote', {'symbol': 'AAPL'}, 'overview', loader, cacheable=lambda data: 'error' not in data)
+    cache.fetch('quote', {'symbol': 'MSFT'}, 'overview', Loader(None))
+
+    assert loader.calls == 2
+    assert cache.stats['stores'] == 0
+
+
+def _prices(symbol, dates, close):
+    return pd.DataFrame({'symbol': symbol, 'date': pd.to_datetime(dates), 'close': close})
+
+
+def test_raw_store_merges_and_deduplicates_across_year_partitions(tmp_path):
+    store = RawDataStore(str(tmp_path))
+    store.write(_prices('AAPL', ['2023-12-28', '2023-12-29'], [1.0, 2.0]), 'yahoo_finance', 'historical_1d')
+    # Fenêtre chevauchante : la séance du 29 est corrigée, une séance de janvier est ajoutée
+    store.write(_prices('AAPL', ['2023-12-29', '2024-01-02'], [2.5, 3.0]), 'yahoo_finance', 'historical_1d')
+
+    years = [year for year, _ in store._year_partitions('yahoo_finance', 'historical_1d', 'AAPL')]
+    data = store.read('yahoo_finance', 'historical_1d').sort_values('date', ignore_index=True)
+
+    assert years == [2023, 2024]
+    assert data['date'].dt.strftime('%Y-%m-%d').tolist() == ['2023-12-28', '2023-12-29', '2024-01-02']
+    assert data['close'].tolist() == [1.0, 2.5, 3.0]
+
+
+def test_raw_store_reads_only_requested_symbols_and_dates(tmp_path):
+    store = RawDataStore(str(tmp_path))
+    store.write(pd.concat([_prices('AAPL', ['2023-06-01', '2024-06-03'], [1.0, 2.0]),
+                           _prices('MSFT', ['2024-06-03'], [3.0])]), 'yahoo_finance', 'historical_1d')
+
+    data = store.read('yahoo_finance', 'historical_1d', symbols=['AAPL'], start='2024-01-01')
+
+    assert data['symbol'].tolist() == ['AAPL']
+    assert data['close'].tolist() == [2.0]
+    assert store.read('yahoo_finance', 'historical_1d', symbols=['TSLA']) is None
+
+
+def test_raw_store_last_dates(tmp_path):
+    store = RawDataStore(str(tmp_path))
+    store.write(pd.concat([_prices('AAPL', ['2023-12-29', '2024-01-03', '2024-01-02'], [1.0, 2.0, 3.0]),
+                           _prices('MSFT', ['2023-11-30'], [4.0])]), 'yahoo_finance', 'historical_1d')
+
+    watermarks = store.last_dates('yahoo_finance', 'historical_1d', ['AAPL', 'MSFT', 'TSLA'])
+
+    assert watermarks == {'AAPL': pd.Timestamp('2024-01-03').date(), 'MSFT': pd.Timestamp('2023-11-30').date()}
+
+
+def test_raw_store_snapshots_are_keyed_by_extraction_day(tmp_path):
+    store = RawDataStore(str(tmp_path))
+    info = pd.DataFrame([{'sector': 'Technology', 'officers': [{'name': 'CEO'}]}])
+    store.write(info, 'yahoo_finance', 'company_info', symbol='AAPL')
+    store.write(info.assign(sector='Tech'), 'yahoo_finance', 'company_info', symbol='AAPL')
+
+    data = store.read('yahoo_finance', 'company_info', date_column=RawDataStore.SNAPSHOT_COLUMN)
+
+    # Même jour d'extraction : la dernière version remplace la précédente
+    assert data['sector'].tolist() == ['Tech']
+    assert data['officers'].tolist() == ['[{"name": "CEO"}]']
@@ -0,0 +1,86 @@
+"""
+Budget d'import des points d'entrée
+
+Le scheduler Airflow réanalyse les fichiers de dags/ toutes les quelques secondes et
+`main.py --help` doit répondre immédiatement : ni l'un ni l'autre ne doit charger les
+dépendances lourdes du pipeline, importées seulement à l'exécution d'une tâche.
+Chaque point d'entrée est chargé dans un interpréteur neuf, qui rapporte la durée du
+chargement et les modules qu'il a importés.
+"""
+import os
+import sys
+import json
+import subprocess
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Dépendances réservées à l'exécution des tâches
+HEAVY_MODULES = {'pandas', 'numpy', 'pyarrow', 'scipy', 'yfinance', 'requests', 'psycopg2', 'yaml'}
+
+# Durée maximale de chargement d'un point d'entrée, en secondes (ETL_IMPORT_BUDGET
+# permet de l'élargir sur une machine d'intégration lente)
+IMPORT_BUDGET = float(os.environ.get('ETL_IMPORT_BUDGET', '0.5'))
+
+# Exécuté dans un interpréteur neuf : argv = [module préchargé, fichier, arguments...]
+_PROBE = """
+import json, runpy, sys, time
+preload, path, argv = sys.argv[1], sys.argv[2], sys.argv[3:]
+if preload:
+    __import__(preload)
+before = set(sys.modules)
+sys.argv = [path] + argv
+start = time.perf_counter()
+try:
+    runpy.run_path(path, run_name='__main__' if argv else 'probe')
+except SystemExit:
+    pass
+seconds = time.perf_counter() - start
+sys.stderr.write(json.dumps({'seconds': seconds, 'modules': sorted(set(sys.modules) - before)}) + '\\n')
+"""
+
+
+def _probe(path, *argv, preload=''):
+    result = subprocess.run([sys.executable, '-c', _PROBE, preload, path, *argv],
+                            cwd=ROOT, capture_output=True, text=True, timeout=120)
+    assert result.stderr.strip(), result.stdout
+    report = json.loads(result.stderr.strip().splitlines()[-1])
+    report['heavy'] = sorted({name.split('.')[0] for name in report['modules']} & HEAVY_MODULES)
+    return result, report
+
+
+def test_main_help_within_budget():
+    result, report = _probe('main.py', '--help')
+
+    assert 'usage:' in result.stdout
+    assert report['heavy'] == []
+    assert report['seconds'] < IMPORT_BUDGET
+
+
+@pytest.mark.parametrize('dag_file', ['daily_etl_dag.py', 'weekly_report_dag.py'])
+def test_dag_parse_within_budget(dag_file):
+    pytest.importorskip('airflow')
+    # Airflow est déjà chargé par le scheduler : seul le coût propre du fichier compte
+    _, report = _probe(os.path.join('dags', dag_file), preload='airflow')
+
+    assert report['heavy'] == []
+    assert report['seconds'] < IMPORT_BUDGET
+
+
+def test_modules_have_no_import_side_effects():
+    # Importer un extracteur ne configure pas la journalisation, et la maintenance
+    # ne lit pas la configuration de la base avant d'en avoir besoin
+    code = (
+        "import logging, sys\n"
+        "import src.extraction.yahoo_finance, src.extraction.alpha_vantage\n"
+        "from src.utils.db_maintenance import DatabaseMaintenance\n"
+        "DatabaseMaintenance(config_path='/nonexistent/db_config.yml')\n"
+        "print(len(logging.getLogger().handlers), "
+        "sorted(m for m in ('yfinance', 'requests', 'psycopg2', 'yaml') if m in sys.modules))\n"
+    )
+    pytest.importorskip('pandas')
+    result = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, timeout=120)
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "0 []"
@@ -0,0 +1,190 @@
+"""
+Job quotidien : un lot en échec fait échouer la tâche sans sauvegarder d'état
+
+Les accès externes du job (téléchargement, base de données) sont remplacés par des
+doublures ; validation, nettoyage, indicateurs et pipeline sont les vrais.
+"""
+import os
+
+import pytest
+
+pd = pytest.importorskip('pandas')
+
+from src import jobs  # noqa: E402
+from src.transformation import data_cleaning  # noqa: E402
+
+
+def _bars(symbols, start='2024-01-02', periods=30):
+    dates = pd.bdate_range(start, periods=periods)
+    frames = []
+    for position, symbol in enumerate(symbols):
+        close = pd.Series([100.0 + position + (i % 7) * 0.3 + i * 0.1 for i in range(periods)])
+        frames.append(pd.DataFrame({'symbol': symbol, 'date': dates, 'open': close, 'high': close + 1,
+                                    'low': close - 1, 'close': close, 'volume': 1000}))
+    return pd.concat(frames, ignore_index=True)
+
+
+class FakeExtractor:
+    def __init__(self, db_connector=None):
+        pass
+
+    def get_incremental_data(self, symbols, overlap_days=None, initial_period='max'):
+        return _bars(symbols)
+
+
+class FailingLoader:
+    """Chargeur dont les écritures échouent pour un symbole donné"""
+
+    failing_symbol = 'MSFT'
+
+    def __init__(self, db_connector=None):
+        self.db = db_connector
+        self.touched = {}
+        self.loaded = []
+
+    def load(self, table, data, source=None, update_columns=None):
+        if self.failing_symbol in set(data['symbol']):
+            raise ConnectionError("connexion perdue pendant le COPY")
+        self.loaded.append((table, sorted(set(data['symbol']))))
+        self.db.tables.setdefault(table, []).append(data)
+        return len(data)
+
+
+class FakeMaintenance:
+    cleanup_succeeds = True
+
+    def __init__(self, config_path=None, env='development'):
+        self.ensured = []
+
+    def create_partitions(self):
+        return []
+
+    def cleanup_database(self):
+        return self.cleanup_succeeds
+
+    def ensure_partitions(self, day, tables=None):
+        self.ensured.append((day, tuple(tables)))
+
+    def refresh_analytics(self, touched):
+        pass
+
+    def refresh_rollups(self, touched):
+        pass
+
+    def close(self):
+        pass
+
+
+class FakeConnector:
+    """Base en mémoire : tables chargées par le chargeur, relues par lots triés par date"""
+
+    def __init__(self, config_path=None, env='development'):
+        self.tables = {}
+
+    def stream_batches(self, query, params=None, batch_size=None):
+        assert 'FROM raw.stock_prices' in query
+        frames = self.tables.get('raw.stock_prices')
+        if not frames:
+            return
+        prices = pd.concat(frames, ignore_index=True)
+        prices = prices[prices['symbol'].isin(params[0])].sort_values('date', kind='stable', ignore_index=True)
+        # Lots de taille fixe : une séance peut être coupée entre deux lots
+        for start in range(0, len(prices), batch_size or 7):
+            yield prices.iloc[start:start + (batch_size or 7)][['symbol', 'date', 'close']]
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def daily_job(tmp_path, monkeypatch):
+    monkeypatch.setattr(jobs, 'YahooFinanceExtractor', FakeExtractor)
+    monkeypatch.setattr(jobs, 'PostgresLoader', FailingLoader)
+    monkeypatch.setattr(jobs, 'DatabaseMaintenance', FakeMaintenance)
+    monkeypatch.setattr(jobs, 'DatabaseConnector', FakeConnector)
+    config = {
+        'batch_size': 1,
+        'workers': {'extract': 1, 'transform': 1, 'load': 1},
+        'validation': {'quarantine_dir': str(tmp_path / 'quarantine')},
+        'indicator_state': str(tmp_path / 'indicators.npz'),
+        'covariance': {'state': str(tmp_path / 'covariance.npz'), 'snapshots': str(tmp_path / 'snapshots')}
+    }
+    return jobs.DailyJob(config)
+
+
+def test_failed_load_fails_the_job_without_saving_state(daily_job):
+    with pytest.raises(jobs.JobFailed) as excinfo:
+        daily_job.run(['AAPL', 'MSFT'])
+
+    assert [stage for stage, _ in excinfo.value.errors] == ['load']
+    assert ('raw.stock_prices', ['AAPL']) in daily_job.loader.loaded
+    assert not os.path.exists(daily_job.state_path)
+    assert not os.path.exists(daily_job.covariance_path)
+
+
+def test_successful_run_saves_state(daily_job):
+    daily_job.run(['AAPL', 'GOOGL'])
+
+    assert os.path.exists(daily_job.state_path)
+    assert os.path.exists(daily_job.covariance_path)
+
+
+def test_missing_state_is_rebuilt_from_the_database(daily_job):
+    # Nouveau poste : ni état local ni zone brute, mais 300 séances déjà en base. Le
+    # watermark de la base limite l'extraction au chevauchement et aux séances nouvelles
+    history = _bars(['AAPL', 'GOOGL'], start='2023-01-02', periods=300)
+    latest = history['date'] >= history['date'].unique()[-8]
+    daily_job.db.tables['raw.stock_prices'] = [history[~latest]]
+    daily_job.extractor.get_incremental_data = lambda symbols, **kwargs: history[latest
+                                                                                 & history['symbol'].isin(symbols)]
+
+    daily_job.run(['AAPL', 'GOOGL'])
+
+    metrics = pd.concat(daily_job.db.tables['processed.stock_metrics'], ignore_index=True)
+    expected = history.groupby('symbol')['close'].transform(lambda close: close.rolling(50).mean())
+    expected = history.assign(ma_50=expected)[latest]
+    merged = metrics.merge(expected, on=['symbol', 'date'], suffixes=('', '_expected'))
+    assert len(merged) == len(expected)
+    assert merged['ma_50'].to_numpy() == pytest.approx(merged['ma_50_expected'].to_numpy())
+
+
+def test_partitions_cover_the_oldest_loaded_session(daily_job):
+    daily_job.run(['AAPL', 'GOOGL'])
+
+    # Un lot par symbole : les partitions sont vérifiées avant chaque chargement
+    assert daily_job.maintenance.ensured == [(pd.Timestamp('2024-01-02'), jobs.DailyJob.TABLES)] * 2
+
+
+def test_cleaning_error_drops_only_its_symbol(daily_job, monkeypatch):
+    clean_prices = data_cleaning.clean_prices
+
+    def fragile_clean(df):
+        if 'MSFT' in set(df['symbol']):
+            raise ValueError("cours illisibles")
+        return clean_prices(df)
+
+    monkeypatch.setattr(data_cleaning, 'clean_prices', fragile_clean)
+    daily_job.config['batch_size'] = 3
+
+    # MSFT, écarté au nettoyage, n'atteint pas le chargeur (qui échouerait sur ce symbole)
+    daily_job.run(['AAPL', 'MSFT', 'GOOGL'])
+
+    assert daily_job.loader.loaded[0] == ('raw.stock_prices', ['AAPL', 'GOOGL'])
+
+
+def test_covariance_closes_only_from_loaded_batches(daily_job):
+    with pytest.raises(jobs.JobFailed):
+        daily_job.run(['AAPL', 'MSFT'])
+
+    closes = pd.concat(daily_job._closes)
+    assert set(closes['symbol']) == {'AAPL'}
+
+
+def test_maintenance_job_fails_when_cleanup_fails(monkeypatch):
+    monkeypatch.setattr(jobs, 'DatabaseMaintenance', FakeMaintenance)
+    job = jobs.JOBS['maintenance']({})
+
+    assert job.run() == {'partitions_created': 0}
+    monkeypatch.setattr(FakeMaintenance, 'cleanup_succeeds', False)
+    with pytest.raises(jobs.JobFailed):
+        job.run()
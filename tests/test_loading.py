@@ -0,0 +1,90 @@
+from datetime import date
+
+from src.loading.postgres_loader import PostgresLoader
+from src.loading.postgres_schema import TABLES
+from src.utils.db_maintenance import DatabaseMaintenance, _add_months
+
+
+def test_upsert_updates_requested_columns():
+    sql = PostgresLoader._upsert_sql('raw.stock_prices', 'staging', TABLES['raw.stock_prices'],
+                                     update_columns=['vwap'])
+
+    assert sql.endswith("ON CONFLICT (symbol, date) DO UPDATE SET vwap = COALESCE(EXCLUDED.vwap, target.vwap)")
+
+
+def test_upsert_without_updatable_column_does_nothing():
+    sql = PostgresLoader._upsert_sql('raw.stock_prices', 'staging', TABLES['raw.stock_prices'],
+                                     update_columns=['symbol', 'date'])
+
+    assert sql.endswith("ON CONFLICT (symbol, date) DO NOTHING")
+
+
+class RecordingConnection:
+    """Connexion sans base : les partitions créées sont mémorisées, les requêtes enregistrées"""
+
+    def __init__(self):
+        self.queries = []
+        self.partitions = set()
+        self.rowcount = 0
+
+    def cursor(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, params=None):
+        self.queries.append((query, params))
+        if query.startswith('CREATE TABLE'):
+            self.partitions.add(query.split()[2])
+
+    def fetchone(self):
+        name = self.queries[-1][1][0]
+        return (name if name in self.partitions else None,)
+
+    def commit(self):
+        pass
+
+    def attached(self):
+        return [f"{query.split()[2]} {params[0]}" for query, params in self.queries
+                if query.startswith('ALTER TABLE') and 'ATTACH' in query]
+
+
+def _maintenance():
+    maintenance = DatabaseMaintenance()
+    maintenance.conn = RecordingConnection()
+    return maintenance
+
+
+def test_partitions_start_at_the_retention_horizon():
+    maintenance = _maintenance()
+
+    maintenance.create_partitions(months_ahead=0)
+
+    this_month = date.today().replace(day=1)
+    attached = maintenance.conn.attached()
+    assert f"raw.stock_prices {_add_months(this_month, -24)}" in attached
+    assert f"raw.intraday_bars {_add_months(this_month, -6)}" in attached
+    assert f"processed.stock_metrics {this_month}" in attached
+    assert len(attached) == 25 + 7 + 1
+
+
+def test_ensure_partitions_extends_the_coverage_backwards_once():
+    maintenance = _maintenance()
+    maintenance.create_partitions(months_ahead=0)
+    maintenance.conn.queries = []
+
+    this_month = date.today().replace(day=1)
+    tables = ['raw.stock_prices', 'processed.stock_metrics']
+    maintenance.ensure_partitions(_add_months(this_month, -2), tables)
+    queries = len(maintenance.conn.queries)
+    # Mois déjà couverts : aucune requête
+    maintenance.ensure_partitions(_add_months(this_month, -1), tables)
+
+    assert len(maintenance.conn.queries) == queries
+    assert not any('raw.stock_prices' in str(params) for _, params in maintenance.conn.queries)
+    assert maintenance.conn.attached()[:2] == [f"processed.stock_metrics {_add_months(this_month, months)}"
+                                               for months in (-2, -1)]
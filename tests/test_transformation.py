@@ -0,0 +1,170 @@
+import os
+
+import pytest
+
+np = pytest.importorskip('numpy')
+pd = pytest.importorskip('pandas')
+
+from src.transformation.data_cleaning import clean_prices  # noqa: E402
+from src.transformation.financial_indicators import FinancialIndicators, IndicatorState  # noqa: E402
+from src.utils.data_validation import DEFAULT_RULES, DataValidator  # noqa: E402
+
+
+def test_clean_prices_leaves_input_untouched():
+    df = pd.DataFrame({
+        'symbol': ['AAPL', 'AAPL', 'AAPL'],
+        'date': pd.to_datetime(['2024-01-02', '2024-01-03', '2024-01-04']),
+        'open': [10.0, -1.0, 11.0],
+        'high': [10.5, 11.0, np.inf],
+        'low': [9.5, 10.0, 10.5],
+        'close': [10.2, 10.8, 11.2]
+    })
+    before = df.copy()
+
+    cleaned = clean_prices(df)
+
+    pd.testing.assert_frame_equal(df, before)
+    assert np.isnan(cleaned.loc[1, 'open'])
+    assert cleaned.loc[2, 'high'] == 11.2
+
+
+def _history(symbols=('AAPL', 'MSFT', 'SPY'), periods=300, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range('2022-01-03', periods=periods)
+    return pd.concat([
+        pd.DataFrame({'symbol': symbol, 'date': dates,
+                      'close': 100 * np.exp(np.cumsum(rng.normal(0, 0.01, periods)))})
+        for symbol in symbols
+    ], ignore_index=True)
+
+
+def _metrics(frame):
+    columns = ['close', 'ma_20', 'ma_50', 'ma_200', 'rsi', 'volatility']
+    return frame[columns].to_numpy(dtype=np.float64)
+
+
+def test_indicators_are_computed_per_symbol():
+    history = _history()
+    shuffled = history.sample(frac=1.0, random_state=1)
+
+    result = FinancialIndicators().compute(shuffled)
+    alone = FinancialIndicators().compute(history[history['symbol'] == 'MSFT'])
+
+    # Ordre d'entrée indifférent, aucune fenêtre ne déborde sur le symbole voisin
+    msft = result[result['symbol'] == 'MSFT']
+    np.testing.assert_allclose(_metrics(msft), _metrics(alone), rtol=1e-12, equal_nan=True)
+    # Avant 200 séances, la moyenne porte sur les séances disponibles
+    closes = history.loc[history['symbol'] == 'MSFT', 'close'].to_numpy()
+    assert msft['ma_200'].iloc[9] == pytest.approx(closes[:10].mean())
+    assert msft['ma_200'].iloc[-1] == pytest.approx(closes[-200:].mean())
+    assert result['rsi'].dropna().between(0, 100).all()
+
+
+def test_indicator_state_updates_match_full_recomputation():
+    history = _history()
+    dates = history['date'].drop_duplicates().sort_values().to_numpy()
+    reference = FinancialIndicators().compute(history)
+
+    state = IndicatorState.from_history(history[history['date'] < dates[250]])
+    updates = pd.concat([state.update(history[history['date'].isin(dates[i:i + 10])])
+                         for i in range(250, 300, 10)], ignore_index=True)
+    updates = updates.sort_values(['symbol', 'date'], ignore_index=True)
+    expected = reference[reference['date'] >= dates[250]].reset_index(drop=True)
+
+    assert updates['symbol'].astype(str).tolist() == expected['symbol'].astype(str).tolist()
+    np.testing.assert_allclose(_metrics(updates), _metrics(expected), rtol=1e-9, atol=1e-9, equal_nan=True)
+
+
+def test_indicator_state_skips_known_sessions_and_survives_a_reload(tmp_path):
+    history = _history(periods=60)
+    state = IndicatorState.from_history(history)
+    path = str(tmp_path / 'indicators.npz')
+    state.save(path)
+
+    # Séances déjà intégrées (fenêtre de recouvrement) : rien n'est recalculé
+    assert state.update(history[history['date'] >= history['date'].max() - pd.Timedelta(days=7)]).empty
+
+    following = _history(periods=61).groupby('symbol').tail(1)
+    np.testing.assert_allclose(_metrics(IndicatorState.load(path).update(following)),
+                               _metrics(state.update(following)), equal_nan=True)
+
+
+def _bar(symbol, date, close, **overrides):
+    return {'symbol': symbol, 'date': pd.Timestamp(date), 'open': close, 'high': close + 1,
+            'low': close - 1, 'close': close, 'volume': 1000, **overrides}
+
+
+def _batch():
+    # Chaque ligne en défaut ne déclenche qu'une règle ; la ligne sans symbole casse
+    # l'ordre (symbole, date) et exerce le retour à l'ordre d'entrée
+    rows = [
+        (_bar('OK', '2024-01-02', 100.0), ''),
+        (_bar(None, '2024-01-02', 100.0), 'missing_key'),
+        (_bar('PRICE', '2024-01-02', -5.0), 'invalid_price'),
+        (_bar('OHLC', '2024-01-02', 100.0, high=99.0), 'ohlc_inconsistent'),
+        (_bar('VOLUME', '2024-01-02', 100.0, volume=-1), 'negative_volume'),
+        (_bar('DUP', '2024-01-02', 100.0), 'duplicate_key'),
+        (_bar('DUP', '2024-01-02', 101.0), ''),
+        (_bar('GAP', '2024-01-02', 100.0), ''),
+        (_bar('GAP', '2024-01-15', 101.0), 'calendar_gap'),
+        (_bar('JUMP', '2024-01-02', 100.0), ''),
+        (_bar('JUMP', '2024-01-03', 200.0), 'return_outlier')
+    ]
+    return pd.DataFrame([row for row, _ in rows]), [reason for _, reason in rows]
+
+
+def test_validator_sets_one_bit_per_rule():
+    df, expected = _batch()
+    validator = DataValidator()
+
+    result = validator.validate(df)
+
+    bits = {rule.code: 1 << bit for bit, rule in enumerate(DEFAULT_RULES)}
+    assert result.flags.tolist() == [bits.get(reason, 0) for reason in expected]
+    assert validator.describe(result.flags).tolist() == expected
+    assert result.summary['rules'] == {rule.code: 1 for rule in DEFAULT_RULES}
+
+
+def test_validator_quarantines_errors_and_keeps_warnings():
+    df, expected = _batch()
+
+    result = DataValidator().validate(df)
+
+    errors = {'missing_key', 'invalid_price', 'ohlc_inconsistent', 'negative_volume', 'duplicate_key'}
+    assert result.quarantine['reasons'].tolist() == [reason for reason in expected if reason in errors]
+    # La dernière occurrence du doublon et les lignes signalées en 'warning' restent valides
+    assert result.valid.index.tolist() == [i for i, reason in enumerate(expected) if reason not in errors]
+    assert result.valid.loc[6, 'close'] == 101.0
+    assert (result.summary['rows'], result.summary['valid'], result.summary['quarantined']) == (11, 6, 5)
+
+    strict = DataValidator(quarantine_warnings=True).validate(df)
+    assert strict.quarantine.index.tolist() == [i for i, reason in enumerate(expected) if reason]
+
+
+def test_validator_returns_a_clean_batch_without_copy():
+    df = pd.DataFrame([_bar('AAPL', date, 100.0 + i) for i, date in enumerate(['2024-01-02', '2024-01-03'])])
+
+    result = DataValidator().validate(df)
+
+    assert result.valid is df
+    assert result.quarantine.empty
+    assert not result.flags.any()
+
+
+def test_validator_writes_the_quarantine_file(tmp_path):
+    df, expected = _batch()
+    validator = DataValidator(quarantine_dir=str(tmp_path))
+
+    path = validator.save_quarantine(validator.validate(df), 'yahoo_finance')
+    saved = pd.read_parquet(path)
+
+    assert os.path.dirname(path) == str(tmp_path / 'yahoo_finance')
+    assert saved['symbol'].tolist() == [df.loc[i, 'symbol'] for i, reason in enumerate(expected)
+                                        if reason in ('missing_key', 'invalid_price', 'ohlc_inconsistent',
+                                                      'negative_volume', 'duplicate_key')]
+    assert saved['reasons'].tolist()[:2] == ['missing_key', 'invalid_price']
+    assert {'reason_mask', 'quarantined_at'} <= set(saved.columns)
+    # Quarantaine vide : aucun fichier
+    clean = df[[not reason for reason in expected]]
+    assert validator.save_quarantine(validator.validate(clean), 'yahoo_finance') is None
+    assert os.listdir(tmp_path / 'yahoo_finance') == [os.path.basename(path)]